@@ -0,0 +1,116 @@
+"""结果缓存并发吞吐基准
+
+对比改造前的 SimpleCache(单个TTLCache + 旧读写锁)与分片加锁的 SimpleCache
+在不同线程数下的每秒操作数。
+
+用法: python -m benchmarks.bench_cache [--threads 1 2 4 8 16] [--seconds 2]
+"""
+import argparse
+import random
+import threading
+import time
+
+from cachetools import TTLCache
+
+from src.utils.CacheManager import SimpleCache
+
+
+class LegacyReadWriteLock:
+    """改造前的读写锁实现(acquire_write 返回时并未持有任何锁), 仅用于对比"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._read_ready = threading.Condition(self._lock)
+        self._readers = 0
+
+    def acquire_read(self):
+        with self._lock:
+            self._readers += 1
+            self._read_ready.notify()
+
+    def release_read(self):
+        with self._lock:
+            self._readers -= 1
+            self._read_ready.notify()
+
+    def acquire_write(self):
+        with self._lock:
+            while self._readers > 0:
+                self._read_ready.wait()
+
+    def release_write(self):
+        with self._lock:
+            self._read_ready.notify()
+
+
+class LegacySimpleCache:
+    """改造前的 SimpleCache, 仅用于对比"""
+    def __init__(self, maxsize: int = 128, ttl: int = 300):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.rw_lock = LegacyReadWriteLock()
+
+    def set(self, key, value, namespace=None):
+        self.rw_lock.acquire_write()
+        try:
+            self.cache[key] = value
+        finally:
+            self.rw_lock.release_write()
+
+    def get(self, key, namespace=None):
+        self.rw_lock.acquire_read()
+        try:
+            return self.cache.get(key)
+        finally:
+            self.rw_lock.release_read()
+
+
+def run(cache, threads: int, seconds: float, keys: int = 100, read_ratio: float = 0.9) -> float:
+    """多线程混合读写 seconds 秒, 返回每秒操作数"""
+    stop = threading.Event()
+    counts = [0] * threads
+    values = {f'k{i}': [i] * 10 for i in range(keys)}
+    for key, value in values.items():
+        cache.set(key, value, 'searchData')
+
+    def worker(idx):
+        rnd = random.Random(idx)
+        n = 0
+        while not stop.is_set():
+            for _ in range(100):
+                key = f'k{rnd.randrange(keys)}'
+                if rnd.random() < read_ratio:
+                    cache.get(key, 'searchData')
+                else:
+                    cache.set(key, values[key], 'searchData')
+            n += 100
+        counts[idx] = n
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='结果缓存并发吞吐基准')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    impls = {
+        'legacy': lambda: LegacySimpleCache(maxsize=1024),
+        'sharded(1)': lambda: SimpleCache(shards=1),
+        'sharded(8)': lambda: SimpleCache(shards=8),
+        'sharded(32)': lambda: SimpleCache(shards=32),
+    }
+    print(f"{'threads':>8}" + ''.join(f'{name:>14}' for name in impls))
+    for threads in args.threads:
+        row = [run(factory(), threads, args.seconds) for factory in impls.values()]
+        print(f'{threads:>8}' + ''.join(f'{ops:>14,.0f}' for ops in row))
+
+
+if __name__ == '__main__':
+    main()
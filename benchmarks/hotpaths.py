@@ -0,0 +1,175 @@
+"""CPU 热点路径的基准用例及合成数据
+
+每个用例以 setup(rows) 生成指定行数的合成数据, 返回一个无参函数, 计时只包含该函数的执行。
+合成影像为中国范围内随机分布、略有旋转的四边形景框(与 SDO_GEOMETRY 2003 的5个顶点一致),
+行政区划为按 省/市/县 编码规则生成的代码表。
+"""
+import json
+import math
+import random
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+
+# 合成数据的经纬度范围
+EXTENT = (75.0, 20.0, 130.0, 48.0)
+# 景框半宽(度), 约对应 30~60km 的景
+HALF_SPAN = (0.15, 0.3)
+COLUMNS = ['F_DATANAME', 'F_DID', 'F_CLOUDPERCENT', 'F_SATELLITEID', 'F_SENSORID', 'F_RECEIVETIME',
+           'F_DATASIZE', 'F_PRODUCTLEVEL', 'F_TABLENAME']
+
+
+class FakeOrdinates:
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = values
+
+    def aslist(self):
+        return self.values
+
+
+class FakeSdoGeometry:
+    """模拟 oracledb 返回的 SDO_GEOMETRY 对象, 只提供 imageDataToGeoDataFrame 用到的属性"""
+    __slots__ = ('SDO_GTYPE', 'SDO_ORDINATES')
+
+    def __init__(self, ordinates: list):
+        self.SDO_GTYPE = 2003
+        self.SDO_ORDINATES = FakeOrdinates(ordinates)
+
+
+def footprints(rows: int, seed: int = 0) -> np.ndarray:
+    """生成 rows 个景框的顶点坐标, 形状为 (rows, 5, 2)"""
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = EXTENT
+    center = np.column_stack([rng.uniform(minx, maxx, rows), rng.uniform(miny, maxy, rows)])
+    half = rng.uniform(*HALF_SPAN, rows)[:, None]
+    angle = rng.uniform(-0.2, 0.2, rows)
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1], [-1, -1]], dtype=np.float64)
+    cos, sin = np.cos(angle)[:, None], np.sin(angle)[:, None]
+    x = corners[None, :, 0] * half
+    y = corners[None, :, 1] * half
+    return np.stack([center[:, :1] + x * cos - y * sin, center[:, 1:] + x * sin + y * cos], axis=-1)
+
+
+def satellite_sensor() -> tuple:
+    """取配置中的第一个卫星/传感器, 使 formatDictForView 能查到节点号"""
+    from src.config.config import satelliteToNodeId
+    satellite, sensors = next(iter(satelliteToNodeId.items()))
+    return satellite, next(iter(sensors))
+
+
+def image_rows(rows: int, seed: int = 0) -> list:
+    """数据库查询结果形式的影像数据, 最后一列为 SDO_GEOMETRY"""
+    rnd = random.Random(seed)
+    satellite, sensor = satellite_sensor()
+    coords = footprints(rows, seed).reshape(rows, -1).tolist()
+    return [
+        (f'{satellite}_{sensor}_{i:08d}', i, rnd.randint(0, 100), satellite, sensor,
+         f'2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} 10:00:00', round(rnd.uniform(100, 2000), 2),
+         'L1A', f'TB_{satellite}', FakeSdoGeometry(coords[i]))
+        for i in range(rows)
+    ]
+
+
+def image_gdf(rows: int, seed: int = 0):
+    import geopandas as gpd
+    data = [row[:-1] for row in image_rows(rows, seed)]
+    return gpd.GeoDataFrame(data, columns=COLUMNS, geometry=shapely.polygons(footprints(rows, seed)), crs='EPSG:4326')
+
+
+def target_area():
+    """省级大小的目标区域"""
+    return box(108.0, 28.0, 116.0, 34.0)
+
+
+def district_rows(rows: int) -> list:
+    """按编码规则生成 rows 个行政区划(省 -> 市 -> 县), 代码带156前缀"""
+    result = [{'CODE': '156000000', 'NAME': '全国'}]
+    provinces = max(1, min(89, int(math.sqrt(rows / 20))))
+    per_province = rows // provinces
+    cities = max(1, min(98, int(math.sqrt(per_province))))
+    counties = max(1, min(98, per_province // cities - 1))
+    for p in range(provinces):
+        prov = f'{p + 11:02d}'
+        result.append({'CODE': f'156{prov}0000', 'NAME': f'省{prov}'})
+        for c in range(cities):
+            city = f'{prov}{c + 1:02d}'
+            result.append({'CODE': f'156{city}00', 'NAME': f'市{city}'})
+            for k in range(counties):
+                result.append({'CODE': f'156{city}{k + 1:02d}', 'NAME': f'县{city}{k + 1:02d}'})
+    return result[:rows]
+
+
+def bench_image_to_gdf(rows: int):
+    from src.utils.GeoDBHandler import GeoDBHandler
+    handler = GeoDBHandler()
+    data = image_rows(rows)
+    return lambda: handler.imageDataToGeoDataFrame(data, list(COLUMNS))
+
+
+def bench_find_intersected(rows: int):
+    from src.utils.GeoProcessor import GeoProcessor
+    processor = GeoProcessor()
+    gdf, area = image_gdf(rows), target_area()
+    return lambda: processor.findIntersectedData(area, gdf)
+
+
+def bench_coverage_ratio(rows: int):
+    from src.utils.GeoProcessor import GeoProcessor
+    processor = GeoProcessor()
+    gdf, area = image_gdf(rows), target_area()
+    return lambda: processor.calCoverageRatio(area, gdf)
+
+
+def bench_merged_area(rows: int):
+    from src.utils.GeoProcessor import GeoProcessor
+    processor = GeoProcessor()
+    gdf = image_gdf(rows)
+    return lambda: processor.calculateMergedArea(gdf)
+
+
+def bench_gdf_to_dict(rows: int):
+    from src.utils.GeoProcessor import GeoProcessor
+    processor = GeoProcessor()
+    gdf = image_gdf(rows)
+    return lambda: processor.GeoDataFrameToDict(gdf)
+
+
+def bench_format_for_view(rows: int):
+    from src.geocloudservice.recommend import formatDictForView
+    from src.utils.GeoProcessor import GeoProcessor
+    records = GeoProcessor().GeoDataFrameToDict(image_gdf(rows))
+    return lambda: formatDictForView(records)
+
+
+def bench_build_tree(rows: int):
+    from src.geocloudservice.area_tree import build_tree
+    data = district_rows(rows)
+    return lambda: build_tree(data)
+
+
+def bench_sm4(rows: int):
+    from src.utils.sm4encry import SM4Util
+    util = SM4Util(key=b'0123456789abcdef')
+    satellite, sensor = satellite_sensor()
+    payload = json.dumps([{'F_DATANAME': f'{satellite}_{sensor}_{i:08d}', 'F_DID': i, 'F_CLOUDPERCENT': i % 100}
+                          for i in range(rows)], ensure_ascii=False)
+
+    def run():
+        util.decrypt_ecb_base64(util.encrypt_ecb_base64(payload))
+
+    return run
+
+
+BENCHMARKS = {
+    'imageDataToGeoDataFrame': bench_image_to_gdf,
+    'findIntersectedData': bench_find_intersected,
+    'calCoverageRatio': bench_coverage_ratio,
+    'calculateMergedArea': bench_merged_area,
+    'GeoDataFrameToDict': bench_gdf_to_dict,
+    'formatDictForView': bench_format_for_view,
+    'build_tree': bench_build_tree,
+    'SM4Util': bench_sm4,
+}
@@ -0,0 +1,131 @@
+"""热点路径基准运行器
+
+对 benchmarks.hotpaths 中的用例在各数据规模下计时(多次运行取最短时间), 结果保存为JSON基准;
+与已有基准比较时, 耗时超过 基准 x (1 + 容差) 的用例视为性能回退, 进程返回码为1。
+基准与机器相关, 应在同一台机器上生成和比较。
+
+用法:
+    python main.py bench --save                     # 生成/更新基准
+    python main.py bench                            # 与基准比较
+    python main.py bench --only SM4Util build_tree --sizes 1000 10000 --tolerance 0.3
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import traceback
+import warnings
+
+from benchmarks.hotpaths import BENCHMARKS
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def measure(func, repeat: int, budget: float, min_time: float = 0.5) -> float:
+    """运行 func 至少 repeat 次且累计至少 min_time 秒(总耗时不超过 budget 秒), 返回最短耗时(秒)"""
+    best = None
+    spent = 0.0
+    runs = 0
+    while runs < repeat or spent < min_time:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None or elapsed < best else best
+        spent += elapsed
+        runs += 1
+        if spent >= budget:
+            break
+    return best
+
+
+def run(names: list, sizes: list, repeat: int = 5, budget: float = 5.0) -> dict:
+    """返回 {"用例@行数": 秒}, 用例出错时记录为None"""
+    # 被测代码中的 pandas/geopandas 警告在每次运行时重复输出, 影响结果阅读
+    warnings.simplefilter('ignore', UserWarning)
+    results = {}
+    for name in names:
+        for rows in sizes:
+            key = f'{name}@{rows}'
+            try:
+                func = BENCHMARKS[name](rows)
+                func()  # 预热, 排除首次导入和缓存建立的开销
+                results[key] = measure(func, repeat, budget)
+                print(f'{key:<36}{results[key] * 1000:>12.2f} ms', flush=True)
+            except Exception:
+                results[key] = None
+                print(f'{key:<36}{"失败":>12}', flush=True)
+                traceback.print_exc()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """返回性能回退的用例列表 [(键, 基准秒, 当前秒)]"""
+    regressions = []
+    print(f"\n{'用例':<36}{'基准(ms)':>12}{'当前(ms)':>12}{'变化':>10}")
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None or current is None:
+            print(f'{key:<36}{"-":>12}{"-" if current is None else f"{current * 1000:.2f}":>12}')
+            continue
+        change = current / base - 1
+        flag = ' 回退' if change > tolerance else ''
+        print(f'{key:<36}{base * 1000:>12.2f}{current * 1000:>12.2f}{change:>+10.1%}{flag}')
+        if change > tolerance:
+            regressions.append((key, base, current))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='CPU 热点路径基准')
+    add_arguments(parser)
+    return execute(parser.parse_args(argv))
+
+
+def add_arguments(parser):
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='只运行指定用例')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='数据行数')
+    parser.add_argument('--repeat', type=int, default=5, help='每个用例的最少运行次数')
+    parser.add_argument('--budget', type=float, default=5.0, help='每个用例的计时预算(秒)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基准文件路径')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许的耗时增幅, 0.25 表示 25%%')
+    parser.add_argument('--save', action='store_true', help='将本次结果写入基准文件')
+
+
+def execute(args) -> int:
+    results = run(args.only or list(BENCHMARKS), args.sizes, args.repeat, args.budget)
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f).get('results', {})
+        baseline.update({key: value for key, value in results.items() if value is not None})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.platform(),
+                'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'results': baseline,
+            }, f, ensure_ascii=False, indent=2)
+        print(f'\n基准已保存到 {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f'\n基准文件 {args.baseline} 不存在, 使用 --save 生成')
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    failed = [key for key, value in results.items() if value is None]
+    if failed:
+        print(f'\n{len(failed)} 个用例运行失败: {", ".join(failed)}')
+        return 1
+    if regressions:
+        print(f'\n{len(regressions)} 个用例性能回退超过 {args.tolerance:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,24 @@ def data_extraction_external():
     main()
     pass
 
-def run_web():
+def add_web_arguments(parser):
+    parser.add_argument('--host', help='监听地址, 默认取 web_api_host')
+    parser.add_argument('--port', type=int, help='监听端口, 默认取 web_api_port')
+    parser.add_argument('--workers', type=int, help='工作进程数, 大于1时以 SO_REUSEPORT 多进程运行, 默认取 WEB_WORKERS')
+    parser.add_argument('--threads', type=int, help='每个进程的 waitress 线程数, 默认取 WEB_THREADS')
+    parser.add_argument('--connection-limit', type=int, help='每个进程的最大连接数, 默认取 WEB_CONNECTION_LIMIT')
+    parser.add_argument('--channel-timeout', type=int, help='空闲连接的超时秒数, 默认取 WEB_CHANNEL_TIMEOUT')
+    parser.add_argument('--dev', action='store_true', default=None, help='使用 Flask 开发服务器(单进程, 仅用于调试)')
+
+def run_web(args=None):
     from src.geocloudservice.web import main
-    main()
\ No newline at end of file
+    main(vars(args) if args is not None else None)
+
+def add_bench_arguments(parser):
+    from benchmarks.runner import add_arguments
+    add_arguments(parser)
+
+def run_bench(args):
+    import sys
+    from benchmarks.runner import execute
+    sys.exit(execute(args))
@@ -0,0 +1,155 @@
+"""GeoCloud 接口压测
+
+按场景文件(默认 loadtest/scenario.json, 可用环境变量 LOADTEST_SCENARIO 指定)中的权重混合请求:
+一键推荐(含同一 guid 的翻页)、推荐合并面、数据查询、行政区划树和订单统计;
+查询范围从县级到全国, 以随机位置的矩形 WKT 或行政区划代码给出。
+结束时输出各接口的 p50/p95/p99, 超过场景中 p95Seconds 阈值时进程返回码为1。
+
+用法:
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:12345
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:12345 --headless -u 50 -r 5 -t 10m --csv result
+"""
+import json
+import os
+import random
+import uuid
+from datetime import date, timedelta
+
+from locust import HttpUser, between, events, task
+
+SCENARIO_PATH = os.environ.get("LOADTEST_SCENARIO", os.path.join(os.path.dirname(__file__), "scenario.json"))
+with open(SCENARIO_PATH, encoding="utf-8") as f:
+    SCENARIO = json.load(f)
+
+RECOMMEND = "/recommend_query/recommend"
+RECOMMEND_PAGE2 = f"{RECOMMEND} (page 2)"
+RECOMMEND_MERGE = "/recommend_query/recommend_merge"
+SEARCH = "/search_query/search"
+AREAS = "/agrsArea/get"
+STAT = "/bupt_stat/get"
+
+
+def choose(weights: dict) -> str:
+    names = list(weights)
+    return random.choices(names, weights=[weights[name] for name in names])[0]
+
+
+def random_area() -> tuple:
+    """按场景权重选择查询范围, 返回 (范围级别, 行政区划代码, WKT), 两者之一为空字符串"""
+    scale = choose(SCENARIO["areaWeights"])
+    area = SCENARIO["areas"][scale]
+    if area["halfSpanDegrees"] is None or (area["areaCodes"] and random.random() < 0.5):
+        return scale, random.choice(area["areaCodes"]), ""
+    extent = SCENARIO["extent"]
+    half = random.uniform(*area["halfSpanDegrees"])
+    lon = random.uniform(extent["minlon"] + half, extent["maxlon"] - half)
+    lat = random.uniform(extent["minlat"] + half, extent["maxlat"] - half)
+    minlon, maxlon, minlat, maxlat = lon - half, lon + half, lat - half, lat + half
+    wkt = (f"POLYGON(({minlon:.4f} {minlat:.4f},{maxlon:.4f} {minlat:.4f},{maxlon:.4f} {maxlat:.4f},"
+           f"{minlon:.4f} {maxlat:.4f},{minlon:.4f} {minlat:.4f}))")
+    return scale, "", wkt
+
+
+def random_tables() -> list:
+    low, high = SCENARIO["tablesPerQuery"]
+    return random.sample(SCENARIO["tables"], k=random.randint(low, min(high, len(SCENARIO["tables"]))))
+
+
+def random_period(options: dict) -> tuple:
+    end = date.fromisoformat(options["latestDate"]) - timedelta(days=random.randint(0, 365))
+    start = end - timedelta(days=random.choice(options["spanDays"]))
+    return start, end
+
+
+def query_body(tables: list, area_code: str, wkt: str, guid: str, page: int = 1, search_fields: list = None) -> dict:
+    """构造与前端一致的 QueryBody"""
+    node_id = SCENARIO["nodeId"]
+    return {
+        "guid": guid,
+        "nodeId": node_id,
+        "nodeName": ",".join(tables),
+        "geometryType": 1 if wkt else 0,
+        "areaCode": area_code,
+        "wkt": wkt,
+        "queryStatus": 1,
+        "isExl": "0",
+        "isNoWkt": 1,
+        "pageSize": SCENARIO["pageSize"],
+        "currentPage": page,
+        "queryType": "WX",
+        "intervalDays": 0,
+        "sensortranslations": [
+            {"fSensor": table, "fnodeid": int(node_id), "fIsshow": "1", "id": table} for table in tables
+        ],
+        "tables": [
+            {"tableName": table, "queryFieldsList": search_fields} for table in tables
+        ] if search_fields else None,
+    }
+
+
+def search_fields() -> list:
+    start, end = random_period(SCENARIO["search"])
+    node_id = SCENARIO["nodeId"]
+    return [
+        {"alisaName": "云量", "name": "F_CLOUDPERCENT", "queryValue": [str(random.choice(SCENARIO["search"]["cloudPercent"]))],
+         "type": "number", "nodeId": node_id},
+        {"alisaName": "采集时间", "name": "F_RECEIVETIME",
+         "queryValue": [f"{start} 00:00:00", f"{end} 23:59:59"], "type": "date", "nodeId": node_id},
+    ]
+
+
+class GeoCloudUser(HttpUser):
+    wait_time = between(1, 5)
+
+    def post_json(self, path: str, body: dict, name: str = None, scale: str = None):
+        with self.client.post(path, json=body, name=name or path, catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f"HTTP {response.status_code} ({scale or '-'})")
+            return response
+
+    @task(SCENARIO["weights"]["recommend"])
+    def recommend(self):
+        scale, area_code, wkt = random_area()
+        guid = uuid.uuid4().hex
+        tables = random_tables()
+        self.post_json(RECOMMEND, query_body(tables, area_code, wkt, guid), scale=scale)
+        # 部分用户随后翻到第2页, 同一 guid 应命中结果缓存
+        if random.random() < SCENARIO["secondPageProbability"]:
+            self.post_json(RECOMMEND, query_body(tables, area_code, wkt, guid, page=2), name=RECOMMEND_PAGE2,
+                           scale=scale)
+
+    @task(SCENARIO["weights"]["recommend_merge"])
+    def recommend_merge(self):
+        scale, area_code, wkt = random_area()
+        self.post_json(RECOMMEND_MERGE, query_body(random_tables(), area_code, wkt, uuid.uuid4().hex), scale=scale)
+
+    @task(SCENARIO["weights"]["search"])
+    def search(self):
+        scale, area_code, wkt = random_area()
+        body = query_body(random_tables(), area_code, wkt, uuid.uuid4().hex, search_fields=search_fields())
+        self.post_json(SEARCH, body, scale=scale)
+
+    @task(SCENARIO["weights"]["areas"])
+    def areas(self):
+        params = {"code": random.choice(SCENARIO["areaTreeCodes"]), "showAllSub": random.choice(["true", "false"])}
+        self.client.get(AREAS, params=params, name=AREAS)
+
+    @task(SCENARIO["weights"]["stat"])
+    def stat(self):
+        start, end = random_period(SCENARIO["stat"])
+        body = {"data": {"lessCreattimeStr": f"{start} 00:00:00", "moreCreattimeStr": f"{end} 23:59:59"}}
+        self.post_json(STAT, body)
+
+
+@events.quitting.add_listener
+def report_percentiles(environment, **kwargs):
+    """输出各接口的 p50/p95/p99, 并按场景中的 p95 阈值决定返回码"""
+    thresholds = SCENARIO.get("p95Seconds", {})
+    print(f"{'接口':<45}{'请求数':>8}{'失败':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for (name, method), entry in sorted(environment.stats.entries.items()):
+        p50, p95, p99 = (entry.get_response_time_percentile(q) for q in (0.5, 0.95, 0.99))
+        print(f"{method + ' ' + name:<45}{entry.num_requests:>8}{entry.num_failures:>6}{p50:>10.0f}{p95:>10.0f}{p99:>10.0f}")
+        limit = thresholds.get(name)
+        if limit is not None and entry.num_requests and p95 > limit * 1000:
+            print(f"  p95 超过阈值 {limit}s")
+            environment.process_exit_code = 1
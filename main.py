@@ -9,6 +9,9 @@ data_extraction_internal_command = subparsers.add_parser("internal", help="Data
 data_extraction_external_command = subparsers.add_parser("external", help="Data Extraction Service in External Machines")
 
 main_service_command = subparsers.add_parser("web", help="Main Web Service")
+commands.add_web_arguments(main_service_command)
+bench_command = subparsers.add_parser("bench", help="Benchmark CPU hot paths against the saved baseline")
+commands.add_bench_arguments(bench_command)
 
 args = parser.parse_args()
 match args.subparsers:
@@ -17,6 +20,8 @@ match args.subparsers:
     case 'external':
         commands.data_extraction_external()
     case 'web':
-        commands.run_web()
+        commands.run_web(args)
+    case 'bench':
+        commands.run_bench(args)
     case _:
         print("Invalid command")
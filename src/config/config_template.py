@@ -7,10 +7,91 @@ DB_PORT = 5432
 DB_DATABASE = 'your_database_name'
 DB_USER = 'your_database_user'
 DB_PASSWORD = 'your_database_password'
+DB_BACKEND = 'oracle'  # 'oracle' 或 'embedded'(SQLite模拟Oracle, 自动生成合成数据, 用于离线测试和性能分析)
+DB_EMBEDDED_PATH = None  # 嵌入式后端的数据库文件, None表示系统临时目录下的 geocloud_embedded.db; 删除文件即重新生成
+DB_EMBEDDED_SEED = {'scenes': 20000, 'orders': 2000}  # 合成数据规模: 每个影像表的景数、订单数等, 见 synthetic.populate
+DB_STMT_CACHE_SIZE = 20  # 连接池中每个连接缓存的语句数
+DB_ARRAYSIZE = 1000  # 流式查询(iterQuery)每次往返读取的行数
+DB_BATCH_SIZE = 500  # 批量写入(executeMany)每批的行数, 每批提交一次
+DB_POOL_WAIT_TIMEOUT = None  # 连接池耗尽时获取连接的最长等待时间(毫秒), None表示一直等待
+DB_POOL_STATS_LOG_INTERVAL = 300  # 连接池统计写入日志的间隔(秒), 0表示不输出
+SQL_STATS_ENABLED = True  # 是否按语句指纹统计SQL执行/读取耗时(/admin/db/statements)
+SQL_SLOW_THRESHOLD = 1.0  # 执行+读取超过该秒数的语句连同绑定参数写入慢查询日志
+SQL_STATS_MAX_FINGERPRINTS = 500  # 最多统计的语句指纹数
+PROFILE_DIR = None  # 单请求剖析结果目录, 配置后带 X-Profile: sample|cprofile 且通过管理鉴权的请求会被剖析
+PROFILE_MAX_FILES = 50  # 最多保留的剖析结果文件数
+PROFILE_MAX_CONCURRENT = 1  # 同时剖析的请求数上限
+PROFILE_SAMPLE_INTERVAL = 0.005  # 采样模式的采样间隔(秒)
+METRICS_PUBLIC = False  # /metrics 是否允许任意来源访问, 否则与管理接口相同需要 X-Admin-Token
 
 # Web API configuration
-web_api_host = 'localhost'
+web_api_host = '0.0.0.0'
 web_api_port = 12345
+WEB_WORKERS = 1  # 工作进程数, 大于1时预先fork多个进程以 SO_REUSEPORT 共用端口(仅Linux等支持fork的系统)
+WEB_THREADS = 8  # 每个进程的 waitress 线程数
+WEB_CONNECTION_LIMIT = 100  # 每个进程同时保持的最大连接数
+WEB_CHANNEL_TIMEOUT = 120  # 空闲连接的超时时间(秒)
+WEB_BACKLOG = 1024  # 监听队列长度
+WEB_WORKER_POOL_MAX = None  # 每个进程的数据库连接池上限, None表示 DB_POOL_MAX 按进程数分摊
 
 # Spatial Computation configuration
 crs = "EPSG:4326"  # Coordinate Reference System, default is WGS84
+
+
+# Result cache configuration
+CACHE_TTL = 300  # 缓存条目存活时间(秒)
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # 未单独配置的命名空间的内存预算(字节)
+CACHE_NAMESPACE_BUDGETS = {  # 各命名空间的内存预算(字节)
+    'fetchRecommendData': 512 * 1024 * 1024,
+    'searchData': 256 * 1024 * 1024,
+}
+CACHE_SHARDS = 8  # 每个命名空间的分片(锁)数, 只分散锁竞争, 预算按整个命名空间统计
+CACHE_STATS_LOG_INTERVAL = 300  # 缓存统计写入日志的间隔(秒), 0表示不输出
+
+# Candidate tile cache configuration (satellite table x grid tile x month)
+TILE_CACHE_ENABLED = False  # 是否启用候选影像瓦片缓存
+TILE_CACHE_DEGREES = 2.0  # 网格瓦片边长(度)
+TILE_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 已结束月份瓦片的内存预算(字节)
+TILE_CACHE_TTL = 24 * 3600  # 已结束月份瓦片的存活时间(秒)
+TILE_CACHE_RECENT_TTL = 300  # 当月瓦片的存活时间(秒)
+TILE_CACHE_RECOMMEND_MONTHS = 36  # 推荐查询最多回溯的月数, 候选不足时直接查询数据库
+
+# Reference data (/agrsArea/get, /productInfo/*, /userGuide/videourl, /reference/*)
+AREA_TREE_CHECK_INTERVAL = 60  # 检查行政区划表是否变化的间隔(秒), 变化时重建树和响应缓存
+REFERENCE_CHECK_INTERVAL = 300  # 检查卫星介绍表是否变化的间隔(秒)
+REFERENCE_BUNDLE_MAX_AGE = 365 * 24 * 3600  # 携带当前版本号 v 请求参考数据包时允许客户端直接缓存的秒数
+
+# Order statistics rollup configuration (/bupt_stat/get)
+ORDER_ROLLUP_DB = None  # 订单按天汇总的SQLite文件路径, 如 '/var/lib/geocloud/order_rollup.db'; None表示每次直接查询数据库
+ORDER_ROLLUP_REFRESH_INTERVAL = 600  # 汇总刷新间隔(秒)
+ORDER_ROLLUP_REFRESH_DAYS = 3  # 每次刷新重新统计的最近天数(覆盖订单状态变化的时间窗口)
+
+# Shared result cache configuration (cross-process, Arrow IPC files)
+SHARED_CACHE_DIR = None  # 共享缓存目录, 生产环境建议使用tmpfs, 如 '/dev/shm/geocloud-cache'; None表示不启用
+SHARED_CACHE_TTL = 300  # 共享缓存条目存活时间(秒)
+SHARED_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 共享缓存目录总大小上限(字节)
+
+# MinIO configuration
+MINIO_HOST = 'localhost'
+MINIO_PORT = 9000
+MINIO_ACCESS_KEY = 'your_access_key'
+MINIO_SECRET_KEY = 'your_secret_key'
+MINIO_SECURE = False
+MINIO_BUCKET = 'satellite.pic'
+MINIO_POOL_SIZE = 10  # 共享客户端的连接池大小, 应不小于并发下载数
+MINIO_READ_TIMEOUT = 60  # 读取超时(秒)
+OBJECT_STAT_TTL = 60  # 对象元数据(大小/ETag)缓存时间(秒)
+OBJECT_CHUNK_SIZE = 256 * 1024  # 流式输出的块大小(字节)
+OBJECT_CACHE_DIR = None  # 热点对象本地磁盘缓存目录, 如 '/var/cache/geocloud/objects'; None表示不启用
+OBJECT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 磁盘缓存总大小上限(字节), 按LRU淘汰
+OBJECT_CACHE_MAX_OBJECT_BYTES = 512 * 1024 * 1024  # 超过该大小的对象不缓存, 直接流式输出
+
+# Scene quicklook configuration (/metaImage/getImageByTypeForAll)
+QUICKLOOK_BUCKET = 'satellite.pic'  # 快视图所在的存储桶
+QUICKLOOK_OBJECT_TEMPLATE = 'quicklook/{nodeId}/{dataId}.jpg'  # 快视图对象名模板
+QUICKLOOK_CACHE_MAX_BYTES = 128 * 1024 * 1024  # 缩略图内存缓存预算(字节)
+QUICKLOOK_CACHE_TTL = 24 * 3600  # 缩略图缓存时间(秒)
+QUICKLOOK_MAX_AGE = 7 * 24 * 3600  # 浏览器缓存时间(秒), Cache-Control max-age
+
+# Admin API configuration
+ADMIN_TOKEN = None  # 管理接口(/admin/*)、/metrics 和请求剖析的访问令牌, 请求头 X-Admin-Token; None表示禁止访问
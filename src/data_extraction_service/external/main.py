@@ -4,8 +4,10 @@ from src.utils.db.oracle import create_pool
 from src.data_extraction_service.external.schedule.orderProcess import OrderProcess
 from src.geocloudservice.recommend import ProcessDueSubscriptions
 from src.config import config
+from src.utils.metrics import startPeriodicReport
 
 MyPool = create_pool()
+startPeriodicReport("db_pool", MyPool.stats, getattr(config, 'DB_POOL_STATS_LOG_INTERVAL', 300))
 MyOrderProcess = OrderProcess(MyPool)
 
 schedule.every(config.SCHE_WRITE_ORDER_TIME).minutes.do(MyOrderProcess.writePendingOrderToRequire)
@@ -115,42 +115,75 @@ class OrderProcess:
                 
     
     # 根据文件中的订单名和订单数据名更新订单状态
+    # 文件按订单分组: 每个订单一次批量UPDATE, 所有涉及的订单一次分组COUNT
     def updateOrderStatusFromRespond(self):
         try:
             logger.info("正在更新订单状态")
             path = config.JSON_READ_PATH
             filelist = os.listdir(path)
 
-            def allOrderdataIsReady(id):
-                count = self.mapper.getCountByOrderId(id)
-                return count == 0
-            
-            def process_file(filename):
+            # 订单名 -> [(文件名, 订单数据名)]
+            groups = {}
+            for filename in filelist:
+                strlist = filename.split('__')
+                if len(strlist) < 2:
+                    logger.error("无法解析的响应文件: %s" % filename)
+                    continue
+                # 数据名常以.tar结尾，所以需要去掉后缀
+                if strlist[1].endswith(('tar')):
+                    strlist[1] = strlist[1][:-4]
+                groups.setdefault(strlist[0], []).append((filename, strlist[1]))
+            if not groups:
+                return
+
+            # 查询失败时抛出异常, 本轮不删除任何响应文件
+            ids = self.mapper.getIdsByOrdernames(groups)
+            orders = {}
+            for ordername, files in groups.items():
+                if ordername not in ids:
+                    logger.error("订单%s不存在, 忽略其响应文件" % ordername)
+                    for filename, _ in files:
+                        os.remove(path + '/' + filename)
+                    continue
+                orders[ids[ordername]] = [orderdata for _, orderdata in files]
+
+            failed = set(self.mapper.updateDataStatusByOrders(orders))
+            counts = self.mapper.getCountByOrderIds(orders)
+            ready = [ordername for ordername in groups
+                     if ordername in ids and counts.get(ids[ordername]) == 0]
+
+            # 返回订单状态是否已更新
+            def process_order(ordername):
                 try:
-                    strlist = filename.split('__')
-                    ordername = strlist[0]
-                    # 数据名常以.tar结尾，所以需要去掉后缀
-                    if strlist[1].endswith(('tar')):
-                        strlist[1] = strlist[1][:-4]
-                    orderdata = strlist[1]
-                    id = self.mapper.getIdByOrdername(ordername)
-                    self.mapper.updateDataStatusByNameAndId(orderdata, id)
-                    os.remove(path + '/' + filename)
-                    if(allOrderdataIsReady(id)):
-                        with self.lock:
-                            if ordername not in self.processed_orders:
-                                self.processed_orders.add(ordername)
-                                logger.info("订单%s状态更新中" % ordername)
-                                self.mapper.updateOrderStatusByOrdername(ordername)
-                                self.createServUUser(ordername)
-                                # self.sendEmail(ordername)  
-                                logger.info("订单%s状态更新完成" % ordername)
+                    with self.lock:
+                        if ordername in self.processed_orders:
+                            return True
+                        self.processed_orders.add(ordername)
+                    logger.info("订单%s状态更新中" % ordername)
+                    if not self.mapper.updateOrderStatusByOrdername(ordername):
+                        raise RuntimeError("更新订单状态失败")
+                    self.createServUUser(ordername)
+                    # self.sendEmail(ordername)  
+                    logger.info("订单%s状态更新完成" % ordername)
+                    return True
                 except Exception as e:
+                    with self.lock:
+                        self.processed_orders.discard(ordername)
                     logger.error("订单%s状态更新出错: %s" % (ordername, e))
+                    return False
 
-            self.executor.map(process_file, filelist)
-            
-            # logger.info("订单状态更新成功")
+            done = dict(zip(ready, self.executor.map(process_order, ready)))
+            # 数据状态和订单状态都更新成功后才删除响应文件; 更新失败的数据或就绪但订单状态未更新的订单
+            # 保留响应文件, 下一轮重新更新并检查订单是否完成
+            for ordername, files in groups.items():
+                if ordername not in ids or not done.get(ordername, True):
+                    continue
+                for filename, orderdata in files:
+                    if (ids[ordername], orderdata) not in failed:
+                        os.remove(path + '/' + filename)
+
+            logger.info("订单状态更新完成: %d 个响应文件, %d 个订单, %d 个订单已就绪"
+                        % (len(filelist), len(orders), len(ready)))
         except Exception as e:
             logger.error("订单状态更新失败: %s" % e)
 
@@ -174,8 +207,6 @@ class OrderProcess:
             overdue_time = config.TEST_ORDER_OVERDUE_TIME
             overdue = (datetime.now() - timedelta(days=overdue_time)).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
             logger.info("正在处理过期测试订单,时间范围为%s之前" % overdue)
-            orders = self.mapper.getTestOrder(overdue)
-            
             def processTestOrder(order):
                 logger.info("正在处理过期测试订单%s" % order['F_ID'])
                 try:
@@ -190,8 +221,10 @@ class OrderProcess:
                             logger.info("过期测试订单%s处理完成" % f_id)
                 except Exception as e:
                     logger.error("过期测试订单%s处理失败: %s" % (order['F_ID'], e))
-                    
-            self.executor.map(processTestOrder, orders)
+
+            # 分批读取, 每批处理完再读取下一批, 避免一次性载入全部测试订单
+            for orders in self.mapper.iterTestOrder(overdue):
+                list(self.executor.map(processTestOrder, orders))
         except Exception as e:
             logger.error("过期测试订单处理错误: %s" % e)
                 
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, Blueprint, Response
+from flask import Flask, request, jsonify, Blueprint, Response, current_app
 from flask_siwadoc import SiwaDoc
 from waitress import serve
 import oracledb
@@ -8,12 +8,11 @@ from marshmallow import ValidationError
 from marshmallow import Schema, fields
 import requests
 import minio 
-from minio.error import S3Error
-from src.utils.db.minIO import create_minio_client
+from src.utils.db.minIO import get_shared_client
 from src.utils.logger import logger
-from urllib.parse import quote
 
 from src.utils.CacheManager import CacheManager, SimpleCache
+from src.utils.ObjectDiskCache import ObjectDiskCache
 from flask import g
 from src.utils.db.oracle import create_pool, executeQuery, executeNonQuery
 
@@ -21,17 +20,69 @@ from src.geocloudservice.blueprints.spatial_query_bp import spatial_query_bluepr
 from src.geocloudservice.blueprints.recommend_query_bp import search_query_blueprint, recommend_query_blueprint
 from src.geocloudservice.blueprints.app_get_areas import app_get_areas_api
 from src.geocloudservice.api_models import TimespanQueryModel
+from src.geocloudservice.order_stats import fetchOrderStats
 from src.geocloudservice.blueprints.subscribe import subscribe_blueprint
+from src.geocloudservice.blueprints.admin import admin_blueprint, check_admin_token
+from src.geocloudservice.http_metrics import HttpMetrics
+from src.geocloudservice.profiling import RequestProfiler
+from src.geocloudservice.blueprints.reference import reference_blueprint
+from src.geocloudservice.reference_data import ReferenceData, VIDEO_RESOURCES, VIDEO_BUCKET, VIDEO_OBJECTS
+from src.geocloudservice.object_serving import ObjectServer
+from src.geocloudservice.quicklook import QuicklookService
+from src.geocloudservice.blueprints.quicklook import quicklook_blueprint
+from src.geocloudservice.conditional import conditional, conditional_json, version_stamp
+from src.utils.metrics import startPeriodicReport
 from src.config.config import ENABLE_SM4_ENCRYPTION
+import src.config.config as config
 
-def gen_app():
+def gen_app(pool_min: int = None, pool_max: int = None, rollup_refresh: bool = True):
+    """创建Web应用, pool_min/pool_max 为本进程数据库连接池的大小, 默认取配置
+
+    rollup_refresh 为False时本进程不刷新订单统计汇总, 只加载其他进程写入的结果(多进程时只有0号工作进程刷新)
+    """
     app = Flask(__name__,)
     CORS(app)
     siwa = SiwaDoc(app, title="FJY API", description="地质云航遥节点遥感数据服务系统接口文档")
-
-    MyPool = create_pool()
-    cache = SimpleCache()
-    MyCacheManager = CacheManager(cache)
+    http_metrics = HttpMetrics().init_app(app)
+    if getattr(config, 'PROFILE_DIR', None):
+        RequestProfiler(config.PROFILE_DIR,
+                        max_files=getattr(config, 'PROFILE_MAX_FILES', 50),
+                        max_concurrent=getattr(config, 'PROFILE_MAX_CONCURRENT', 1),
+                        sample_interval=getattr(config, 'PROFILE_SAMPLE_INTERVAL', 0.005),
+                        authorize=check_admin_token).init_app(app)
+
+    MyPool = create_pool(pool_min, pool_max)
+    startPeriodicReport("db_pool", MyPool.stats, getattr(config, 'DB_POOL_STATS_LOG_INTERVAL', 300))
+    cache = SimpleCache(max_bytes=getattr(config, 'CACHE_MAX_BYTES', 256 * 1024 * 1024),
+                        ttl=getattr(config, 'CACHE_TTL', 300),
+                        budgets=getattr(config, 'CACHE_NAMESPACE_BUDGETS', None),
+                        shards=getattr(config, 'CACHE_SHARDS', 8))
+    shared_cache = None
+    if getattr(config, 'SHARED_CACHE_DIR', None):
+        from src.utils.SharedArrowCache import SharedArrowCache
+        shared_cache = SharedArrowCache(config.SHARED_CACHE_DIR,
+                                        ttl=getattr(config, 'SHARED_CACHE_TTL', 300),
+                                        max_bytes=getattr(config, 'SHARED_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+    MyCacheManager = CacheManager(cache, shared_cache)
+    startPeriodicReport("cache", MyCacheManager.stats, getattr(config, 'CACHE_STATS_LOG_INTERVAL', 300))
+
+    MyOrderRollup = None
+    if getattr(config, 'ORDER_ROLLUP_DB', None):
+        from src.geocloudservice.order_rollup import OrderStatsRollup
+        MyOrderRollup = OrderStatsRollup(MyPool, config.ORDER_ROLLUP_DB,
+                                         refresh_interval=getattr(config, 'ORDER_ROLLUP_REFRESH_INTERVAL', 600),
+                                         refresh_days=getattr(config, 'ORDER_ROLLUP_REFRESH_DAYS', 3),
+                                         refreshing=rollup_refresh).start()
+
+    MyTileCache = None
+    if getattr(config, 'TILE_CACHE_ENABLED', False):
+        from src.geocloudservice.candidate_cache import CandidateTileCache
+        MyTileCache = CandidateTileCache(MyPool,
+                                         tile_degrees=getattr(config, 'TILE_CACHE_DEGREES', 2.0),
+                                         max_bytes=getattr(config, 'TILE_CACHE_MAX_BYTES', 1024 * 1024 * 1024),
+                                         ttl=getattr(config, 'TILE_CACHE_TTL', 24 * 3600),
+                                         recent_ttl=getattr(config, 'TILE_CACHE_RECENT_TTL', 300),
+                                         recommend_months_back=getattr(config, 'TILE_CACHE_RECOMMEND_MONTHS', 36))
     
     if ENABLE_SM4_ENCRYPTION:
         from src.utils.sm4encry import SM4Util
@@ -44,6 +95,8 @@ def gen_app():
     def loadParams():
         g.MyPool = MyPool
         g.MyCacheManager = MyCacheManager
+        g.MyTileCache = MyTileCache
+        g.MyOrderRollup = MyOrderRollup
     # spatial_query_bp = spatial_query_blueprint(siwa, pool)
     # app.register_blueprint(spatial_query_bp)
     
@@ -57,6 +110,30 @@ def gen_app():
     app.register_blueprint(subscribe_blueprint_bp)
     app_get_areas_api_bp = app_get_areas_api(app,siwa)
     app.register_blueprint(app_get_areas_api_bp)
+    admin_bp = admin_blueprint(app, siwa)
+    app.register_blueprint(admin_bp)
+    object_cache = None
+    if getattr(config, 'OBJECT_CACHE_DIR', None):
+        object_cache = ObjectDiskCache(config.OBJECT_CACHE_DIR,
+                                       max_bytes=getattr(config, 'OBJECT_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024),
+                                       max_object_bytes=getattr(config, 'OBJECT_CACHE_MAX_OBJECT_BYTES', 512 * 1024 * 1024))
+        startPeriodicReport("object_cache", object_cache.stats, getattr(config, 'CACHE_STATS_LOG_INTERVAL', 300))
+    app.extensions['object_server'] = ObjectServer(get_shared_client,
+                                                   stat_ttl=getattr(config, 'OBJECT_STAT_TTL', 60),
+                                                   chunk_size=getattr(config, 'OBJECT_CHUNK_SIZE', 256 * 1024),
+                                                   disk_cache=object_cache)
+    quicklook = QuicklookService(app.extensions['object_server'],
+                                 bucket=getattr(config, 'QUICKLOOK_BUCKET', getattr(config, 'MINIO_BUCKET', 'satellite.pic')),
+                                 object_template=getattr(config, 'QUICKLOOK_OBJECT_TEMPLATE', 'quicklook/{nodeId}/{dataId}.jpg'),
+                                 max_bytes=getattr(config, 'QUICKLOOK_CACHE_MAX_BYTES', 128 * 1024 * 1024),
+                                 ttl=getattr(config, 'QUICKLOOK_CACHE_TTL', 24 * 3600))
+    app.extensions['quicklook'] = quicklook
+    startPeriodicReport("quicklook", quicklook.stats, getattr(config, 'CACHE_STATS_LOG_INTERVAL', 300))
+    quicklook_bp = quicklook_blueprint(app, siwa)
+    app.register_blueprint(quicklook_bp)
+    app.extensions['reference_data'] = ReferenceData(check_interval=getattr(config, 'REFERENCE_CHECK_INTERVAL', 300))
+    reference_bp = reference_blueprint(app, siwa)
+    app.register_blueprint(reference_bp)
 
     @app.post(f"/test")
     @siwa.doc(
@@ -66,6 +143,17 @@ def gen_app():
     )
     def test():
         return jsonify({"code": 200, "msg": "successsss"})
+
+    @app.get("/metrics")
+    @siwa.doc(
+        summary="HTTP指标",
+        description="Prometheus 文本格式的各路由请求耗时直方图、状态码计数、请求/响应字节数及并发请求数",
+        tags=["admin"],
+    )
+    def metrics():
+        if not getattr(config, 'METRICS_PUBLIC', False) and not check_admin_token():
+            return jsonify({"error": "无权访问管理接口"}), 403
+        return http_metrics.response()
     # bp_stats(app, siwa)
     #cmm20241012用户订单反馈接口
     bp_feedback(app, siwa)
@@ -195,119 +283,12 @@ def bp_stat(app, siwa):
         #     return jsonify({'success': False, 'message': '时间不能为空'}), 400
 
         try:
-            # connection = oracledb.connect(user="jgf_gxfw", password="icw3kx45", dsn="10.82.8.4:1521/satdb")
-            # cursor = connection.cursor()
-            # cursor.execute("SELECT COUNT(*) FROM TF_ORDER WHERE F_STATUS NOT IN (-1, 0, 2, 5) AND F_CREATTIME BETWEEN TIMESTAMP '2024-01-01 00:00:00' AND TIMESTAMP '2024-09-28 23:59:59'")
-            # user = cursor.fetchone()
-            selectSql = "SELECT COUNT(*) FROM TF_ORDER WHERE F_STATUS NOT IN (-1, 0) AND \
-                F_CREATTIME BETWEEN TIMESTAMP '2024-01-01 00:00:00' AND TIMESTAMP '2024-09-28 23:59:59'"
-            user = executeQuery(g.MyPool, selectSql)
-            print(f"连接成功，当前用户: {user[0]}")  # 打印当前用户以验证连接
-
-            # 使用参数化查询，确保日期格式正确
-            query1 = "SELECT COUNT(*) FROM TF_ORDER WHERE F_STATUS NOT IN (-1, 0) AND F_CREATTIME BETWEEN TO_TIMESTAMP(:start_time, 'YYYY-MM-DD HH24:MI:SS') \
-                AND TO_TIMESTAMP(:end_time, 'YYYY-MM-DD HH24:MI:SS') AND F_GET_METHOD = :F_GET_METHOD"
-            
-            #离线订单数量offline_order_num
-            # cursor.execute(query1, start_time=start_time, end_time=end_time, F_GET_METHOD='线下拷贝')
-            # offline_order_num = cursor.fetchone()[0]
-            offline_order_num = executeQuery(g.MyPool, query1, 
-                                             {'start_time': start_time, 'end_time' : end_time, 'F_GET_METHOD': '线下拷贝'})[0]
-
-            #在线订单数量online_order_num
-            # cursor.execute(query1, start_time=start_time, end_time=end_time, F_GET_METHOD='在线下载')
-            # online_order_num = cursor.fetchone()[0]
-            online_order_num = executeQuery(g.MyPool, query1, 
-                                             {'start_time': start_time, 'end_time' : end_time, 'F_GET_METHOD': '在线下载'})[0]
-
-            #离线订单数据量offline_order_size
-            query2="SELECT F_DATA_SUM FROM TF_ORDER WHERE F_STATUS NOT IN (-1, 0) AND F_CREATTIME \
-                BETWEEN TO_TIMESTAMP(:start_time, 'YYYY-MM-DD HH24:MI:SS') AND TO_TIMESTAMP(:end_time, 'YYYY-MM-DD HH24:MI:SS') AND F_GET_METHOD = :F_GET_METHOD"
-            # cursor.execute(query2, start_time=start_time, end_time=end_time, F_GET_METHOD='线下拷贝')
-            # print(cursor.fetchone())
-            # results=cursor.fetchall()
-            results = executeQuery(g.MyPool, query2, 
-                                             {'start_time': start_time, 'end_time' : end_time, 'F_GET_METHOD': '线下拷贝'})
-            # 初始化总和
-            total_sum = 0
-            # 处理每个结果
-            for result in results:
-                if result[0] is None:  # 检查是否为空值
-                    total_sum += 0  # 默认加0
-                    continue  # 跳过空值，继续下一个循环
-                data_sum = result[0].strip()  # 去除空格
-                if data_sum.endswith('M'):
-                    data_sum = data_sum[:-1]  # 去除 'M'
-                    total_sum += float(data_sum)
-                elif data_sum.endswith('G'):
-                    data_sum = data_sum[:-1]  # 去除 'G'
-                    total_sum += float(data_sum) * 1024
-                else:
-                    total_sum = total_sum
-            total_sum=total_sum/1024
-            # print(results)
-            # 打印总和
-            # print("离线订单总数据量：", total_sum)
-            logger.info(f"离线订单总数据量：{total_sum}")
-            offline_order_size = round(total_sum/1024, 1)
-
-            #在线订单数据量online_order_size
-            # cursor.execute(query2, start_time=start_time, end_time=end_time, F_GET_METHOD='在线下载')
-            # print(cursor.fetchone())
-            # results=cursor.fetchall()
-            results = executeQuery(g.MyPool, query2,
-                                  {'start_time': start_time, 'end_time': end_time, 'F_GET_METHOD': '在线下载'})
-            # 初始化总和
-            total_sum = 0
-            # 处理每个结果
-            for result in results:
-                if result[0] is None:  # 检查是否为空值
-                    total_sum += 0  # 默认加0
-                    continue  # 跳过空值，继续下一个循环
-                data_sum = result[0].strip()  # 去除空格
-                if data_sum.endswith('M'):
-                    data_sum = data_sum[:-1]  # 去除 'M'
-                    total_sum += float(data_sum)
-                elif data_sum.endswith('G'):
-                    data_sum = data_sum[:-1]  # 去除 'G'
-                    total_sum += float(data_sum) * 1024
-                else:
-                    total_sum = total_sum
-            total_sum=total_sum/1024
-            # print(results)
-            # 打印总和
-            # print("在线订单总数据量：", total_sum)
-            logger.info(f"在线订单总数据量：{total_sum}")
-            online_order_size = round(total_sum/1024, 1)
-
-            #离线订单景数offline_order_scene_num
-            query3="SELECT SUM(F_DATACOUNT) FROM TF_ORDER WHERE F_STATUS NOT IN (-1, 0) AND \
-                    F_CREATTIME BETWEEN TO_TIMESTAMP(:start_time, 'YYYY-MM-DD HH24:MI:SS') AND TO_TIMESTAMP(:end_time, 'YYYY-MM-DD HH24:MI:SS') AND \
-                    F_GET_METHOD = :F_GET_METHOD"
-            # cursor.execute(query3, start_time=start_time, end_time=end_time, F_GET_METHOD='线下拷贝')
-            # offline_order_scene_num = cursor.fetchone()[0]
-            offline_order_scene_num = executeQuery(g.MyPool, query3,
-                                        {'start_time': start_time, 'end_time': end_time, 'F_GET_METHOD': '线下拷贝'})[0]
-
-            #在线订单景数online_order_scene_num
-            # cursor.execute(query3, start_time=start_time, end_time=end_time, F_GET_METHOD='在线下载')
-            # online_order_scene_num = cursor.fetchone()[0]
-            online_order_scene_num = executeQuery(g.MyPool, query3,
-                                        {'start_time': start_time, 'end_time': end_time, 'F_GET_METHOD': '在线下载'})[0]
-
-
-               # 构建响应数据
-            order_stats = {
-                "offlineOrderNum": offline_order_num,
-                "onlineOrderNum": online_order_num,
-                "offlineOrderSize": offline_order_size,
-                "onlineOrderSize": online_order_size,
-                "offlineOrderSceneNum": offline_order_scene_num,
-                "onlineOrderSceneNum": online_order_scene_num,
-                "orderSize": round(offline_order_size + online_order_size,1)  # 总数据量
-                # "OrderSize": offline_order_size + online_order_size  # 总数据量
-            }
-
+            if g.MyOrderRollup is not None:
+                order_stats = g.MyOrderRollup.query(start_time, end_time)
+            else:
+                order_stats = fetchOrderStats(g.MyPool, start_time, end_time)
+            if order_stats is None:
+                return jsonify({'success': False, 'message': '订单统计查询失败'}), 500
             return jsonify(order_stats)
         except oracledb.DatabaseError as e:
             error, = e.args
@@ -334,82 +315,60 @@ def product_intro(app,siwa):
         tags=["productInfo"]
     )
     def get_satellites():
-        try:
-            # connection = oracledb.connect(user="jgf_gxfw", password="icw3kx45", dsn="10.82.8.4:1521/satdb")
-            connection = g.MyPool.acquire()
-            cursor = connection.cursor()
-            cursor.execute("""
-                SELECT id, satellites_name 
-                FROM satellitesinfo
-            """)
-            satellites = []
-            for row in cursor:
-                satellites.append({
-                    'id': row[0],
-                    'name': row[1]
-                })
-            return jsonify(satellites)
-
-        except oracledb.DatabaseError as e:
-            error, = e.args
-            return jsonify({"error": str(error)}), 500
-
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+        reference = current_app.extensions['reference_data']
+        if not reference.refresh(g.MyPool):
+            return jsonify({"error": "查询卫星信息失败"}), 500
+        catalog = reference.catalog.current
+        body = catalog.list_body(lambda satellites: current_app.json.response(satellites).get_data())
+        response = Response(body, status=200, mimetype=current_app.json.mimetype)
+        return conditional(response, catalog.version, catalog.modified)
 
     # 通过卫星名获取对应卫星介绍接口
-    @product_intro.route('/satellite/name', methods=['POST'])
+    @product_intro.route('/satellite/name', methods=['GET', 'POST'])
     @siwa.doc(
         summary="获取卫星介绍接口",
-        description="通过卫星名获取对应卫星介绍接口",
+        description="通过卫星名获取对应卫星介绍接口, GET 请求通过 name 参数传入卫星名并支持条件请求",
         tags=["productInfo"]
     )
     def post_satellite_by_name():
-        try:
-            data = request.get_json() 
-            name = data.get('name')  
-
-            if not name:
-                return jsonify({"error": "未获取卫星名"}), 400
-            # connection = oracledb.connect(user="jgf_gxfw", password="icw3kx45", dsn="10.82.8.4:1521/satdb")
-            # cursor = connection.cursor()
-            # cursor.execute("""
-            #     SELECT id, satellites_name, image_url, description 
-            #     FROM satellitesinfo
-            #     WHERE satellites_name = :name
-            # """, name=name)
-
-            # row = cursor.fetchone()
-            
-            selectSql = """
-                SELECT id, satellites_name, image_url, description 
-                FROM satellitesinfo
-                WHERE satellites_name = :name"""
-            row = executeQuery(g.MyPool, selectSql, {'name': name})[0]
-
-            if row:
-                satellite = {
-                    'id': row[0],
-                    'name': row[1],
-                    'imageUrl': row[2],
-                    'description': str(row[3]) if row[3] else None
-                }
-                return jsonify(satellite)
-            else:
-                return jsonify({'error': '未找到对应的卫星'}), 404
-
-        except oracledb.DatabaseError as e:
-            error, = e.args
-            return jsonify({"error": str(error)}), 500
-
-        # finally:
-        #     if cursor:
-        #         cursor.close()
-        #     if connection:
-        #         connection.close()
+        if request.method == 'GET':
+            name = request.args.get('name')
+        else:
+            data = request.get_json(silent=True) or {}
+            name = data.get('name')
+
+        if not name:
+            return jsonify({"error": "未获取卫星名"}), 400
+
+        reference = current_app.extensions['reference_data']
+        if not reference.refresh(g.MyPool):
+            return jsonify({"error": "查询卫星信息失败"}), 500
+        catalog = reference.catalog.current
+        satellite = catalog.by_name.get(name)
+        if satellite is None:
+            return jsonify({'error': '未找到对应的卫星'}), 404
+        return conditional_json(satellite, version_stamp(catalog.version, name), catalog.modified)
+
+    # 通过卫星id获取对应卫星介绍接口
+    @product_intro.route('/satellite/id', methods=['GET'])
+    @siwa.doc(
+        summary="通过卫星id获取卫星介绍接口",
+        description="通过 id 参数获取对应卫星介绍, 支持条件请求",
+        tags=["productInfo"]
+    )
+    def get_satellite_by_id():
+        satellite_id = request.args.get('id', type=int)
+        if satellite_id is None:
+            return jsonify({"error": "未获取卫星id"}), 400
+
+        reference = current_app.extensions['reference_data']
+        if not reference.refresh(g.MyPool):
+            return jsonify({"error": "查询卫星信息失败"}), 500
+        catalog = reference.catalog.current
+        satellite = catalog.by_id.get(satellite_id)
+        if satellite is None:
+            return jsonify({'error': '未找到对应的卫星'}), 404
+        return conditional_json(satellite, version_stamp(catalog.version, satellite_id), catalog.modified)
 
     app.register_blueprint(product_intro)
 
@@ -427,12 +386,11 @@ def user_guide(app,siwa):
     )
     def get_video_url():
         title = request.args.get('title')
-        video_resources = {
-            "地质云遥感数据平台操作说明":"https://geogf.agrs.cn/satellite.pic/%E7%B3%BB%E7%BB%9F%E6%93%8D%E4%BD%9C%E6%BC%94%E7%A4%BA%E8%A7%86%E9%A2%91.mp4"
-        }
-        video_url = video_resources.get(title)
+        video_url = VIDEO_RESOURCES.get(title)
         if video_url:
-            return jsonify({'hrefData': video_url})
+            reference = current_app.extensions['reference_data']
+            return conditional_json({'hrefData': video_url}, version_stamp(reference.videos_version, title),
+                                    reference.videos_modified)
         else:
             return jsonify({'error': '未找到对应的视频链接'}), 404
 
@@ -444,42 +402,12 @@ def user_guide(app,siwa):
         tags=["userGuide"]
     )
     def download_video():
-
-        minio_client = create_minio_client()
-
         title = request.args.get('title')  # 从请求参数获取视频标题
-
-        # 根据标题找到文件映射路径（可以根据需要动态生成或从配置中读取）
-        minio_file_mapping = {
-            "地质云遥感数据平台操作说明": "系统操作演示视频.mp4"
-        }
-        object_name = minio_file_mapping.get(title)
-
-        bucket_name = "satellite.pic"
-
+        object_name = VIDEO_OBJECTS.get(title)
         if not object_name:
             return jsonify({"error": "视频文件不存在"}), 404
-
-        try:
-            # 获取文件流
-            response = minio_client.get_object(bucket_name, object_name)
-            # 获取文件大小
-            stat = minio_client.stat_object(bucket_name, object_name)
-
-            encoded_file_name = quote(f'{title}.mp4')
-
-            # 生成流式响应
-            return Response(
-                response,  # 文件流
-                headers={
-                    "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_file_name}",  # 下载文件名
-                    "Content-Type": "video/mp4",  # 设置视频文件类型
-                    "Content-Length": str(stat.size),  # 文件大小
-                },
-                status=200,
-            )
-        except S3Error as e:
-            logger.error(f"从 MinIO 下载视频文件失败: {e}, 文件名: {object_name}")
-            return jsonify({"error": f"无法下载视频文件: {str(e)}"}), 500
+        # 支持 Range 请求, 浏览器拖动进度条时只读取所需的片段
+        return current_app.extensions['object_server'].serve(VIDEO_BUCKET, object_name,
+                                                             download_name=f'{title}.mp4', content_type="video/mp4")
 
     app.register_blueprint(user_guide)
@@ -0,0 +1,173 @@
+import threading
+import time
+
+from src.geocloudservice.conditional import version_stamp, utcnow
+from src.utils.db.oracle import executeQuery, executeQueryAsDict
+from src.utils.logger import logger
+
+ROOT_CODE = "000000"
+MUNICIPALITIES = ["11", "12", "31", "50"]  # 直辖市编码列表
+
+AREA_SQL = "SELECT f_name AS name,f_distcode AS code FROM tc_district"
+# 行数与最大ORA_ROWSCN任一变化即认为行政区划表已更新
+VERSION_SQL = "SELECT COUNT(*), MAX(ORA_ROWSCN) FROM tc_district"
+
+
+def build_tree(data: list[dict]):
+    """
+    将线性行政区划数据转换为树形结构
+    :param data: 行政区数据列表，线性，各个元素是包含code和name字段的字典
+    :return: (树形结构数据, 编码到节点的索引)
+    """
+
+    data = [
+        {
+            "code": item["CODE"].removeprefix("156"),
+            "name": item["NAME"],
+        }  # removeprefix 需要Python 3.9
+        for item in data
+    ]
+    data.sort(key=lambda x: x["code"])
+    if data and data[0]["code"] == ROOT_CODE:  # 去除全国'000000'节点避免问题
+        data.pop(0)
+
+    nodes = {
+        item["code"]: {"code": item["code"], "name": item["name"], "child": []}
+        for item in data
+    }
+
+    # 连接父子关系
+    prov_list = []
+    for item in data:
+        area_code = item["code"]
+        prov_code = area_code[:2] + "0000"  # 获取省级节点代码
+        if area_code == prov_code:
+            # 省级节点
+            prov_list.append(nodes[area_code])
+        else:
+            city_code = area_code[:4] + "00"  # 获取市级节点代码
+            is_county_direct = area_code[2:4] == "90"  # 是否为省直辖县级行政区划
+            is_municipality = area_code[:2] in MUNICIPALITIES  # 是否为直辖市
+            if area_code == city_code or is_county_direct or is_municipality:
+                # 市级节点
+                nodes[prov_code]["child"].append(nodes[area_code])
+            else:
+                # 县级节点
+                if city_code not in nodes:
+                    continue
+                nodes[city_code]["child"].append(nodes[area_code])
+
+    root = {"code": ROOT_CODE, "name": "全国", "child": prov_list}
+    nodes[ROOT_CODE] = root
+    return [root], nodes
+
+
+def subtree(node: dict, show_sub: bool, show_all_sub: bool) -> dict:
+    """按请求的层级截取子树
+
+    showAllSub 返回全部下级, 仅 showSub 返回直接下级(下级的child为空), 均为否时只返回节点本身。
+    返回的节点与缓存的树共享未截断部分, 调用方不得修改。
+    """
+    if show_all_sub:
+        return node
+    if show_sub:
+        return {**node, "child": [{**child, "child": []} for child in node["child"]]}
+    return {**node, "child": []}
+
+
+class TreeVersion:
+    """某一版本的行政区划树及其响应缓存, 重建时构建新对象整体替换, 读取方拿到的树与响应体始终属于同一版本"""
+
+    def __init__(self, nodes: dict, table_version):
+        self.nodes = nodes
+        self.table_version = table_version
+        self.version = version_stamp(table_version)
+        self.modified = utcnow()
+        # (编码, showSub, showAllSub) -> (响应体字节, ETag)
+        self.responses = {}
+
+    def get(self, code: str, show_sub: bool, show_all_sub: bool) -> list:
+        node = self.nodes.get(code)
+        if node is None:
+            return None
+        return [subtree(node, show_sub, show_all_sub)]
+
+
+class AreaTree:
+    """预先构建的行政区划树, 按 (编码, 层级) 缓存序列化后的响应
+
+    树和编码索引只在 TC_DISTRICT 变化时重建; 每隔 check_interval 秒检查一次表的版本。
+    每种子树的响应体(含SM4加密后的形式)序列化一次后以字节缓存, 并附带ETag。
+    """
+
+    def __init__(self, check_interval: int = 60):
+        """
+        Args:
+            check_interval (int): 检查行政区划表是否变化的间隔(秒)
+        """
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0
+        # 当前版本的树, 同一请求内应只读取一次
+        self._current = None
+
+    @property
+    def version(self) -> str:
+        """树的版本号, 供参考数据包和条件请求使用"""
+        return self._current.version if self._current else None
+
+    @property
+    def modified(self):
+        """最近一次重建时间"""
+        return self._current.modified if self._current else None
+
+    def _refresh(self, pool) -> TreeVersion:
+        """检查表版本, 变化时重建树; 返回当前版本的树, 尚未加载成功时返回None"""
+        current = self._current
+        if current is not None and time.time() - self._checked < self.check_interval:
+            return current
+        with self._lock:
+            current = self._current
+            if current is not None and time.time() - self._checked < self.check_interval:
+                return current
+            version = executeQuery(pool, VERSION_SQL, prefetchrows=2)
+            version = tuple(version[0]) if version else None
+            if current is None or version != current.table_version:
+                result = executeQueryAsDict(pool, AREA_SQL)
+                if not result:
+                    return current
+                _, nodes = build_tree(result)
+                # 构建完成后一次赋值替换, 旧版本的响应缓存随旧对象一起丢弃
+                current = self._current = TreeVersion(nodes, version)
+                logger.info(f'行政区划树已重建: {len(nodes)} 个节点, 版本 {version}')
+            self._checked = time.time()
+            return current
+
+    def get(self, pool, code: str, show_sub: bool = True, show_all_sub: bool = True) -> list:
+        """返回以 code 为根、截取到请求层级的子树列表, 编码不存在时返回None"""
+        current = self._refresh(pool)
+        if current is None:
+            return None
+        return current.get(code, show_sub, show_all_sub)
+
+    def response(self, pool, code: str, show_sub: bool, show_all_sub: bool, serialize):
+        """返回缓存的响应体字节和ETag
+
+        Args:
+            serialize: 将子树列表转换为 (响应体字节, ETag) 的函数, 仅在缓存缺失时调用
+
+        Returns:
+            tuple: (响应体字节, ETag), 编码不存在时返回None
+        """
+        current = self._refresh(pool)
+        if current is None:
+            return None
+        key = (code, show_sub, show_all_sub)
+        cached = current.responses.get(key)
+        if cached is None:
+            tree = current.get(code, show_sub, show_all_sub)
+            if tree is None:
+                return None
+            cached = serialize(tree)
+            current.responses[key] = cached
+        return cached
@@ -0,0 +1,99 @@
+import hmac
+import os
+
+from flask import Blueprint, request, jsonify, g, current_app, send_file
+
+import src.config.config as config
+from src.utils.db.statements import STATEMENTS
+
+
+def check_admin_token() -> bool:
+    """校验管理接口的访问权限: 请求头 X-Admin-Token 与配置的 ADMIN_TOKEN 一致
+
+    未配置 ADMIN_TOKEN 时一律拒绝; 不按来源地址放行, 经同机反向代理转发的外部请求来源地址也是本机。
+    """
+    token = getattr(config, "ADMIN_TOKEN", None)
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode(), token.encode())
+
+
+def admin_blueprint(app, siwa):
+    admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+    @admin_bp.before_request
+    def authorize():
+        if not check_admin_token():
+            return jsonify({"error": "无权访问管理接口"}), 403
+
+    @admin_bp.get("/cache/stats")
+    @siwa.doc(
+        summary="结果缓存统计",
+        description="各命名空间的命中/未命中、合并等待、淘汰、条目数、占用字节、存活时长分布及节省时间",
+        tags=["admin"],
+    )
+    def cache_stats():
+        return jsonify(g.MyCacheManager.stats())
+
+    @admin_bp.get("/objects/stats")
+    @siwa.doc(
+        summary="对象磁盘缓存统计",
+        description="MinIO 对象本地缓存的命中/未命中、命中率、节省的下载字节数、条目数及占用字节",
+        tags=["admin"],
+    )
+    def object_cache_stats():
+        disk_cache = current_app.extensions["object_server"].disk_cache
+        if disk_cache is None:
+            return jsonify({"enabled": False})
+        return jsonify({"enabled": True, **disk_cache.stats()})
+
+    @admin_bp.get("/db/pool")
+    @siwa.doc(
+        summary="数据库连接池统计",
+        description="获取连接的等待时间与占用时间分布、忙/打开连接数、耗尽与超时次数, 以及占用连接最久的调用位置",
+        tags=["admin"],
+    )
+    def db_pool_stats():
+        return jsonify(g.MyPool.stats())
+
+    @admin_bp.get("/db/statements")
+    @siwa.doc(
+        summary="SQL语句统计",
+        description="按归一化指纹汇总的执行次数、错误数、执行/读取耗时、行数、字节数及慢查询次数; "
+                    "top 为返回条数(默认20), sort 为排序字段(默认totalSeconds), reset=1 时返回后清空",
+        tags=["admin"],
+    )
+    def db_statement_stats():
+        top = request.args.get("top", default=20, type=int)
+        sort = request.args.get("sort", default="totalSeconds")
+        stats = STATEMENTS.stats(top=top, sort=sort)
+        if request.args.get("reset") == "1":
+            STATEMENTS.reset()
+        return jsonify(stats)
+
+    @admin_bp.get("/profiles")
+    @siwa.doc(
+        summary="请求剖析结果列表",
+        description="请求头 X-Profile: sample|cprofile 触发的单请求剖析结果, 按时间倒序",
+        tags=["admin"],
+    )
+    def list_profiles():
+        profiler = current_app.extensions.get("profiler")
+        if profiler is None:
+            return jsonify({"enabled": False})
+        return jsonify({"enabled": True, "profiles": profiler.list()})
+
+    @admin_bp.get("/profiles/<request_id>")
+    @siwa.doc(
+        summary="下载请求剖析结果",
+        description="采样模式为折叠栈文本(flamegraph.pl / speedscope), cprofile 模式为 pstats 文件",
+        tags=["admin"],
+    )
+    def get_profile(request_id):
+        profiler = current_app.extensions.get("profiler")
+        path = profiler.find(request_id) if profiler is not None else None
+        if path is None:
+            return jsonify({"error": "剖析结果不存在"}), 404
+        return send_file(path, as_attachment=True, download_name=os.path.basename(path))
+
+    return admin_bp
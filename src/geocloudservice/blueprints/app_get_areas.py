@@ -1,94 +1,68 @@
-from flask import request, jsonify, Blueprint, g, current_app
+from flask import request, jsonify, Blueprint, g, current_app, Response
+import hashlib
 import json
 
-from src.utils.db.oracle import create_pool, executeQueryAsDict
+import src.config.config as config
 from src.config.config import ENABLE_SM4_ENCRYPTION
+from src.geocloudservice.area_tree import AreaTree, ROOT_CODE
+from src.geocloudservice.conditional import conditional
 from src.utils.sm4encry import SM4Util
 
 
+def parse_flag(value, default: bool) -> bool:
+    """解析 "true"/"false" 形式的查询参数, 未传时返回默认值"""
+    if value is None:
+        return default
+    return str(value).lower() in ("true", "1")
+
+
 def app_get_areas_api(app, siwa):
     get_areas_bp = Blueprint("get_areas", __name__, url_prefix="/agrsArea")
+    area_tree = AreaTree(check_interval=getattr(config, "AREA_TREE_CHECK_INTERVAL", 60))
+    app.extensions["area_tree"] = area_tree
 
     # 获取所有地区树形结构接口
     @get_areas_bp.route("/get", methods=["GET"])
-    @siwa.doc(summary="获取所有地区树形结构接口", description="")
+    @siwa.doc(summary="获取所有地区树形结构接口",
+              description="code 指定子树根节点; showAllSub 返回全部下级, showSub 仅返回直接下级, 未传时均为true")
     def get_areas():
         # 解析GET参数
         # GET http://gf.agrs.cn:443/mj/agrsArea/get?showWkt=false&code=000000&qType=0&showType=0&showSub=true&showAllSub=true
-        code = request.args.get("code", default="000000")
-        q_type = request.args.get("qType", default=0)
-        show_wkt = request.args.get("showWkt", default=False)
-        show_sub = request.args.get("showSub", default=False)
-        show_all_sub = request.args.get("showAllSub", default=False)
-
-        tree = get_ares_tree(code, q_type, show_wkt, show_sub, show_all_sub)
-        if not tree:
+        code = request.args.get("code", default=ROOT_CODE)
+        q_type = request.args.get("qType", default=0)  # 目前只有行政区划一种类型
+        show_wkt = request.args.get("showWkt", default=False)  # 行政区划表不含几何, 暂不支持
+        # 未传层级参数时保持原有行为, 返回全部下级
+        show_sub = parse_flag(request.args.get("showSub"), True)
+        show_all_sub = parse_flag(request.args.get("showAllSub"), True)
+
+        try:
+            cached = area_tree.response(g.MyPool, code, show_sub, show_all_sub, serialize_response)
+        except SerializeError as e:
+            return e.response
+        if cached is None:
             return app_response({"error": "未找到对应的地区信息"}, 404)
-        return app_response(tree)
-
-    def get_ares_tree(code, q_type, show_wkt, show_sub, show_all_sub):  # 参数均未使用
-        pool = g.MyPool
-        sql = "SELECT f_name AS name,f_distcode AS code FROM tc_district"
-        result = executeQueryAsDict(pool, sql)
-        if not result:
-            return None
-        return build_tree(result)
-
-    def build_tree(data: list[dict]):
-        """
-        将线性行政区划数据转换为树形结构
-        :param data: 行政区数据列表，线性，各个元素是包含code和name字段的字典
-        :return: 树形结构数据
-        """
-
-        data = [
-            {
-                "code": item["CODE"].removeprefix("156"),
-                "name": item["NAME"],
-            }  # removeprefix 需要Python 3.9
-            for item in data
-        ]
-        data.sort(key=lambda x: x["code"])
-        if data[0]["code"] == "000000":  # 去除全国'000000'节点避免问题
-            data.pop(0)
-
-        nodes = {
-            item["code"]: (
-                {"code": item["code"], "name": item["name"], "child": []}
-                # if item["code"].endswith("00")
-                # else {"code": item["code"], "name": item["name"]}
-            )
-            for item in data
-        }
-
-        # 连接父子关系
-        municipalities = ["11", "12", "31", "50"]  # 直辖市编码列表
-        prov_list = []
-        for item in data:
-            area_code = item["code"]
-            prov_code = area_code[:2] + "0000"  # 获取省级节点代码
-            if area_code == prov_code:
-                # 省级节点
-                prov_list.append(nodes[area_code])
-            else:
-                city_code = area_code[:4] + "00"  # 获取市级节点代码
-                is_county_direct = area_code[2:4] == "90"  # 是否为省直辖县级行政区划
-                is_municipality = area_code[:2] in municipalities  # 是否为直辖市
-                if area_code == city_code or is_county_direct or is_municipality:
-                    # 市级节点
-                    nodes[prov_code]["child"].append(nodes[area_code])
-                else:
-                    # 县级节点
-                    if city_code not in nodes:
-                        # print(f"未找到{item}的父节点{city_code}")
-                        continue
-                    nodes[city_code]["child"].append(nodes[area_code])
-
-        return [{"code": "000000", "name": "全国", "child": prov_list}]
+        body, etag = cached
+        return conditional(Response(body, status=200, mimetype=current_app.json.mimetype), etag, area_tree.modified)
 
     return get_areas_bp
 
 
+class SerializeError(Exception):
+    """响应序列化(加密)失败, response 为应返回的错误响应, 不进入缓存"""
+    def __init__(self, response):
+        super().__init__("序列化响应失败")
+        self.response = response
+
+
+def serialize_response(data) -> tuple:
+    """将响应序列化为字节并计算ETag, 与 app_response 的输出一致"""
+    response, status_code = app_response(data)
+    if status_code != 200:
+        raise SerializeError((response, status_code))
+    body = response.get_data()
+    return body, hashlib.md5(body).hexdigest()
+
+
 # app端响应通用格式
 def app_response(data: dict, status_code: int = 200):
     VERSION = "v0.1.0-bupt"
@@ -0,0 +1,60 @@
+from flask import Blueprint, request, jsonify, current_app, Response
+from minio.error import S3Error
+
+import src.config.config as config
+from src.geocloudservice.conditional import conditional, version_stamp
+from src.geocloudservice.quicklook import QUICKLOOK_SIZES, DEFAULT_SIZE, IMAGE_ERRORS
+from src.utils.logger import logger
+
+# F_IMAGEURL 中快视图对应的图片类型
+QUICKLOOK_TYPE_ID = "2"
+
+
+def quicklook_blueprint(app, siwa):
+    quicklook_bp = Blueprint("quicklook", __name__, url_prefix="/metaImage")
+
+    @quicklook_bp.get("/getImageByTypeForAll")
+    @siwa.doc(
+        summary="景快视图",
+        description="按 dataId(F_DID) 与 nodeId 返回景快视图, size 可选 small/medium/large/original, 默认 medium",
+        tags=["metaImage"],
+    )
+    def get_image_by_type():
+        type_id = request.args.get("typeId", default=QUICKLOOK_TYPE_ID)
+        data_id = request.args.get("dataId")
+        node_id = request.args.get("nodeId")
+        size = request.args.get("size", default=DEFAULT_SIZE)
+        if type_id != QUICKLOOK_TYPE_ID:
+            return jsonify({"error": "仅支持快视图(typeId=2)"}), 400
+        if not data_id or not node_id:
+            return jsonify({"error": "dataId 和 nodeId 不能为空"}), 400
+        if size not in QUICKLOOK_SIZES:
+            return jsonify({"error": f"size 只能为 {', '.join(QUICKLOOK_SIZES)}"}), 400
+
+        service = current_app.extensions["quicklook"]
+        try:
+            stat = service.stat(data_id, node_id)
+        except S3Error as e:
+            logger.error(f"获取快视图信息失败: {e}, dataId: {data_id}, nodeId: {node_id}")
+            return jsonify({"error": "获取快视图失败"}), 500
+        if stat is None:
+            return jsonify({"error": "快视图不存在"}), 404
+
+        source_etag = stat.etag.strip('"') if stat.etag else ""
+        etag = version_stamp(source_etag, size)
+        max_age = getattr(config, "QUICKLOOK_MAX_AGE", 7 * 24 * 3600)
+        # 客户端缓存仍有效时不必生成缩略图
+        if request.if_none_match.contains(etag):
+            return conditional(Response(status=200), etag, stat.last_modified, max_age)
+
+        try:
+            image = service.variant(data_id, node_id, size, source_etag)
+        except IMAGE_ERRORS as e:
+            logger.error(f"快视图解码失败: {e}, dataId: {data_id}, nodeId: {node_id}")
+            return jsonify({"error": "快视图不是有效的图片"}), 502
+        if image is None:
+            return jsonify({"error": "获取快视图失败"}), 500
+        mimetype = "image/jpeg" if QUICKLOOK_SIZES[size] else (stat.content_type or "image/jpeg")
+        return conditional(Response(image, mimetype=mimetype), etag, stat.last_modified, max_age)
+
+    return quicklook_bp
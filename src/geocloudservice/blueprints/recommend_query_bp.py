@@ -181,7 +181,7 @@ def recommend_query_blueprint(app, siwa):
         page = query.currentPage
 
         recommend_data , coverage_ratio = cacheFetchRecommendData(table_name, wkt, area_code, g.MyPool, g.MyCacheManager,
-                                                                  guid,page, pageSize)
+                                                                  guid,page, pageSize, g.MyTileCache)
         
         # recommend_data , coverage_ratio = recommendData(table_name, wkt, area_code, pool)
 
@@ -230,7 +230,7 @@ def recommend_query_blueprint(app, siwa):
 
         # pool = create_pool()
         sizenum, wktresponse,total,rn = cacheFeachRecomCoverData(table_name, wkt ,area_code,
-                                                      g.MyCacheManager, guid, g.MyPool)
+                                                      g.MyCacheManager, guid, g.MyPool, g.MyTileCache)
         recommend_coverage = {
             "SIZENUM" : sizenum,
             "WKTRESPONSE" : wktresponse,
@@ -299,7 +299,8 @@ def search_query_blueprint(app, siwa):
                     end_time_values = query_field.queryValue[1]
 
 
-        search_data = searchData(table_name, wkt, area_code, start_time_values, end_time_values, cloud_percent_values, g.MyPool)
+        search_data = searchData(table_name, wkt, area_code, start_time_values, end_time_values, cloud_percent_values, g.MyPool,
+                                 g.MyTileCache)
 
         query_response = QueryResponse(
             total=len(search_data),  
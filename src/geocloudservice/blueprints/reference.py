@@ -0,0 +1,64 @@
+from flask import Blueprint, request, jsonify, g, current_app, Response
+
+import src.config.config as config
+from src.geocloudservice.area_tree import ROOT_CODE
+from src.geocloudservice.conditional import conditional, version_stamp
+from src.geocloudservice.reference_data import VIDEO_RESOURCES
+
+
+def reference_blueprint(app, siwa):
+    reference_bp = Blueprint("reference", __name__, url_prefix="/reference")
+    # (版本号, 响应体字节), 版本变化时重新序列化
+    bundle_cache = {}
+
+    def current_version():
+        """刷新各项参考数据并返回合并后的版本号, 任一项不可用时返回None"""
+        reference = current_app.extensions["reference_data"]
+        area_tree = current_app.extensions["area_tree"]
+        tree = area_tree.get(g.MyPool, ROOT_CODE)
+        if not reference.refresh(g.MyPool) or tree is None:
+            return None, None
+        version = version_stamp(reference.version, area_tree.version, reference.videos_version)
+        modified = max(reference.modified, area_tree.modified, reference.videos_modified)
+        return version, modified
+
+    @reference_bp.get("/version")
+    @siwa.doc(summary="参考数据包版本", description="返回参考数据包的当前版本号, 前端版本变化时再获取数据包",
+              tags=["reference"])
+    def bundle_version():
+        version, modified = current_version()
+        if version is None:
+            return jsonify({"error": "参考数据加载失败"}), 500
+        return conditional(jsonify({"version": version}), version, modified)
+
+    @reference_bp.get("/bundle")
+    @siwa.doc(summary="参考数据包",
+              description="卫星列表与介绍、行政区划树、操作指导视频链接; 携带当前版本号 v 参数时允许长期缓存",
+              tags=["reference"])
+    def bundle():
+        version, modified = current_version()
+        if version is None:
+            return jsonify({"error": "参考数据加载失败"}), 500
+
+        body = bundle_cache.get(version)
+        if body is None:
+            reference = current_app.extensions["reference_data"]
+            area_tree = current_app.extensions["area_tree"]
+            data = {
+                "version": version,
+                "satellites": reference.satellites,
+                "satelliteDetails": reference.details,
+                "areas": area_tree.get(g.MyPool, ROOT_CODE),
+                "videos": VIDEO_RESOURCES,
+            }
+            body = current_app.json.response(data).get_data()
+            bundle_cache.clear()
+            bundle_cache[version] = body
+
+        # 带版本号的地址内容不会变化, 可以长期缓存; 不带版本号时每次校验
+        max_age = getattr(config, "REFERENCE_BUNDLE_MAX_AGE", 365 * 24 * 3600) \
+            if request.args.get("v") == version else 0
+        response = Response(body, status=200, mimetype=current_app.json.mimetype)
+        return conditional(response, version, modified, max_age)
+
+    return reference_bp
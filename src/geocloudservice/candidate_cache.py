@@ -0,0 +1,313 @@
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from src.utils.CacheManager import SimpleCache
+from src.utils.GeoDBHandler import GeoDBHandler
+from src.utils.logger import logger
+from src.geocloudservice.recommend import fetchDataFromDB, generateSqlQuery
+
+# 候选影像的字段, 与 searchData/fetchRecommendData 的查询字段一致, 几何字段必须在最后
+DATANAME = ["F_DATANAME", "F_DID", "F_SCENEROW", "F_LOCATION", "F_PRODUCTID", "F_PRODUCTLEVEL",
+            "F_CLOUDPERCENT", "F_TABLENAME", "F_DATATYPENAME", "F_ORBITID", "F_PRODUCETIME",
+            "F_SENSORID", "F_DATASIZE", "F_RECEIVETIME", "F_DATAID", "F_SATELLITEID", "F_SCENEPATH"]
+# 影像外接矩形的四个角点, 用于划分瓦片和推荐查询的包含关系过滤
+BOUNDS = ["F_TOPLEFTLONGITUDE", "F_TOPLEFTLATITUDE", "F_BOTTOMRIGHTLONGITUDE", "F_BOTTOMRIGHTLATITUDE"]
+GEOMETRY = "F_SPATIAL_INFO"
+# 同一景影像可能落在多个瓦片中, 组装时按这些字段去重
+IDENTITY = ["F_TABLENAME", "F_DATANAME", "F_DID"]
+# 角点缺失的影像无法划分瓦片, 按月单独缓存在这个"瓦片"中
+UNLOCATED = ('*', '*')
+
+
+def monthStart(time: datetime) -> datetime:
+    return datetime(time.year, time.month, 1)
+
+
+def nextMonth(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def prevMonth(month: datetime) -> datetime:
+    return datetime(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+
+
+def monthRange(start: datetime, end: datetime) -> list:
+    """start 与 end 之间(含两端)所有月份的月初时间"""
+    months = []
+    month = monthStart(start)
+    while month <= end:
+        months.append(month)
+        month = nextMonth(month)
+    return months
+
+
+class CandidateTileCache:
+    """按 (卫星表, 固定网格瓦片, 月份) 缓存候选影像
+
+    任意多边形与时间窗口的查询都由覆盖其外接矩形的瓦片和时间窗口内的月份组装而成,
+    只有缓存中缺失的 (瓦片, 月份) 才会查询Oracle, 之后再按原有条件做精确过滤。
+    地图平移时相邻、重叠的查询大部分可以直接由内存中的瓦片满足。
+
+    已结束月份的瓦片不会再变化, 使用较长的TTL; 当月的瓦片仍在入库新数据, 使用较短的TTL。
+    检索用的瓦片保存不限云量的全部影像, 云量在组装后过滤; 推荐用的瓦片在查询时即按推荐的云量上限过滤,
+    与检索瓦片分开缓存。
+    """
+    NAMESPACE = 'candidateTiles'
+
+    def __init__(self, pool, tile_degrees: float = 2.0, max_bytes: int = 1024 * 1024 * 1024,
+                 ttl: int = 24 * 3600, recent_ttl: int = 300, recommend_months_back: int = 36):
+        """
+        Args:
+            pool: 数据库连接池
+            tile_degrees (float): 网格瓦片边长(度)
+            max_bytes (int): 已结束月份瓦片的内存预算(字节)
+            ttl (int): 已结束月份瓦片的存活时间(秒)
+            recent_ttl (int): 当月瓦片的存活时间(秒)
+            recommend_months_back (int): 推荐查询最多向前回溯的月数, 超出后退回直接查询数据库
+        """
+        self.pool = pool
+        self.tile_degrees = tile_degrees
+        self.recommend_months_back = recommend_months_back
+        self.tiles = SimpleCache(max_bytes=max_bytes, ttl=ttl)
+        self.recent_tiles = SimpleCache(max_bytes=max_bytes // 8, ttl=recent_ttl)
+        self.geodbhandler = GeoDBHandler()
+
+    def _tileRange(self, minlon, minlat, maxlon, maxlat) -> list:
+        """覆盖给定外接矩形的所有瓦片编号"""
+        deg = self.tile_degrees
+        xs = range(math.floor(minlon / deg), math.floor(maxlon / deg) + 1)
+        ys = range(math.floor(minlat / deg), math.floor(maxlat / deg) + 1)
+        return [(x, y) for x in xs for y in ys]
+
+    def _store(self, month: datetime):
+        return self.recent_tiles if month >= monthStart(datetime.now()) else self.tiles
+
+    def _key(self, table: str, tile: tuple, month: datetime, maxCloud=None) -> str:
+        key = f'{table}|{tile[0]}|{tile[1]}|{month:%Y-%m}'
+        return key if maxCloud is None else f'{key}|{maxCloud}'
+
+    def getCandidates(self, tablename: list, bounds: tuple, months: list, maxCloud=None,
+                      unlocated: bool = False) -> gpd.GeoDataFrame:
+        """组装给定表、外接矩形和月份范围内的候选影像(未做精确过滤)
+
+        Args:
+            tablename (list): 卫星表名列表
+            bounds (tuple): 目标区域外接矩形 (minlon, minlat, maxlon, maxlat)
+            months (list): 月初时间列表
+            maxCloud: 云量上限, 为None时不限云量
+            unlocated (bool): 是否包含角点缺失的影像(检索按几何相交过滤, 不依赖角点)
+
+        Returns:
+            gpd.GeoDataFrame: 去重后的候选影像, 包含 DATANAME、BOUNDS 字段和 geometry
+        """
+        tiles = self._tileRange(*bounds)
+        frames = []
+        for table in tablename:
+            table = table.upper()
+            missing, missing_unlocated = [], []
+            for month in months:
+                store = self._store(month)
+                for tile in (tiles + [UNLOCATED]) if unlocated else tiles:
+                    frame = store.get(self._key(table, tile, month, maxCloud), self.NAMESPACE)
+                    if frame is None:
+                        if tile == UNLOCATED:
+                            missing_unlocated.append(month)
+                        else:
+                            missing.append((tile, month))
+                    elif len(frame):
+                        frames.append(frame)
+            if missing:
+                frames.extend(self._loadTiles(table, missing, maxCloud))
+            if missing_unlocated:
+                frames.extend(self._loadUnlocated(table, missing_unlocated, maxCloud))
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return None
+        candidates = pd.concat(frames, ignore_index=True)
+        candidates = candidates.drop_duplicates(subset=IDENTITY, ignore_index=True)
+        return gpd.GeoDataFrame(candidates, geometry='geometry', crs=self.geodbhandler.crs)
+
+    def _loadTiles(self, table: str, missing: list, maxCloud=None) -> list:
+        """取回某张表所有缺失的 (瓦片, 月份), 按瓦片和月份拆分后写入缓存
+
+        缺失的瓦片先合并成若干矩形: 同一行中相邻且缺失月份相同的瓦片合并, 再与上一行横跨相同、
+        月份相同的矩形合并, 每个矩形一次查询。分散的缺失瓦片不会用一个大外接矩形把中间已缓存的区域也查回来。
+        """
+        tile_months = {}
+        for tile, month in missing:
+            tile_months.setdefault(tile, set()).add(month)
+        rects = []
+        # (x0, x1, 月份) -> 上一行中横跨相同的矩形在 rects 中的下标
+        above = {}
+        for (x, y) in sorted(tile_months, key=lambda tile: (tile[1], tile[0])):
+            months = frozenset(tile_months[(x, y)])
+            rect = rects[-1] if rects else None
+            if rect and rect[2] == rect[3] == y and rect[1] == x - 1 and rect[4] == months:
+                rects[-1] = (rect[0], x, y, y, months)
+            else:
+                rects.append((x, x, y, y, months))
+        merged = []
+        for x0, x1, y, _, months in rects:
+            index = above.get((x0, x1, months))
+            if index is not None and merged[index][3] == y - 1:
+                merged[index] = (x0, x1, merged[index][2], y, months)
+            else:
+                above[(x0, x1, months)] = len(merged)
+                merged.append((x0, x1, y, y, months))
+        loaded = []
+        for x0, x1, y0, y1, months in merged:
+            tiles = [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+            loaded.extend(self._loadRect(table, tiles, sorted(months), maxCloud))
+        return loaded
+
+    def _query(self, table: str, months: list, whereSql: str, params: dict, maxCloud=None) -> gpd.GeoDataFrame:
+        """查询给定月份范围内满足 whereSql 的候选影像"""
+        whereSql = "WHERE F_RECEIVETIME >= TO_DATE(:startTime, 'YYYY-MM-DD HH24:MI:SS') \
+            AND F_RECEIVETIME < TO_DATE(:endTime, 'YYYY-MM-DD HH24:MI:SS') AND " + whereSql
+        params = dict(params, startTime=min(months).strftime('%Y-%m-%d %H:%M:%S'),
+                      endTime=nextMonth(max(months)).strftime('%Y-%m-%d %H:%M:%S'))
+        if maxCloud is not None:
+            whereSql += " AND F_CLOUDPERCENT <= :maxCloud"
+            params['maxCloud'] = maxCloud
+        sql = generateSqlQuery(DATANAME + BOUNDS + [GEOMETRY], [table], whereSql)
+        rows, columns = fetchDataFromDB(self.pool, sql, params)
+        if rows is None:
+            raise RuntimeError(f'候选影像瓦片查询失败: {table}')
+        return self.geodbhandler.imageDataToGeoDataFrame(rows, columns)
+
+    def _storeCells(self, table: str, gdf: gpd.GeoDataFrame, cells: dict, tiles: list, months: list,
+                    maxCloud=None) -> list:
+        """按 cells ((瓦片x, 瓦片y, 月份) -> 行号) 拆分并写入缓存, 没有影像的 (瓦片, 月份) 写入空表"""
+        empty = gdf.iloc[0:0]
+        loaded = []
+        for month in months:
+            for tile in tiles:
+                rows_idx = cells.get((tile[0], tile[1], f'{month:%Y-%m}'))
+                frame = gdf.iloc[rows_idx].reset_index(drop=True) if rows_idx else empty
+                self._store(month).set(self._key(table, tile, month, maxCloud), frame, self.NAMESPACE)
+                loaded.append(frame)
+        return loaded
+
+    def _loadRect(self, table: str, tiles: list, months: list, maxCloud=None) -> list:
+        """一次查询取回矩形内的瓦片在给定月份的候选影像, 按瓦片和月份拆分后写入缓存"""
+        deg = self.tile_degrees
+        xs = [tile[0] for tile in tiles]
+        ys = [tile[1] for tile in tiles]
+        gdf = self._query(table, months,
+                          "F_TOPLEFTLONGITUDE <= :maxlon AND F_BOTTOMRIGHTLONGITUDE >= :minlon \
+            AND F_BOTTOMRIGHTLATITUDE <= :maxlat AND F_TOPLEFTLATITUDE >= :minlat",
+                          {'minlon': min(xs) * deg, 'maxlon': (max(xs) + 1) * deg,
+                           'minlat': min(ys) * deg, 'maxlat': (max(ys) + 1) * deg}, maxCloud)
+        logger.info(f'候选影像瓦片加载: {table}, 瓦片 {len(tiles)} 个, 月份 {len(months)} 个, 取回影像 {len(gdf)} 景')
+
+        # 将每景影像展开到其外接矩形覆盖的每个 (瓦片, 月份); 上面的条件只选中角点均不为空的影像,
+        # 角点为空的影像由 _loadUnlocated 单独缓存
+        corners = np.nan_to_num(gdf[BOUNDS].to_numpy(dtype=float))
+        x0 = np.floor(corners[:, 0] / deg).astype(int)
+        x1 = np.floor(corners[:, 2] / deg).astype(int)
+        y0 = np.floor(corners[:, 3] / deg).astype(int)
+        y1 = np.floor(corners[:, 1] / deg).astype(int)
+        month_keys = pd.to_datetime(gdf['F_RECEIVETIME']).dt.strftime('%Y-%m').to_numpy()
+        cells = {}
+        for i in range(len(gdf)):
+            for x in range(x0[i], x1[i] + 1):
+                for y in range(y0[i], y1[i] + 1):
+                    cells.setdefault((x, y, month_keys[i]), []).append(i)
+        return self._storeCells(table, gdf, cells, tiles, months, maxCloud)
+
+    def _loadUnlocated(self, table: str, months: list, maxCloud=None) -> list:
+        """取回给定月份中角点缺失的影像, 按月写入缓存
+
+        这些影像不会被按角点划分的瓦片查询选中, 但直接查询数据库的检索按几何相交过滤时会包含它们。
+        """
+        gdf = self._query(table, months, "(F_TOPLEFTLONGITUDE IS NULL OR F_TOPLEFTLATITUDE IS NULL \
+            OR F_BOTTOMRIGHTLONGITUDE IS NULL OR F_BOTTOMRIGHTLATITUDE IS NULL)", {}, maxCloud)
+        if len(gdf):
+            logger.info(f'候选影像加载: {table}, 角点缺失的影像 {len(gdf)} 景')
+        cells = {}
+        for i, month in enumerate(pd.to_datetime(gdf['F_RECEIVETIME']).dt.strftime('%Y-%m')):
+            cells.setdefault((*UNLOCATED, month), []).append(i)
+        return self._storeCells(table, gdf, cells, [UNLOCATED], months, maxCloud)
+
+    def searchCandidates(self, tablename: list, target_area, startTime: str, endTime: str,
+                         cloudPercent) -> gpd.GeoDataFrame:
+        """searchData 的候选影像: 时间窗口与云量过滤后按采集时间倒序, 不含角点字段"""
+        start, end = pd.Timestamp(startTime), pd.Timestamp(endTime)
+        candidates = self.getCandidates(tablename, target_area.bounds,
+                                        monthRange(start.to_pydatetime(), end.to_pydatetime()), unlocated=True)
+        if candidates is None:
+            return gpd.GeoDataFrame(columns=DATANAME + ['geometry'], geometry='geometry',
+                                    crs=self.geodbhandler.crs)
+        receive = pd.to_datetime(candidates['F_RECEIVETIME'])
+        mask = (receive >= start) & (receive <= end) \
+            & (candidates['F_CLOUDPERCENT'].astype(float) <= float(cloudPercent))
+        result = candidates[mask].sort_values('F_RECEIVETIME', ascending=False, kind='stable')
+        return result.drop(columns=BOUNDS).reset_index(drop=True)
+
+    def _countRecent(self, tablename: list, bounds: tuple, maxCloud, start: datetime) -> int:
+        """start 之后完全落在外接矩形内、云量不超过 maxCloud 的影像数量, 结果短时缓存"""
+        minlon, minlat, maxlon, maxlat = bounds
+        key = f'count|{",".join(tablename).upper()}|{minlon}|{minlat}|{maxlon}|{maxlat}|{maxCloud}|{start:%Y-%m}'
+        count = self.recent_tiles.get(key, self.NAMESPACE)
+        if count is not None:
+            return count
+        whereSql = "WHERE F_RECEIVETIME >= TO_DATE(:startTime, 'YYYY-MM-DD HH24:MI:SS') \
+            AND F_TOPLEFTLATITUDE <= :maxlat AND F_TOPLEFTLONGITUDE >= :minlon \
+            AND F_BOTTOMRIGHTLATITUDE >= :minlat AND F_BOTTOMRIGHTLONGITUDE <= :maxlon \
+            AND F_CLOUDPERCENT <= :maxCloud"
+        # fetchDataFromDB 舍弃最后一个字段名, 补一个占位字段
+        sql = generateSqlQuery(['COUNT(*)', '0'], tablename, whereSql)
+        rows, _ = fetchDataFromDB(self.pool, sql, {
+            'startTime': start.strftime('%Y-%m-%d %H:%M:%S'), 'maxCloud': maxCloud,
+            'minlon': minlon, 'maxlon': maxlon, 'minlat': minlat, 'maxlat': maxlat})
+        if rows is None:
+            raise RuntimeError('候选影像数量查询失败')
+        count = sum(row[0] for row in rows)
+        self.recent_tiles.set(key, count, self.NAMESPACE)
+        return count
+
+    def recommendCandidates(self, tablename: list, target_area, limit: int = 8000,
+                            maxCloud: float = 20, chunk_months: int = 6) -> gpd.GeoDataFrame:
+        """fetchRecommendData 的候选影像: 完全落在目标外接矩形内、云量不超过 maxCloud 的最新 limit 景
+
+        先统计回溯 recommend_months_back 个月内的候选数, 不足 limit 时返回None, 由调用方直接查询数据库,
+        以保证结果与不限时间的原始查询一致(面积较小的区域通常如此, 不再加载瓦片)。
+        否则从当月开始每次向前取 chunk_months 个月的瓦片(查询时已按云量过滤), 直到候选数达到 limit。
+        """
+        minlon, minlat, maxlon, maxlat = target_area.bounds
+        month = monthStart(datetime.now())
+        oldest = month
+        for _ in range(self.recommend_months_back - 1):
+            oldest = prevMonth(oldest)
+        count = self._countRecent(tablename, target_area.bounds, maxCloud, oldest)
+        if count < limit:
+            logger.info(f'回溯 {self.recommend_months_back} 个月候选影像 {count} 景, 不足 {limit} 景, 直接查询数据库')
+            return None
+        frames, total, looked = [], 0, 0
+        while looked < self.recommend_months_back:
+            months = []
+            for _ in range(min(chunk_months, self.recommend_months_back - looked)):
+                months.append(month)
+                month = prevMonth(month)
+            looked += len(months)
+            candidates = self.getCandidates(tablename, target_area.bounds, months, maxCloud)
+            if candidates is None:
+                continue
+            mask = (candidates['F_TOPLEFTLATITUDE'].astype(float) <= maxlat) \
+                & (candidates['F_TOPLEFTLONGITUDE'].astype(float) >= minlon) \
+                & (candidates['F_BOTTOMRIGHTLATITUDE'].astype(float) >= minlat) \
+                & (candidates['F_BOTTOMRIGHTLONGITUDE'].astype(float) <= maxlon)
+            frame = candidates[mask]
+            frames.append(frame)
+            total += len(frame)
+            if total >= limit:
+                result = pd.concat(frames, ignore_index=True)
+                result = result.sort_values('F_RECEIVETIME', ascending=False, kind='stable').head(limit)
+                result = gpd.GeoDataFrame(result, geometry='geometry', crs=self.geodbhandler.crs)
+                return result.drop(columns=BOUNDS).reset_index(drop=True)
+        logger.info(f'回溯 {looked} 个月候选影像不足 {limit} 景, 改为直接查询数据库')
+        return None
@@ -0,0 +1,41 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from flask import request, jsonify, Response
+
+
+def version_stamp(*parts) -> str:
+    """由任意可JSON序列化的版本信息生成稳定的版本号, 用作强ETag"""
+    text = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def utcnow() -> datetime:
+    """Last-Modified 使用的当前时间, 精确到秒"""
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def conditional(response: Response, etag: str, last_modified: datetime = None, max_age: int = 0) -> Response:
+    """为响应设置强ETag与Last-Modified, 请求携带匹配的 If-None-Match/If-Modified-Since 时返回304
+
+    Args:
+        response (Response): 状态码为200的响应
+        etag (str): 由内存中版本号生成的ETag
+        last_modified (datetime): 数据最近一次变化的时间
+        max_age (int): 允许客户端不经校验直接使用缓存的秒数, 为0时每次都需要校验
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    if max_age > 0:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def conditional_json(data, etag: str, last_modified: datetime = None, max_age: int = 0) -> Response:
+    """jsonify(data) 并按 conditional 处理条件请求"""
+    return conditional(jsonify(data), etag, last_modified, max_age)
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from flask import Response, g, request
+
+from src.utils.metrics import Histogram
+
+# 请求耗时分桶上界(秒)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 未匹配到路由的请求(404等)统一使用的标签, 避免任意路径产生大量时间序列
+UNMATCHED = "<unmatched>"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(**labels) -> str:
+    return ",".join(f'{name}="{escape_label(value)}"' for name, value in labels.items())
+
+
+def format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class HttpMetrics:
+    """按路由统计的HTTP指标: 耗时直方图、状态码计数、请求/响应字节数及并发请求数
+
+    路由取 Flask 的URL规则(如 /recommend_query/recommend), 以 Prometheus 文本格式输出。
+    耗时统计到视图返回响应为止, 流式响应的发送时间不计入。
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # (路由, 方法) -> Histogram
+        self._latency = {}
+        # (路由, 方法, 状态码) -> 次数
+        self._requests = {}
+        # (路由, 方法) -> [请求字节数, 响应字节数]
+        self._bytes = {}
+        # (路由, 方法) -> 正在处理的请求数
+        self._in_flight = {}
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+        app.extensions["http_metrics"] = self
+        return self
+
+    @staticmethod
+    def _key() -> tuple:
+        rule = request.url_rule.rule if request.url_rule is not None else UNMATCHED
+        return rule, request.method
+
+    def _before(self):
+        key = self._key()
+        g.metrics_key = key
+        g.metrics_start = time.perf_counter()
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def _after(self, response):
+        key = getattr(g, "metrics_key", None)
+        if key is None:
+            return response
+        elapsed = time.perf_counter() - g.metrics_start
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(self.buckets)
+            status = (*key, response.status_code)
+            self._requests[status] = self._requests.get(status, 0) + 1
+            sizes = self._bytes.setdefault(key, [0, 0])
+            sizes[0] += request.content_length or 0
+            sizes[1] += response.content_length or 0
+        histogram.observe(elapsed)
+        return response
+
+    def _teardown(self, exc):
+        # 未处理的异常由 Flask 转为500响应, 同样经过 after_request, 这里只维护并发数
+        key = g.pop("metrics_key", None)
+        if key is None:
+            return
+        with self._lock:
+            self._in_flight[key] -= 1
+
+    def render(self) -> str:
+        """以 Prometheus 文本格式输出全部指标"""
+        with self._lock:
+            latency = list(self._latency.items())
+            requests = sorted(self._requests.items())
+            sizes = sorted((key, list(value)) for key, value in self._bytes.items())
+            in_flight = sorted(self._in_flight.items())
+
+        lines = [
+            "# HELP http_request_duration_seconds 请求处理耗时(秒)",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (route, method), histogram in sorted(latency, key=lambda item: item[0]):
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                labels = format_labels(route=route, method=method, le=bound)
+                lines.append(f"http_request_duration_seconds_bucket{{{labels}}} {count}")
+            labels = format_labels(route=route, method=method)
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {snapshot["count"]}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {format_value(snapshot['sum'])}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {snapshot['count']}")
+
+        lines += ["# HELP http_requests_total 请求数", "# TYPE http_requests_total counter"]
+        for (route, method, status), count in requests:
+            lines.append(f"http_requests_total{{{format_labels(route=route, method=method, status=status)}}} {count}")
+
+        lines += ["# HELP http_request_size_bytes_total 请求体字节数", "# TYPE http_request_size_bytes_total counter"]
+        lines += [f"http_request_size_bytes_total{{{format_labels(route=route, method=method)}}} {received}"
+                  for (route, method), (received, _) in sizes]
+        lines += ["# HELP http_response_size_bytes_total 响应体字节数(没有 Content-Length 的流式响应不计入)",
+                  "# TYPE http_response_size_bytes_total counter"]
+        lines += [f"http_response_size_bytes_total{{{format_labels(route=route, method=method)}}} {sent}"
+                  for (route, method), (_, sent) in sizes]
+
+        lines += ["# HELP http_requests_in_flight 正在处理的请求数", "# TYPE http_requests_in_flight gauge"]
+        lines += [f"http_requests_in_flight{{{format_labels(route=route, method=method)}}} {count}"
+                  for (route, method), count in in_flight]
+        return "\n".join(lines) + "\n"
+
+    def response(self) -> Response:
+        return Response(self.render(), content_type=CONTENT_TYPE)
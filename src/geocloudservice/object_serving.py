@@ -0,0 +1,154 @@
+import threading
+from urllib.parse import quote
+
+from cachetools import TTLCache
+from flask import request, jsonify, Response, send_file
+from minio.error import S3Error
+
+from src.utils.logger import logger
+
+# 对象不存在时 MinIO 返回的错误码
+MISSING_CODES = ("NoSuchKey", "NoSuchBucket", "NoSuchObject")
+
+
+class ObjectServer:
+    """从 MinIO 向客户端流式输出对象, 支持 HTTP Range / 206 Partial Content
+
+    使用共享的 MinIO 客户端(连接池复用); 对象元数据(大小、ETag、修改时间)按TTL缓存,
+    Range 映射为 get_object 的 offset/length, 按固定块大小流式输出, 结束或客户端断开时释放连接。
+    配置了磁盘缓存时, 不超过缓存单对象上限的对象先落到本地, 再通过 WSGI file wrapper 发送。
+    """
+
+    def __init__(self, client_factory, stat_ttl: int = 60, stat_maxsize: int = 1024,
+                 chunk_size: int = 256 * 1024, disk_cache=None):
+        """
+        Args:
+            client_factory: 返回 MinIO 客户端的无参函数, 首次使用时调用
+            stat_ttl (int): 对象元数据缓存时间(秒)
+            stat_maxsize (int): 元数据缓存的最大条目数
+            chunk_size (int): 流式输出的块大小(字节)
+            disk_cache (ObjectDiskCache): 本地磁盘缓存, 为None时总是从 MinIO 流式输出
+        """
+        self.client_factory = client_factory
+        self.disk_cache = disk_cache
+        self.chunk_size = chunk_size
+        self._client = None
+        self._stats = TTLCache(maxsize=stat_maxsize, ttl=stat_ttl)
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    def stat(self, bucket: str, name: str):
+        """对象元数据, 命中缓存时不访问 MinIO; 对象不存在时返回None"""
+        key = (bucket, name)
+        with self._lock:
+            stat = self._stats.get(key)
+        if stat is not None:
+            return stat
+        try:
+            stat = self.client.stat_object(bucket, name)
+        except S3Error as e:
+            if e.code in MISSING_CODES:
+                return None
+            raise
+        with self._lock:
+            self._stats[key] = stat
+        return stat
+
+    def invalidate(self, bucket: str, name: str):
+        with self._lock:
+            self._stats.pop((bucket, name), None)
+
+    def stream(self, bucket: str, name: str, offset: int, length: int):
+        """按块读取对象的 [offset, offset + length), 生成器结束或关闭时释放连接"""
+        response = self.client.get_object(bucket, name, offset=offset, length=length)
+        try:
+            for chunk in response.stream(self.chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def serve(self, bucket: str, name: str, download_name: str = None, content_type: str = None) -> Response:
+        """输出对象的完整内容或请求的 Range
+
+        Args:
+            bucket (str): 存储桶
+            name (str): 对象名
+            download_name (str): 以附件形式下载时的文件名, 为None时内联输出
+            content_type (str): 响应类型, 为None时使用对象的 Content-Type
+        """
+        try:
+            stat = self.stat(bucket, name)
+        except S3Error as e:
+            logger.error(f"获取 MinIO 对象信息失败: {e}, 对象: {bucket}/{name}")
+            return jsonify({"error": f"无法获取文件: {str(e)}"}), 500
+        if stat is None:
+            return jsonify({"error": "文件不存在"}), 404
+
+        etag = stat.etag.strip('"') if stat.etag else None
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Type": content_type or stat.content_type or "application/octet-stream",
+        }
+        if download_name:
+            headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+
+        if etag and request.if_none_match.contains(etag):
+            response = Response(status=304, headers=headers)
+            response.set_etag(etag)
+            return response
+
+        size = stat.size
+        if self.disk_cache is not None and etag and self.disk_cache.cacheable(size):
+            try:
+                path = self.disk_cache.fetch(self.client, bucket, name, etag, size)
+            except S3Error as e:
+                self.invalidate(bucket, name)
+                logger.error(f"从 MinIO 读取对象失败: {e}, 对象: {bucket}/{name}")
+                return jsonify({"error": f"无法下载文件: {str(e)}"}), 500
+            # send_file 处理 Range/If-Range/条件请求, 并使用 wsgi.file_wrapper 发送文件
+            return send_file(path, mimetype=headers["Content-Type"], as_attachment=bool(download_name),
+                             download_name=download_name, conditional=True, etag=etag,
+                             last_modified=stat.last_modified)
+
+        size = stat.size
+        start, stop, status = 0, size, 200
+        # 多段Range, 或 If-Range 与当前ETag不一致时忽略Range, 返回完整内容
+        byte_range = request.range
+        if byte_range is not None and len(byte_range.ranges) == 1 \
+                and ("If-Range" not in request.headers or request.if_range.etag == etag):
+            byte_range = byte_range.range_for_length(size)
+            if byte_range is None:
+                return Response(status=416, headers={"Content-Range": f"bytes */{size}", "Accept-Ranges": "bytes"})
+            start, stop = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        headers["Content-Length"] = str(stop - start)
+
+        try:
+            body = self.stream(bucket, name, start, stop - start) if stop > start else (chunk for chunk in ())
+            # 先取出首块, 使 get_object 的错误能在发送响应头之前返回
+            first = next(body, b"")
+        except S3Error as e:
+            self.invalidate(bucket, name)
+            logger.error(f"从 MinIO 读取对象失败: {e}, 对象: {bucket}/{name}")
+            return jsonify({"error": f"无法下载文件: {str(e)}"}), 500
+
+        def generate():
+            if first:
+                yield first
+            yield from body
+
+        response = Response(generate(), status=status, headers=headers, direct_passthrough=True)
+        # 由 WSGI 服务器在响应结束时调用, generate() 未被迭代(HEAD、304、客户端提前断开)时也能关闭对象流、释放连接
+        response.call_on_close(body.close)
+        if etag:
+            response.set_etag(etag)
+        if stat.last_modified:
+            response.last_modified = stat.last_modified
+        return response
@@ -0,0 +1,185 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from src.geocloudservice.order_stats import (METHODS, ORDERS, SIZE_MB, SCENES, SCENE_ROWS, fetchOrderStats,
+                                             formatStats, queryGroupedStats, summarizeRows)
+from src.utils.logger import logger
+
+PY_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# 首次构建时的统计起点, 早于所有订单即可
+EPOCH = '1970-01-01 00:00:00'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS order_rollup (
+    day TEXT NOT NULL,
+    method TEXT NOT NULL,
+    orders INTEGER NOT NULL,
+    size_mb REAL NOT NULL,
+    scenes REAL NOT NULL,
+    scene_rows INTEGER NOT NULL,
+    PRIMARY KEY (day, method)
+);
+CREATE TABLE IF NOT EXISTS rollup_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class OrderStatsRollup:
+    """已完成订单的按天汇总, 供 /bupt_stat/get 使用
+
+    每天、每种取数方式的订单数、数据量(MB)、景数保存在本地SQLite中, 内存中保留按天累加的前缀和,
+    任意时间范围内的整天部分由两次前缀和相减得到; 范围两端不足一天的部分以及尚未汇总的当天,
+    合并为一次分组查询实时统计。
+
+    首次启动时在后台线程中全量构建, 之后每隔 refresh_interval 秒重新统计最近 refresh_days 天
+    (订单状态可能在创建后数天内变化), 并把汇总推进到昨天。构建完成前的请求直接查询数据库。
+    多个进程共用同一文件时只由一个进程刷新, 其余进程每隔 refresh_interval 秒从文件重新加载。
+    """
+
+    def __init__(self, pool, path: str, refresh_interval: int = 600, refresh_days: int = 3,
+                 refreshing: bool = True):
+        """
+        Args:
+            pool: 数据库连接池
+            path (str): SQLite文件路径, 多个进程可共用同一文件
+            refresh_interval (int): 刷新间隔(秒)
+            refresh_days (int): 每次刷新重新统计的最近天数
+            refreshing (bool): 是否由本进程刷新汇总, 为False时只重新加载其他进程写入的汇总
+        """
+        self.pool = pool
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.refresh_days = refresh_days
+        self.refreshing = refreshing
+        # (首日, 汇总截止日(不含), 前缀和), 整体替换, 读取时无需加锁
+        self._snapshot = None
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self._thread = threading.Thread(target=self._refreshLoop, name='order-rollup', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _refreshLoop(self):
+        # 已有汇总时先加载, 不必等待首次刷新完成
+        try:
+            self._load()
+        except Exception as e:
+            logger.error(f'订单统计汇总加载失败: {e}')
+        while True:
+            if self.refreshing:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f'订单统计汇总刷新失败: {e}')
+            time.sleep(self.refresh_interval)
+            if not self.refreshing:
+                try:
+                    self._load()
+                except Exception as e:
+                    logger.error(f'订单统计汇总加载失败: {e}')
+
+    def refresh(self):
+        """重新统计最近 refresh_days 天并推进到昨天, 汇总为空时全量构建"""
+        today = date.today()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM rollup_meta WHERE key = 'watermark'").fetchone()
+        if row is None:
+            since = None
+        else:
+            since = min(date.fromisoformat(row[0]), today) - timedelta(days=self.refresh_days)
+
+        start_time = EPOCH if since is None else f'{since} 00:00:00'
+        begin = time.time()
+        rows = queryGroupedStats(self.pool, [(start_time, f'{today} 00:00:00', False)], by_day=True)
+        if rows is None:
+            raise RuntimeError('汇总查询失败')
+
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[0], []).append(row[1:])
+        records = []
+        for day, day_rows in by_day.items():
+            totals = summarizeRows(day_rows)
+            for i, method in enumerate(METHODS):
+                if totals[i, ORDERS] > 0:
+                    records.append((day, method, int(totals[i, ORDERS]), float(totals[i, SIZE_MB]),
+                                    float(totals[i, SCENES]), int(totals[i, SCENE_ROWS])))
+
+        with self._connect() as conn:
+            if since is None:
+                conn.execute("DELETE FROM order_rollup")
+            else:
+                conn.execute("DELETE FROM order_rollup WHERE day >= ?", (since.isoformat(),))
+            conn.executemany("INSERT INTO order_rollup VALUES (?, ?, ?, ?, ?, ?)", records)
+            conn.execute("INSERT OR REPLACE INTO rollup_meta VALUES ('watermark', ?)", (today.isoformat(),))
+        logger.info(f'订单统计汇总刷新完成: 起始 {since or "全部"}, {len(by_day)} 天, 耗时 {time.time() - begin:.2f}秒')
+        self._load()
+
+    def _load(self):
+        """从SQLite读取全部日汇总, 构建连续日期上的前缀和"""
+        with self._connect() as conn:
+            watermark = conn.execute("SELECT value FROM rollup_meta WHERE key = 'watermark'").fetchone()
+            rows = conn.execute("SELECT day, method, orders, size_mb, scenes, scene_rows FROM order_rollup").fetchall()
+        if watermark is None:
+            return
+        watermark = date.fromisoformat(watermark[0])
+        first_day = min((date.fromisoformat(row[0]) for row in rows), default=watermark)
+        daily = np.zeros(((watermark - first_day).days, len(METHODS), 4))
+        for day, method, *values in rows:
+            index = (date.fromisoformat(day) - first_day).days
+            if 0 <= index < len(daily) and method in METHODS:
+                daily[index, METHODS.index(method)] = values
+        prefix = np.zeros((len(daily) + 1, len(METHODS), 4))
+        np.cumsum(daily, axis=0, out=prefix[1:])
+        self._snapshot = (first_day, watermark, prefix)
+
+    def query(self, start_time: str, end_time: str) -> dict:
+        """统计 [start_time, end_time] 内的已完成订单, 返回与 fetchOrderStats 相同的响应数据
+
+        Returns:
+            dict: 响应数据, 查询失败时返回None
+        """
+        snapshot = self._snapshot
+        try:
+            start = datetime.strptime(start_time, PY_TIME_FORMAT)
+            end = datetime.strptime(end_time, PY_TIME_FORMAT)
+        except (TypeError, ValueError):
+            start = end = None
+        if snapshot is None or start is None:
+            return fetchOrderStats(self.pool, start_time, end_time)
+
+        first_day, watermark, prefix = snapshot
+        # 完整落在范围内且已汇总的日期 [lo, hi)
+        first_full = start.date() if start.time() == datetime.min.time() else start.date() + timedelta(days=1)
+        lo = max(first_full, first_day)
+        hi = min(end.date(), watermark)
+        if lo >= hi:
+            return fetchOrderStats(self.pool, start_time, end_time)
+
+        totals = prefix[(hi - first_day).days] - prefix[(lo - first_day).days]
+        ranges = []
+        if start < datetime.combine(lo, datetime.min.time()):
+            ranges.append((start_time, f'{lo} 00:00:00', False))
+        ranges.append((f'{hi} 00:00:00', end_time, True))
+        rows = queryGroupedStats(self.pool, ranges)
+        if rows is None:
+            return None
+        return formatStats(totals + summarizeRows(rows))
@@ -0,0 +1,122 @@
+import numpy as np
+
+from src.utils.db.oracle import executeQuery
+from src.utils.logger import logger
+
+OFFLINE = '线下拷贝'
+ONLINE = '在线下载'
+METHODS = (OFFLINE, ONLINE)
+# 每种取数方式的统计量: 订单数, 数据量(MB), 景数, 景数非空的订单数(为0时景数按NULL返回)
+ORDERS, SIZE_MB, SCENES, SCENE_ROWS = range(4)
+
+TIME_FORMAT = 'YYYY-MM-DD HH24:MI:SS'
+# 数据量字段按去除空格后的字符串分组, 相同数据量只返回一行
+GROUP_SQL = "SELECT {day}F_GET_METHOD, TRIM(F_DATA_SUM), COUNT(*), SUM(F_DATACOUNT), COUNT(F_DATACOUNT) \
+    FROM TF_ORDER WHERE F_STATUS NOT IN (-1, 0) AND F_GET_METHOD IN (:offline, :online) AND ({where}) \
+    GROUP BY {day}F_GET_METHOD, TRIM(F_DATA_SUM)"
+DAY_COLUMN = "TO_CHAR(TRUNC(F_CREATTIME), 'YYYY-MM-DD'), "
+
+
+def parseDataSize(values) -> np.ndarray:
+    """将 "123M"/"4.5G" 形式的数据量字符串批量转换为MB, 空值和其他单位记为0
+
+    Args:
+        values: 数据量字符串序列, 允许包含None
+
+    Returns:
+        np.ndarray: 每个字符串对应的MB数
+    """
+    text = np.array(['' if v is None else v for v in values], dtype=str)
+    if text.size == 0:
+        return np.zeros(0)
+    unit = np.char.strip(text)
+    suffix = np.array([s[-1:] for s in unit], dtype=str)
+    scale = np.select([suffix == 'M', suffix == 'G'], [1.0, 1024.0], default=0.0)
+    number = np.zeros(len(unit))
+    known = scale > 0
+    if known.any():
+        number[known] = np.array([s[:-1] for s in unit[known]], dtype=float)
+    return number * scale
+
+
+def queryGroupedStats(pool, ranges: list, by_day: bool = False) -> list:
+    """一次分组查询取回若干时间段内已完成订单的统计行
+
+    Args:
+        pool: 数据库连接池
+        ranges (list): (起始时间, 结束时间, 是否包含结束时间) 列表, 时间格式 YYYY-MM-DD HH24:MI:SS
+        by_day (bool): 是否额外按创建日期分组, 为True时每行第一列为 YYYY-MM-DD
+
+    Returns:
+        list: ([日期,] 取数方式, 数据量字符串, 订单数, 景数, 景数非空订单数) 行列表, 查询失败时返回None
+    """
+    params = {'offline': OFFLINE, 'online': ONLINE}
+    conditions = []
+    for i, (start, end, closed) in enumerate(ranges):
+        params[f'start{i}'], params[f'end{i}'] = start, end
+        conditions.append(f"F_CREATTIME >= TO_TIMESTAMP(:start{i}, '{TIME_FORMAT}') AND "
+                          f"F_CREATTIME {'<=' if closed else '<'} TO_TIMESTAMP(:end{i}, '{TIME_FORMAT}')")
+    where = ' OR '.join(f'({c})' for c in conditions)
+    sql = GROUP_SQL.format(day=DAY_COLUMN if by_day else '', where=where)
+    return executeQuery(pool, sql, params)
+
+
+def summarizeRows(rows: list) -> np.ndarray:
+    """将分组统计行汇总为 (取数方式, 统计量) 矩阵, 行顺序与 METHODS 一致"""
+    totals = np.zeros((len(METHODS), 4))
+    if not rows:
+        return totals
+    methods = np.array([row[0] for row in rows], dtype=object)
+    counts = np.array([row[2] for row in rows], dtype=float)
+    values = np.column_stack([
+        counts,
+        parseDataSize([row[1] for row in rows]) * counts,
+        np.array([row[3] or 0 for row in rows], dtype=float),
+        np.array([row[4] for row in rows], dtype=float),
+    ])
+    for i, method in enumerate(METHODS):
+        totals[i] = values[methods == method].sum(axis=0)
+    return totals
+
+
+def formatStats(totals: np.ndarray) -> dict:
+    """将统计矩阵转换为 /bupt_stat/get 的响应数据
+
+    与逐条统计保持一致: 订单数与景数为单元素数组, 没有非空景数时景数为null,
+    数据量为 MB/1024/1024 保留一位小数。
+    """
+    result = []
+    for i, method in enumerate(METHODS):
+        total_sum = float(totals[i, SIZE_MB]) / 1024
+        logger.info(f"{method}订单总数据量：{total_sum}")
+        scene_num = int(round(totals[i, SCENES])) if totals[i, SCENE_ROWS] > 0 else None
+        result.append(([int(round(totals[i, ORDERS]))], round(total_sum / 1024, 1), [scene_num]))
+
+    (offline_order_num, offline_order_size, offline_order_scene_num), \
+        (online_order_num, online_order_size, online_order_scene_num) = result
+    return {
+        "offlineOrderNum": offline_order_num,
+        "onlineOrderNum": online_order_num,
+        "offlineOrderSize": offline_order_size,
+        "onlineOrderSize": online_order_size,
+        "offlineOrderSceneNum": offline_order_scene_num,
+        "onlineOrderSceneNum": online_order_scene_num,
+        "orderSize": round(offline_order_size + online_order_size, 1)  # 总数据量
+    }
+
+
+def fetchOrderStats(pool, start_time: str, end_time: str) -> dict:
+    """统计时间范围内已完成订单的数量、数据量和景数, 按线下拷贝/在线下载分别统计
+
+    Args:
+        pool: 数据库连接池
+        start_time (str): 起始时间, YYYY-MM-DD HH24:MI:SS
+        end_time (str): 结束时间, YYYY-MM-DD HH24:MI:SS
+
+    Returns:
+        dict: /bupt_stat/get 的响应数据, 查询失败时返回None
+    """
+    rows = queryGroupedStats(pool, [(start_time, end_time, True)])
+    if rows is None:
+        return None
+    return formatStats(summarizeRows(rows))
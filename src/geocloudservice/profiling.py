@@ -0,0 +1,171 @@
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import g, request
+
+from src.utils.logger import logger
+
+PROFILE_HEADER = "X-Profile"
+REQUEST_ID_HEADER = "X-Request-Id"
+MODES = ("sample", "cprofile")
+# 各模式的文件后缀: 采样输出 flamegraph.pl / speedscope 可读的折叠栈, cProfile 输出 pstats
+SUFFIXES = {"sample": ".collapsed", "cprofile": ".prof"}
+_SAFE_ID = re.compile(r"^[\w.-]{1,64}$")
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{code.co_name}:{frame.f_lineno}"
+
+
+class StackSampler:
+    """按固定间隔采样指定线程的调用栈, 汇总为折叠栈(每行 "根;...;叶 次数")
+
+    只采样处理请求的线程, 其他请求不受影响; 请求内提交到线程池的工作不在采样范围内。
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """按需剖析单个请求: 请求头 X-Profile 为 sample 或 cprofile, 且通过管理接口鉴权时生效
+
+    结果按请求ID(请求头 X-Request-Id, 缺省时生成)保存在目录中, 响应头 X-Profile-Id 返回该ID,
+    可通过 /admin/profiles/<id> 下载。同时进行的剖析数有上限, 超出时请求照常处理但不剖析。
+    """
+
+    def __init__(self, directory: str, max_files: int = 50, max_concurrent: int = 1,
+                 sample_interval: float = 0.005, authorize=None):
+        """
+        Args:
+            directory (str): 剖析结果保存目录
+            max_files (int): 最多保留的结果文件数, 超出时删除最旧的
+            max_concurrent (int): 同时剖析的请求数上限
+            sample_interval (float): 采样模式的采样间隔(秒)
+            authorize: 无参函数, 返回当前请求是否允许剖析
+        """
+        self.directory = directory
+        self.max_files = max_files
+        self.sample_interval = sample_interval
+        self.authorize = authorize
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        os.makedirs(directory, exist_ok=True)
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+        app.extensions["profiler"] = self
+        return self
+
+    def _before(self):
+        mode = request.headers.get(PROFILE_HEADER)
+        if mode not in MODES or (self.authorize is not None and not self.authorize()):
+            return
+        if not self._slots.acquire(blocking=False):
+            logger.info(f"已有请求正在剖析, 跳过: {request.path}")
+            return
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not _SAFE_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), self.sample_interval).start()
+        g.profile = (mode, request_id, profiler, time.perf_counter())
+
+    def _finish(self):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return None
+        mode, request_id, profiler, start = profile
+        try:
+            if mode == "cprofile":
+                profiler.disable()
+                profiler.dump_stats(self.path(request_id, mode))
+            else:
+                profiler.stop()
+                profiler.dump(self.path(request_id, mode))
+            elapsed = time.perf_counter() - start
+            logger.info(f"请求剖析完成: {request.method} {request.path}, 模式 {mode}, "
+                        f"ID {request_id}, 耗时 {elapsed:.3f}s")
+            self._prune()
+            return request_id, elapsed
+        finally:
+            self._slots.release()
+
+    def _after(self, response):
+        result = self._finish()
+        if result is not None:
+            response.headers["X-Profile-Id"] = result[0]
+            response.headers["X-Profile-Seconds"] = f"{result[1]:.3f}"
+        return response
+
+    def _teardown(self, exc):
+        # after_request 未执行时(如响应处理出错)也要停止剖析并释放名额
+        self._finish()
+
+    def path(self, request_id: str, mode: str) -> str:
+        return os.path.join(self.directory, request_id + SUFFIXES[mode])
+
+    def find(self, request_id: str):
+        """返回请求ID对应的结果文件路径, 不存在时返回None"""
+        if not _SAFE_ID.match(request_id):
+            return None
+        for mode in MODES:
+            path = self.path(request_id, mode)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def list(self) -> list:
+        entries = []
+        for entry in os.scandir(self.directory):
+            name, suffix = os.path.splitext(entry.name)
+            if suffix in SUFFIXES.values():
+                stat = entry.stat()
+                entries.append({"id": name, "file": entry.name, "bytes": stat.st_size, "created": stat.st_mtime})
+        return sorted(entries, key=lambda item: item["created"], reverse=True)
+
+    def _prune(self):
+        for entry in self.list()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except OSError:
+                pass
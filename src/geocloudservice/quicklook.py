@@ -0,0 +1,101 @@
+import io
+
+from PIL import Image
+from minio.error import S3Error
+
+from src.utils.CacheManager import CacheManager, SimpleCache
+from src.utils.logger import logger
+
+# 快视图尺寸: 名称 -> 长边像素, None 表示原图
+QUICKLOOK_SIZES = {
+    "small": 128,
+    "medium": 512,
+    "large": 1024,
+    "original": None,
+}
+DEFAULT_SIZE = "medium"
+NAMESPACE = "quicklook"
+# 原图无法解码(损坏、不是图片、像素数超出上限)时 PIL 抛出的异常
+IMAGE_ERRORS = (Image.UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError)
+
+
+def make_variant(data: bytes, max_edge: int, quality: int = 85) -> bytes:
+    """将原始快视图缩放到长边不超过 max_edge 的JPEG, 原图更小时只做格式转换
+
+    原图无法解码时抛出 IMAGE_ERRORS 中的异常
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("RGB", (max_edge, max_edge))  # JPEG解码时直接按比例降采样
+        image = image.convert("RGB")
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format="JPEG", quality=quality, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+class QuicklookService:
+    """景快视图服务: 按 (F_DID, NODEID) 从 MinIO 读取快视图并生成固定尺寸的缩略图
+
+    缩略图以 (景, 尺寸, 原图ETag) 为键缓存在有内存上限的 SimpleCache 中, 原图更新后ETag变化即失效;
+    同一缩略图的并发未命中只生成一次。原图经由 ObjectServer 读取, 配置了磁盘缓存时也会落到本地。
+    """
+
+    def __init__(self, object_server, bucket: str, object_template: str,
+                 max_bytes: int = 128 * 1024 * 1024, ttl: int = 24 * 3600, quality: int = 85):
+        """
+        Args:
+            object_server (ObjectServer): 对象读取服务, 提供共享 MinIO 客户端、元数据缓存和磁盘缓存
+            bucket (str): 快视图所在的存储桶
+            object_template (str): 快视图对象名模板, 可使用 {dataId} 和 {nodeId}
+            max_bytes (int): 缩略图缓存的内存预算(字节)
+            ttl (int): 缩略图缓存时间(秒)
+            quality (int): JPEG质量
+        """
+        self.object_server = object_server
+        self.bucket = bucket
+        self.object_template = object_template
+        self.quality = quality
+        self.cache = CacheManager(SimpleCache(max_bytes=max_bytes, ttl=ttl))
+
+    def object_name(self, data_id: str, node_id: str) -> str:
+        return self.object_template.format(dataId=data_id, nodeId=node_id)
+
+    def stat(self, data_id: str, node_id: str):
+        """原始快视图的元数据, 不存在时返回None"""
+        return self.object_server.stat(self.bucket, self.object_name(data_id, node_id))
+
+    def variant(self, data_id: str, node_id: str, size: str, etag: str) -> bytes:
+        """返回指定尺寸的缩略图字节"""
+        return self.cache.getOrCompute(NAMESPACE, lambda: self._render(data_id, node_id, size),
+                                       data_id, node_id, size, etag)
+
+    def _read(self, name: str) -> bytes:
+        server = self.object_server
+        stat = server.stat(self.bucket, name)
+        etag = stat.etag.strip('"') if stat.etag else None
+        if server.disk_cache is not None and etag and server.disk_cache.cacheable(stat.size):
+            path = server.disk_cache.fetch(server.client, self.bucket, name, etag, stat.size)
+            with open(path, "rb") as f:
+                return f.read()
+        response = server.client.get_object(self.bucket, name)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def _render(self, data_id: str, node_id: str, size: str) -> bytes:
+        name = self.object_name(data_id, node_id)
+        try:
+            data = self._read(name)
+        except S3Error as e:
+            self.object_server.invalidate(self.bucket, name)
+            logger.error(f"读取快视图失败: {e}, 对象: {self.bucket}/{name}")
+            return None
+        max_edge = QUICKLOOK_SIZES[size]
+        if max_edge is None:
+            return data
+        return make_variant(data, max_edge, self.quality)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
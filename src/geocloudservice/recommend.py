@@ -2,21 +2,21 @@ from datetime import datetime
 from src.utils.GeoProcessor import GeoProcessor
 from src.utils.GeoDBHandler import GeoDBHandler
 from src.utils.logger import logger
-from concurrent.futures import ThreadPoolExecutor
 from src.utils.Email import send_email
 from src.utils.IdMaker import getPkId
-from src.utils.db.oracle import executeNonQuery, executeQuery
+from src.utils.db.oracle import executeMany, executeNonQuery, executeQuery, tuneCursor
 from src.config.config import satelliteToNodeId, NodeIdToNodeName
 from src.utils.CacheManager import CacheManager
 from math import isnan
 
 import time
 
-def fetchDataFromDB(pool, sql:str ,param=None):
-    """从数据库中获取数据和字段名"""
+def fetchDataFromDB(pool, sql:str ,param=None, arraysize: int = None, prefetchrows: int = None):
+    """从数据库中获取数据和字段名, arraysize/prefetchrows 见 tuneCursor"""
     try:
         with pool.acquire() as conn:
             with conn.cursor() as cur:
+                tuneCursor(cur, arraysize, prefetchrows)
                 cur.execute(sql, param)
                 # 默认最后一个字段名是几何字段，舍弃
                 columns = [desc[0] for desc in cur.description[:-1]]
@@ -39,15 +39,9 @@ def getTargetArea(geodbhandler: GeoDBHandler, wkt: str, areaCode: str, pool):
         return None
 
 def cacheFetchRecommendData(tablename: list, wkt: str, areacode: str , pool, 
-                            cache: CacheManager, guid: str, page: int, pagesize: int = 30 ) ->list:
-    cacheKey = cache.getCacheKey('fetchRecommendData', guid)
-    cacheData = cache.getData(cacheKey)
-    
-    if cacheData is not None:
-        geoData, coverageRatio = cacheData
-    else:
-        geoData, coverageRatio = fetchRecommendData(tablename, wkt, areacode, pool)
-        cache.setData(cacheKey, (geoData, coverageRatio))
+                            cache: CacheManager, guid: str, page: int, pagesize: int = 30, tileCache=None) ->list:
+    geoData, coverageRatio = cache.getOrCompute(
+        'fetchRecommendData', lambda: fetchRecommendData(tablename, wkt, areacode, pool, tileCache), guid)
       
     geoprocessor = GeoProcessor()
     geoDataDict = geoprocessor.GeoDataFrameToDict(geoData)
@@ -59,7 +53,21 @@ def cacheFetchRecommendData(tablename: list, wkt: str, areacode: str , pool,
     return paginatedData, coverageRatio
     
     
-def fetchRecommendData(tablename: list, wkt: str, areacode: str , pool):
+def generateRecommendQuery(tablename: list) -> str:
+    """一键推荐的候选影像查询: 完全落在目标外接矩形内、云量不超过20的最新 :limit_num 景"""
+    dataname = ["F_DATANAME", "F_DID", "F_SCENEROW", "F_LOCATION", "F_PRODUCTID", "F_PRODUCTLEVEL",
+                "F_CLOUDPERCENT", "F_TABLENAME", "F_DATATYPENAME", "F_ORBITID", "F_PRODUCETIME",
+                "F_SENSORID", "F_DATASIZE", "F_RECEIVETIME", "F_DATAID", "F_SATELLITEID", "F_SCENEPATH",
+                "F_SPATIAL_INFO"]
+    whereSql = "WHERE F_TOPLEFTLATITUDE <= :maxlat AND F_TOPLEFTLONGITUDE >= :minlon \
+        AND F_BOTTOMRIGHTLATITUDE >= :minlat AND F_BOTTOMRIGHTLONGITUDE <= :maxlon \
+            AND F_CLOUDPERCENT <= 20"
+    selectSql = generateSqlQuery(dataname, tablename, whereSql)
+    ordersql = ' ORDER BY "F_RECEIVETIME" DESC FETCH FIRST :limit_num ROWS ONLY'
+    return f'{selectSql} {ordersql}'
+
+
+def fetchRecommendData(tablename: list, wkt: str, areacode: str , pool, tileCache=None):
     """一键推荐功能具体实现
 
     Args:
@@ -67,6 +75,7 @@ def fetchRecommendData(tablename: list, wkt: str, areacode: str , pool):
         wkt (str): 检索区域的wkt
         areacode (str): 检索区域的行政区划代码
         pool (_type_): 数据库连接池
+        tileCache (CandidateTileCache): 候选影像瓦片缓存, 为None或候选不足时直接查询数据库
         areacode和wkt能且只能有一个不为空
 
     Returns:
@@ -77,24 +86,21 @@ def fetchRecommendData(tablename: list, wkt: str, areacode: str , pool):
     if wkt is None and areacode is None:
         logger.error('wkt和areacode不能同时为空')
         return None
-    dataname = ["F_DATANAME", "F_DID", "F_SCENEROW", "F_LOCATION", "F_PRODUCTID", "F_PRODUCTLEVEL",
-                "F_CLOUDPERCENT", "F_TABLENAME", "F_DATATYPENAME", "F_ORBITID", "F_PRODUCETIME",
-                "F_SENSORID", "F_DATASIZE", "F_RECEIVETIME", "F_DATAID", "F_SATELLITEID", "F_SCENEPATH",
-                "F_SPATIAL_INFO"]
-    whereSql = "WHERE F_TOPLEFTLATITUDE <= :maxlat AND F_TOPLEFTLONGITUDE >= :minlon \
-        AND F_BOTTOMRIGHTLATITUDE >= :minlat AND F_BOTTOMRIGHTLONGITUDE <= :maxlon \
-            AND F_CLOUDPERCENT <= 20"
-    selectSql = generateSqlQuery(dataname, tablename, whereSql)
-    ordersql = ' ORDER BY "F_RECEIVETIME" DESC FETCH FIRST :limit_num ROWS ONLY'
-    sql = f'{selectSql} {ordersql}'
+    sql = generateRecommendQuery(tablename)
     geodbhandler = GeoDBHandler()
     geoprocessor = GeoProcessor()
     target_area = getTargetArea(geodbhandler, wkt, areacode, pool)
     (minlon, maxlon, minlat, maxlat) = geoprocessor.getCoordinateRange(target_area)
     coverage_ratio = 0
     n = 1
-    data, columns = fetchDataFromDB(pool, sql, {'limit_num': 8000, 'minlon': minlon, 'maxlon': maxlon, 'minlat': minlat, 'maxlat': maxlat})
-    data_gdf = geodbhandler.imageDataToGeoDataFrame(data, columns)
+    data_gdf = None
+    if tileCache is not None:
+        data_gdf = tileCache.recommendCandidates(tablename, target_area, limit=8000, maxCloud=20)
+    if data_gdf is None:
+        # 候选结果较大且含几何字段, 加大每次往返的行数
+        data, columns = fetchDataFromDB(pool, sql, {'limit_num': 8000, 'minlon': minlon, 'maxlon': maxlon, 'minlat': minlat, 'maxlat': maxlat},
+                                        arraysize=2000, prefetchrows=2000)
+        data_gdf = geodbhandler.imageDataToGeoDataFrame(data, columns)
     try:
         while coverage_ratio < 0.9 and n < 9:
             limit_num = 1000 * n
@@ -106,31 +112,20 @@ def fetchRecommendData(tablename: list, wkt: str, areacode: str , pool):
         logger.error(f'推荐数据失败: {e}')
         return None
 
-def cacheFeachRecomCoverData(tablename: list, wkt: str, areacode: str , cache: CacheManager, guid: str, pool) ->dict:
-    cacheKey = cache.getCacheKey('fetchRecommendData', guid)
-    cacheData = cache.getData(cacheKey)
-    if cacheData is not None:
-        geoData, _ = cacheData
-    else:
-        geoData, coverageRatio = fetchRecommendData(tablename, wkt, areacode, pool)
-        cache.setData(cacheKey, (geoData, coverageRatio))
+def cacheFeachRecomCoverData(tablename: list, wkt: str, areacode: str , cache: CacheManager, guid: str, pool, tileCache=None) ->dict:
+    geoData, _ = cache.getOrCompute(
+        'fetchRecommendData', lambda: fetchRecommendData(tablename, wkt, areacode, pool, tileCache), guid)
     
     sizenum = len(geoData)
     geoprocessor = GeoProcessor()
     combine_wkt, total_area = geoprocessor.calculateMergedArea(geoData)
     return sizenum, combine_wkt, total_area, 1
 
-def cacheFeachSearchData(tablename: list, wkt: str, areacode: str, startTime: str, endTime: str, cloudPercent: str, cache: CacheManager, guid: str, pool) ->list:
-    cacheKey = cache.getCacheKey('searchData', guid)
-    cacheData = cache.getData(cacheKey)
-    if cacheData is not None:
-        return cacheData
-    else:
-        geoData = searchData(tablename, wkt, areacode, startTime, endTime, cloudPercent, pool)
-        cache.setData(cacheKey, geoData)
-        return geoData
+def cacheFeachSearchData(tablename: list, wkt: str, areacode: str, startTime: str, endTime: str, cloudPercent: str, cache: CacheManager, guid: str, pool, tileCache=None) ->list:
+    return cache.getOrCompute(
+        'searchData', lambda: searchData(tablename, wkt, areacode, startTime, endTime, cloudPercent, pool, tileCache), guid)
     
-def searchData(tablename: list, wkt :str, areacode : str, startTime: str, endTime: str, cloudPercent: str, pool) ->list:
+def searchData(tablename: list, wkt :str, areacode : str, startTime: str, endTime: str, cloudPercent: str, pool, tileCache=None) ->list:
     """检索功能具体实现
 
     Args:
@@ -140,6 +135,7 @@ def searchData(tablename: list, wkt :str, areacode : str, startTime: str, endTim
         startTime (str): 影像数据开始时间
         endTime (str): 影像数据结束时间
         cloudPercent (str): 云量
+        tileCache (CandidateTileCache): 候选影像瓦片缓存, 为None时直接查询数据库
 
     Returns:
         list: 字典列表, 每一条字典代表一条数据
@@ -159,8 +155,11 @@ def searchData(tablename: list, wkt :str, areacode : str, startTime: str, endTim
         geodbhandler = GeoDBHandler()
         target_area = getTargetArea(geodbhandler, wkt, areacode, pool)
         geoprocessor = GeoProcessor()
-        ImageInfo, columns = fetchDataFromDB(pool, sql, {'startTime': startTime, 'endTime': endTime, 'cloudPercent': cloudPercent})
-        ImageGdf = geodbhandler.imageDataToGeoDataFrame(ImageInfo, columns)
+        if tileCache is not None:
+            ImageGdf = tileCache.searchCandidates(tablename, target_area, startTime, endTime, cloudPercent)
+        else:
+            ImageInfo, columns = fetchDataFromDB(pool, sql, {'startTime': startTime, 'endTime': endTime, 'cloudPercent': cloudPercent})
+            ImageGdf = geodbhandler.imageDataToGeoDataFrame(ImageInfo, columns)
         intersected_data = geoprocessor.findIntersectedData(target_area, ImageGdf)
         result = geoprocessor.GeoDataFrameToDict(intersected_data)
         formatted_result = formatDictForView(result)
@@ -216,7 +215,7 @@ def sendEmailToUser(userid: str, startTime: str, endTime: str, pool):
     def getUserEmail(userid: str):
         """获取用户的邮箱地址"""
         sql = "SELECT F_EMAIL FROM TC_SYS_USER WHERE F_ID = :F_ID"
-        emailAddr, _ = fetchDataFromDB(pool, sql, {'F_ID': userid})
+        emailAddr, _ = fetchDataFromDB(pool, sql, {'F_ID': userid}, prefetchrows=2)
         return emailAddr[0][0]
     subject = "地质云卫星数据服务-数据订阅"
     message = f"您好，您订阅的 {startTime} - {endTime} 期间的数据已经上线【中国地质调查局自然资源航空物探遥感中心】"
@@ -275,6 +274,16 @@ def ProcessDueSubscriptions(pool):
         logger.error(f'处理过期订阅失败: {e}')
         return None
 
+def buildRows(dataInfos: list, toRow, message: str) -> list:
+    """将查询结果转换为插入参数, 转换失败的数据记录日志后跳过"""
+    rows = []
+    for dataInfo in dataInfos:
+        try:
+            rows.append(toRow(dataInfo))
+        except Exception as e:
+            logger.error('{}: {}, 错误数据: {}'.format(message, e, dataInfo))
+    return rows
+
 def addDataToSubData(dataInfos: list, subid: str, pool):
     """将数据添加到订阅数据表"""
     sql = "INSERT INTO SUBSCRIBE_ORDERDATA ( \
@@ -295,41 +304,37 @@ def addDataToSubData(dataInfos: list, subid: str, pool):
                 :F_SGTABLENAME, :F_DID, :F_ORBITID, :F_SCENEPATH, \
                 :F_SCENEROW) "
                 
-    def addSingleDataToSubData(dataInfo, subid):
-        try:
-            params = {}
-            params['F_ID'] = getPkId()
-            params['F_ORDERID'] = subid
-            params['F_DATANAME'] = dataInfo['F_DATANAME']
-            params['F_SATELITE'] = dataInfo['F_SATELLITEID']
-            params['F_SENSOR'] = dataInfo['F_SENSORID']
-            params['F_RECEIVETIME'] = dataInfo['F_RECEIVETIME']
-            params['F_DATASIZE'] = float(dataInfo['F_DATASIZE'])
-            params['F_DATASOURCE'] = None
-            params['F_STATUS'] = None
-            params['F_DATAPATH'] = None
-            params['F_DATATYPE'] = 0
-            params['F_NODEID'] = dataInfo['NODEID']
-            params['F_DATAID'] = dataInfo['F_DATAID']
-            params['F_DOCNUM'] = None
-            params['F_TM'] = None
-            params['F_PRODUCTLEVEL'] = dataInfo['F_PRODUCTLEVEL']
-            params['F_WKTRESPONSE'] = dataInfo['WKTRESPONSE']
-            params['F_NODENAME'] = NodeIdToNodeName[dataInfo['NODEID']]
-            params['F_DOCNUM_OLD'] = None
-            params['F_CLOUDPERCENT'] = float(dataInfo['F_CLOUDPERCENT'])
-            params['F_SGTABLENAME'] = dataInfo['F_TABLENAME']
-            params['F_DID'] = int(dataInfo['F_DID'])
-            params['F_ORBITID'] = None if dataInfo['F_ORBITID'] == 'None' else int(dataInfo['F_ORBITID'])
-            params['F_SCENEPATH'] = dataInfo['F_SCENEPATH']
-            params['F_SCENEROW'] = dataInfo['F_SCENEROW']
-            executeNonQuery(pool, sql, params)
-        except Exception as e:
-            logger.error('添加数据到订购数据失败: {}, 错误数据: {}, subid: {}'.format(e, dataInfo, subid))
-            raise e
-    
-    executor = ThreadPoolExecutor()
-    executor.map(addSingleDataToSubData, dataInfos, [subid]*len(dataInfos))     
+    def toRow(dataInfo):
+        return {
+            'F_ID': getPkId(),
+            'F_ORDERID': subid,
+            'F_DATANAME': dataInfo['F_DATANAME'],
+            'F_SATELITE': dataInfo['F_SATELLITEID'],
+            'F_SENSOR': dataInfo['F_SENSORID'],
+            'F_RECEIVETIME': dataInfo['F_RECEIVETIME'],
+            'F_DATASIZE': float(dataInfo['F_DATASIZE']),
+            'F_DATASOURCE': None,
+            'F_STATUS': None,
+            'F_DATAPATH': None,
+            'F_DATATYPE': 0,
+            'F_NODEID': dataInfo['NODEID'],
+            'F_DATAID': dataInfo['F_DATAID'],
+            'F_DOCNUM': None,
+            'F_TM': None,
+            'F_PRODUCTLEVEL': dataInfo['F_PRODUCTLEVEL'],
+            'F_WKTRESPONSE': dataInfo['WKTRESPONSE'],
+            'F_NODENAME': NodeIdToNodeName[dataInfo['NODEID']],
+            'F_DOCNUM_OLD': None,
+            'F_CLOUDPERCENT': float(dataInfo['F_CLOUDPERCENT']),
+            'F_SGTABLENAME': dataInfo['F_TABLENAME'],
+            'F_DID': int(dataInfo['F_DID']),
+            'F_ORBITID': None if dataInfo['F_ORBITID'] == 'None' else int(dataInfo['F_ORBITID']),
+            'F_SCENEPATH': dataInfo['F_SCENEPATH'],
+            'F_SCENEROW': dataInfo['F_SCENEROW'],
+        }
+
+    rows = buildRows(dataInfos, toRow, f'添加数据到订购数据失败, subid: {subid}')
+    return executeMany(pool, sql, rows, label=f'订阅 {subid} 数据')
 
 def addDataToShop(dataInfos: list, userid, pool):
     """将数据添加到购物车"""
@@ -351,45 +356,44 @@ def addDataToShop(dataInfos: list, userid, pool):
             :F_LOCATION, :F_SGTABLENAME, :F_DID, :F_ORBITID, :F_SCENEPATH, \
             :F_SCENEROW, :F_SYSTEMTYPE) "
 
-    def addSingleDataToShop(dataInfo, userid):
-        try:
-            params = {}
-            params['F_ID'] = getPkId()
-            params['F_USERID'] = int(userid)
-            params['F_DATANAME'] = dataInfo['F_DATANAME']
-            params['F_SATELITE'] = dataInfo['F_SATELLITEID']
-            params['F_SENSOR'] = dataInfo['F_SENSORID']
-            params['F_RECEIVETIME'] = dataInfo['F_RECEIVETIME']
-            params['F_DATASIZE'] = float(dataInfo['F_DATASIZE'])
-            params['F_FAVORITETIME'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            params['F_DATASOURCE'] = None
-            params['F_DATAPATH'] = None
-            params['F_DATATYPE'] = 0
-            params['F_NODEID'] = dataInfo['NODEID']
-            params['F_DATAID'] = dataInfo['F_DATAID']
-            params['F_DOCNUM'] = None
-            params['F_TM'] = None
-            params['F_DATATYPENAME'] = dataInfo['F_DATATYPENAME']
-            params['F_PRODUCTLEVEL'] = dataInfo['F_PRODUCTLEVEL']
-            params['F_IMAGEURL'] = '/mj/metaImage/getImageByTypeForAll?typeId=2&dataId={}&nodeId={}'.format(dataInfo['F_DID'],dataInfo['NODEID'])
-            params['F_WKTRESPONSE'] = dataInfo['WKTRESPONSE']
-            params['F_NODENAME'] = NodeIdToNodeName[dataInfo['NODEID']]
-            params['F_DOCNUM_OLD'] = None
-            params['F_CLOUDPERCENT'] = float(dataInfo['F_CLOUDPERCENT'])
-            params['F_LOCATION'] = dataInfo['F_LOCATION']
-            params['F_SGTABLENAME'] = dataInfo['F_TABLENAME']
-            params['F_DID'] = int(dataInfo['F_DID'])
-            params['F_ORBITID'] = None if dataInfo['F_ORBITID'] == 'None' else int(dataInfo['F_ORBITID'])
-            params['F_SCENEPATH'] = dataInfo['F_SCENEPATH']
-            params['F_SCENEROW'] = dataInfo['F_SCENEROW']
-            params['F_SYSTEMTYPE'] = None
-            executeNonQuery(pool, sql, params)
-        except Exception as e:
-            logger.error('添加数据到购物车失败: {}, 错误数据: {}, userid: {}'.format(e, dataInfo, userid))
-    
-    executor = ThreadPoolExecutor()
-    executor.map(addSingleDataToShop, dataInfos, [userid]*len(dataInfos))       
-       
+    favorite_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def toRow(dataInfo):
+        return {
+            'F_ID': getPkId(),
+            'F_USERID': int(userid),
+            'F_DATANAME': dataInfo['F_DATANAME'],
+            'F_SATELITE': dataInfo['F_SATELLITEID'],
+            'F_SENSOR': dataInfo['F_SENSORID'],
+            'F_RECEIVETIME': dataInfo['F_RECEIVETIME'],
+            'F_DATASIZE': float(dataInfo['F_DATASIZE']),
+            'F_FAVORITETIME': favorite_time,
+            'F_DATASOURCE': None,
+            'F_DATAPATH': None,
+            'F_DATATYPE': 0,
+            'F_NODEID': dataInfo['NODEID'],
+            'F_DATAID': dataInfo['F_DATAID'],
+            'F_DOCNUM': None,
+            'F_TM': None,
+            'F_DATATYPENAME': dataInfo['F_DATATYPENAME'],
+            'F_PRODUCTLEVEL': dataInfo['F_PRODUCTLEVEL'],
+            'F_IMAGEURL': '/mj/metaImage/getImageByTypeForAll?typeId=2&dataId={}&nodeId={}'.format(dataInfo['F_DID'],dataInfo['NODEID']),
+            'F_WKTRESPONSE': dataInfo['WKTRESPONSE'],
+            'F_NODENAME': NodeIdToNodeName[dataInfo['NODEID']],
+            'F_DOCNUM_OLD': None,
+            'F_CLOUDPERCENT': float(dataInfo['F_CLOUDPERCENT']),
+            'F_LOCATION': dataInfo['F_LOCATION'],
+            'F_SGTABLENAME': dataInfo['F_TABLENAME'],
+            'F_DID': int(dataInfo['F_DID']),
+            'F_ORBITID': None if dataInfo['F_ORBITID'] == 'None' else int(dataInfo['F_ORBITID']),
+            'F_SCENEPATH': dataInfo['F_SCENEPATH'],
+            'F_SCENEROW': dataInfo['F_SCENEROW'],
+            'F_SYSTEMTYPE': None,
+        }
+
+    rows = buildRows(dataInfos, toRow, f'添加数据到购物车失败, userid: {userid}')
+    return executeMany(pool, sql, rows, label=f'用户 {userid} 购物车')
+
 def getShapelyAreaByCode(areacode: str, pool): 
     """根据传入的行政区划代码获取行政区划的几何形状
 
@@ -402,7 +406,7 @@ def getShapelyAreaByCode(areacode: str, pool):
     """
     try:   
         sql = 'SELECT SDO_GEOMETRY.get_wkt(GEOM) FROM TC_DISTRICT WHERE F_DISTCODE = :areacode'
-        res = executeQuery(pool, sql, {'areacode': areacode})[0][0]
+        res = executeQuery(pool, sql, {'areacode': areacode}, prefetchrows=2)[0][0]
         geodbhandler = GeoDBHandler()
         return geodbhandler.sdoGeometryWktToShapely(res)
     except Exception as e:
@@ -436,9 +440,10 @@ def formatDictForView(dictList: list):
             newDict['NODENAME'] = NodeIdToNodeName[newDict['NODEID']]
             fcloudpercent = float(newDict['F_CLOUDPERCENT'])
             newDict['F_CLOUDPERCENT'] = int(fcloudpercent) if not isnan(fcloudpercent) else 0
+            return newDict
         res = list(map(processData, dictList, range(len(dictList))))
         endTime = time.time()
-        print(f'格式化字典列表耗时: {endTime - startTime}秒')
+        logger.debug(f'格式化字典列表耗时: {endTime - startTime}秒')
         return res
     except Exception as e:
         logger.error(f'格式化字典列表失败: {e}')
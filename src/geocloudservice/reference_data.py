@@ -0,0 +1,49 @@
+from src.geocloudservice.conditional import version_stamp, utcnow
+from src.geocloudservice.satellite_catalog import SatelliteCatalog
+
+# 操作指导视频: 标题 -> 链接
+VIDEO_RESOURCES = {
+    "地质云遥感数据平台操作说明": "https://geogf.agrs.cn/satellite.pic/%E7%B3%BB%E7%BB%9F%E6%93%8D%E4%BD%9C%E6%BC%94%E7%A4%BA%E8%A7%86%E9%A2%91.mp4"
+}
+
+# 操作指导视频: 标题 -> satellite.pic 存储桶中的对象名
+VIDEO_BUCKET = "satellite.pic"
+VIDEO_OBJECTS = {
+    "地质云遥感数据平台操作说明": "系统操作演示视频.mp4"
+}
+
+
+class ReferenceData:
+    """很少变化的参考数据: 卫星目录与操作指导视频, 常驻内存并维护版本号
+
+    接口以版本号作为强ETag, 客户端缓存有效时直接返回304。
+    """
+
+    def __init__(self, check_interval: int = 300):
+        """
+        Args:
+            check_interval (int): 检查卫星介绍表是否变化的间隔(秒)
+        """
+        self.catalog = SatelliteCatalog(check_interval)
+        self.videos_version = version_stamp(VIDEO_RESOURCES)
+        self.videos_modified = utcnow()
+
+    def refresh(self, pool) -> bool:
+        """按间隔检查卫星目录是否变化; 返回是否已有可用数据"""
+        return self.catalog.refresh(pool)
+
+    @property
+    def satellites(self) -> list:
+        return self.catalog.satellites
+
+    @property
+    def details(self) -> dict:
+        return self.catalog.by_name
+
+    @property
+    def version(self) -> str:
+        return self.catalog.version
+
+    @property
+    def modified(self):
+        return self.catalog.modified
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from src.geocloudservice.conditional import version_stamp, utcnow
+from src.utils.db.oracle import executeQuery
+from src.utils.logger import logger
+
+SATELLITE_SQL = "SELECT id, satellites_name, image_url, description FROM satellitesinfo ORDER BY id"
+# 行数与最大ORA_ROWSCN任一变化即认为卫星介绍表已更新
+SATELLITE_VERSION_SQL = "SELECT COUNT(*), MAX(ORA_ROWSCN) FROM satellitesinfo"
+
+
+def read_lob(value):
+    """CLOB在连接归还前读出为字符串"""
+    if value is not None and hasattr(value, "read"):
+        return value.read()
+    return value
+
+
+def fetch_satellites(pool) -> list:
+    """读取全部卫星介绍, description 在同一连接内读出, 查询失败时返回None"""
+    try:
+        with pool.acquire() as conn:
+            with conn.cursor() as cur:
+                cur.execute(SATELLITE_SQL)
+                return [(row[0], row[1], row[2], read_lob(row[3])) for row in cur]
+    except Exception as e:
+        logger.error(f'查询卫星介绍失败: {e}')
+        return None
+
+
+class CatalogVersion:
+    """某一版本的卫星目录, 构建后不再修改; 刷新时构建新对象整体替换, 读取方拿到的索引与版本号始终一致"""
+
+    def __init__(self, details: list, table_version):
+        self.by_name = {item['name']: item for item in details}
+        self.by_id = {item['id']: item for item in details}
+        self.satellites = [{'id': item['id'], 'name': item['name']} for item in details]
+        self.table_version = table_version
+        self.version = version_stamp(table_version, details)
+        self.modified = utcnow()
+        self._list_body = None
+
+    def list_body(self, serialize) -> bytes:
+        """卫星列表的响应体字节, 只调用一次 serialize"""
+        if self._list_body is None:
+            self._list_body = serialize(self.satellites)
+        return self._list_body
+
+
+class SatelliteCatalog:
+    """常驻内存的卫星目录, 按卫星名和id索引
+
+    每隔 check_interval 秒检查一次 satellitesinfo 的版本, 变化时整体重新加载,
+    CLOB只在加载时读取一次。卫星列表的响应体按版本序列化一次后复用。
+    """
+
+    def __init__(self, check_interval: int = 300):
+        """
+        Args:
+            check_interval (int): 检查卫星介绍表是否变化的间隔(秒)
+        """
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0
+        # 当前版本的目录, 同一请求内应只读取一次
+        self.current = None
+
+    def refresh(self, pool) -> bool:
+        """按间隔检查版本, 变化时重新加载; 返回是否已有可用数据"""
+        if self.current is not None and time.time() - self._checked < self.check_interval:
+            return True
+        with self._lock:
+            if self.current is not None and time.time() - self._checked < self.check_interval:
+                return True
+            version = executeQuery(pool, SATELLITE_VERSION_SQL, prefetchrows=2)
+            version = tuple(version[0]) if version else None
+            if self.current is None or version != self.current.table_version:
+                rows = fetch_satellites(pool)
+                if rows is None:
+                    return self.current is not None
+                details = [
+                    {
+                        'id': row[0],
+                        'name': row[1],
+                        'imageUrl': row[2],
+                        'description': str(row[3]) if row[3] else None
+                    }
+                    for row in rows
+                ]
+                # 构建完成后一次赋值替换, 读取方无需加锁
+                self.current = CatalogVersion(details, version)
+                logger.info(f'卫星目录已加载: {len(details)} 颗卫星, 版本 {self.current.version}')
+            self._checked = time.time()
+            return True
+
+    @property
+    def satellites(self) -> list:
+        return self.current.satellites if self.current else None
+
+    @property
+    def by_name(self) -> dict:
+        return self.current.by_name if self.current else None
+
+    @property
+    def by_id(self) -> dict:
+        return self.current.by_id if self.current else None
+
+    @property
+    def version(self) -> str:
+        return self.current.version if self.current else None
+
+    @property
+    def modified(self):
+        return self.current.modified if self.current else None
+
+    def list_body(self, serialize) -> bytes:
+        """当前版本卫星列表的响应体字节, 同一版本只调用一次 serialize"""
+        return self.current.list_body(serialize)
@@ -1,10 +1,171 @@
-from waitress import serve
+"""Web 服务入口
+
+默认使用 waitress 单进程多线程运行; workers 大于1时预先 fork 出多个工作进程, 各自创建监听同一端口的
+SO_REUSEPORT 套接字(由内核分配连接)、应用和数据库连接池, CPU 密集的推荐计算不再共用一个 GIL。
+主进程只负责监督: 工作进程异常退出时重新启动, 收到 SIGTERM/SIGINT 时停止所有工作进程;
+工作进程收到 SIGTERM 后不再接受新请求, 处理完正在执行的请求、写出排队的日志后退出。
+
+多进程时进程内的结果缓存、连接池统计等各自独立; 需要跨进程共享的缓存使用 SHARED_CACHE_DIR,
+订单汇总使用 ORDER_ROLLUP_DB, 只由0号工作进程刷新。连接池上限 DB_POOL_MAX 按进程数分摊, 总连接数不变。
+"""
+import math
+import os
+import signal
+import socket
+import time
+
+from waitress import create_server
 from src.geocloudservice.apis import gen_app
 from src.geocloudservice.blueprints.recommend_query_bp import rz_app
+from src.utils.logger import logger, stop_listener
+import src.config.config as config
+
+# 工作进程异常退出后重新启动前的等待时间(秒), 避免启动即失败时反复 fork
+RESTART_DELAY = 1.0
+
+
+def options_from_config() -> dict:
+    return {
+        'host': getattr(config, 'web_api_host', '0.0.0.0'),
+        'port': getattr(config, 'web_api_port', 12345),
+        'threads': getattr(config, 'WEB_THREADS', 8),
+        'connection_limit': getattr(config, 'WEB_CONNECTION_LIMIT', 100),
+        'channel_timeout': getattr(config, 'WEB_CHANNEL_TIMEOUT', 120),
+        'backlog': getattr(config, 'WEB_BACKLOG', 1024),
+        'workers': getattr(config, 'WEB_WORKERS', 1),
+        'dev': False,
+    }
+
+
+def pool_size(workers: int) -> tuple:
+    """每个工作进程的连接池 (min, max): DB_POOL_MAX 按进程数分摊, 可用 WEB_WORKER_POOL_MAX 直接指定"""
+    pool_max = getattr(config, 'WEB_WORKER_POOL_MAX', None) or max(1, math.ceil(config.DB_POOL_MAX / workers))
+    return min(config.DB_POOL_MIN, pool_max), pool_max
+
+
+def waitress_options(options: dict) -> dict:
+    return {
+        'threads': options['threads'],
+        'connection_limit': options['connection_limit'],
+        'channel_timeout': options['channel_timeout'],
+        'backlog': options['backlog'],
+        'ident': 'geocloud',
+    }
+
+
+def reuseport_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def run_server(app, **kwargs):
+    """运行 waitress 直到收到 SIGTERM/SIGINT
+
+    信号处理函数抛出 SystemExit 结束事件循环, waitress 随后等待工作线程处理完正在执行的请求(最长5秒),
+    最后关闭监听套接字。
+    """
+    server = create_server(app, **kwargs)
+
+    def stop(signum, frame):
+        # 只处理第一个信号(Ctrl-C 时主进程还会转发 SIGTERM), 避免打断等待中的 shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        logger.info(f"进程 {os.getpid()} 收到信号 {signum}, 停止接受新请求")
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        server.run()
+    finally:
+        server.close()
+
+
+def run_worker(index: int, options: dict):
+    """工作进程: 创建自己的应用和连接池, 在 SO_REUSEPORT 套接字上运行 waitress"""
+    pool_min, pool_max = pool_size(options['workers'])
+    sock = reuseport_socket(options['host'], options['port'])
+    app = gen_app(pool_min, pool_max, rollup_refresh=index == 0)
+    logger.info(f"工作进程 {index} (pid {os.getpid()}) 启动, 线程数 {options['threads']}, "
+                f"连接池 {pool_min}~{pool_max}")
+    run_server(app, sockets=[sock], **waitress_options(options))
+
+
+def run_workers(options: dict):
+    """主进程: fork 出工作进程并监督, 返回时所有工作进程已退出"""
+    children = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            # 应用创建完成前直接按默认方式退出, 之后由 run_server 处理
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(index, options)
+                logger.info(f"工作进程 {index} (pid {os.getpid()}) 已停止")
+            except BaseException as e:
+                logger.error(f"工作进程 {index} (pid {os.getpid()}) 出错退出: {e}")
+                code = 1
+            finally:
+                # os._exit 不执行 atexit, 先写出排队的日志
+                try:
+                    stop_listener()
+                finally:
+                    os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
 
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"主进程 (pid {os.getpid()}) 启动 {options['workers']} 个工作进程, "
+                f"监听 {options['host']}:{options['port']}")
+    for index in range(options['workers']):
+        spawn(index)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logger.error(f"工作进程 {index} (pid {pid}) 退出, 状态 {status}, {RESTART_DELAY}s 后重新启动")
+        time.sleep(RESTART_DELAY)
+        if not stopping:
+            spawn(index)
+    logger.info("所有工作进程已退出")
 
-def main():
-    app = gen_app()
-    app.run("0.0.0.0", 12345)
 
+def main(overrides: dict = None):
+    """启动Web服务
 
+    Args:
+        overrides (dict): 覆盖配置的启动参数(命令行), 值为None的项使用配置
+    """
+    options = options_from_config()
+    options.update({key: value for key, value in (overrides or {}).items() if key in options and value is not None})
+    if options['dev']:
+        gen_app().run(options['host'], options['port'])
+        return
+    if options['workers'] > 1 and not (hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')):
+        logger.error("当前系统不支持 fork/SO_REUSEPORT, 以单进程运行")
+        options['workers'] = 1
+    if options['workers'] > 1:
+        run_workers(options)
+        return
+    logger.info(f"以单进程运行, 监听 {options['host']}:{options['port']}, 线程数 {options['threads']}")
+    run_server(gen_app(), host=options['host'], port=options['port'], **waitress_options(options))
@@ -1,69 +1,298 @@
 from cachetools import TTLCache
 import threading
 import hashlib
+import sys
+import time
 
+from src.utils.logger import logger
 
-class ReadWriteLock:
-    def __init__(self):
-        self._lock = threading.Lock()
-        self._read_ready = threading.Condition(self._lock)
-        self._readers = 0
+# 单个shapely几何对象除坐标外的固定开销(字节), 坐标按每个点16字节计
+GEOMETRY_OVERHEAD = 112
+# 列表/元组元素过多时只抽样估算
+SIZE_SAMPLE_COUNT = 100
 
-    def acquire_read(self):
-        with self._lock:
-            self._readers += 1
-            self._read_ready.notify()
 
-    def release_read(self):
-        with self._lock:
-            self._readers -= 1
-            self._read_ready.notify()
+def estimateSize(value) -> int:
+    """估算缓存对象占用的内存字节数
 
-    def acquire_write(self):
-        with self._lock:
-            while self._readers > 0:
-                self._read_ready.wait()
+    GeoDataFrame按 memory_usage(deep=True) 加上几何坐标的大小计算,
+    列表、元组、字典递归累加, 其余对象使用 sys.getsizeof。
 
-    def release_write(self):
-        with self._lock:
-            self._read_ready.notify()
+    Args:
+        value: 需要缓存的对象
 
-class SimpleCache:
-    def __init__(self, maxsize: int = 128, ttl: int = 300):
-        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
-        self.rw_lock = ReadWriteLock()  # 使用读写锁（如上定义）
+    Returns:
+        int: 估算的字节数
+    """
+    if value is None:
+        return 0
+    # GeoDataFrame / DataFrame, 用鸭子类型判断避免引入geopandas依赖
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):
+        size = int(value.memory_usage(deep=True, index=True).sum())
+        if 'geometry' in value.columns:
+            import shapely
+            geoms = value['geometry'].values
+            coords = shapely.get_num_coordinates(geoms).sum()
+            size += int(coords) * 16 + len(geoms) * GEOMETRY_OVERHEAD
+        return size
+    if isinstance(value, (list, tuple)):
+        size = sys.getsizeof(value)
+        count = len(value)
+        if count <= SIZE_SAMPLE_COUNT:
+            return size + sum(estimateSize(item) for item in value)
+        sample = value[:SIZE_SAMPLE_COUNT]
+        return size + sum(estimateSize(item) for item in sample) * count // SIZE_SAMPLE_COUNT
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimateSize(k) + estimateSize(v) for k, v in value.items())
+    return sys.getsizeof(value)
 
-    def set(self, key: str, value: any):
-        self.rw_lock.acquire_write()
-        try:
-            self.cache[key] = value
-        finally:
-            self.rw_lock.release_write()
 
-    def get(self, key: str):
-        self.rw_lock.acquire_read()
-        try:
-            return self.cache.get(key)
-        finally:
-            self.rw_lock.release_read()
+class _MeteredTTLCache(TTLCache):
+    """记录淘汰、过期次数及条目写入时间的TTLCache"""
+    def __init__(self, maxsize, ttl, getsizeof=None):
+        super().__init__(maxsize=maxsize, ttl=ttl, getsizeof=getsizeof)
+        self.evictions = 0
+        self.expirations = 0
+        self.born = {}
+        self._clearing = False
 
-    def delete(self, key: str):
-        self.rw_lock.acquire_write()
-        try:
-            self.cache.pop(key, None)
-        finally:
-            self.rw_lock.release_write()
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.born[key] = time.time()
+
+    def popitem(self):
+        # 容量不足时由Cache调用, 即按LRU淘汰; clear() 期间的调用不计为淘汰
+        key, value = super().popitem()
+        if not self._clearing:
+            self.evictions += 1
+        self.born.pop(key, None)
+        return key, value
 
     def clear(self):
-        self.rw_lock.acquire_write()
+        # 部分 cachetools 版本的 clear() 经由 popitem 逐个删除条目
+        self._clearing = True
         try:
-            self.cache.clear()
+            super().clear()
         finally:
-            self.rw_lock.release_write()
+            self._clearing = False
+        self.born.clear()
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        for key, _ in expired:
+            self.born.pop(key, None)
+        return expired
+
+    def ages(self, now: float) -> list:
+        """当前所有条目的存活时长(秒), 同时清理已删除条目的写入时间"""
+        for key in [k for k in self.born if k not in self]:
+            del self.born[key]
+        return [now - born for born in self.born.values()]
+
+
+class _Shard:
+    """缓存分片: 一个TTLCache及保护它的互斥锁
+
+    TTLCache 的读操作也会修改内部状态(LRU顺序、过期清理), 因此分片内读写都必须互斥;
+    并发度来自把键按哈希分散到多个分片上。
+    """
+    __slots__ = ('lock', 'cache', 'pending_size')
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.lock = threading.Lock()
+        self.cache = _MeteredTTLCache(maxsize=maxsize, ttl=ttl, getsizeof=self._getsizeof)
+        self.pending_size = 0
+
+    def _getsizeof(self, value) -> int:
+        # 条目大小在加锁前由 SimpleCache.set 预先估算好
+        return self.pending_size
+
+
+class SimpleCache:
+    """按命名空间划分内存预算、按键哈希分片加锁的TTL缓存
+
+    每个命名空间(一般为被缓存的函数名, 如 fetchRecommendData、searchData)
+    拥有独立的字节预算, 条目大小由 estimateSize 估算。分片只用于分散锁竞争:
+    每个分片是一个 maxsize 为整个命名空间预算的 TTLCache, 命名空间的总占用跨分片统计,
+    因此不超过预算的单个大条目也能缓存。
+    写入后总占用超出预算时, 先淘汰过期条目, 再从占用最多的分片按最近最少使用顺序淘汰,
+    直到回到预算内。
+    """
+    DEFAULT_NAMESPACE = 'default'
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl: int = 300, budgets: dict = None,
+                 shards: int = 8):
+        """
+        Args:
+            max_bytes (int): 未单独配置预算的命名空间的字节预算
+            ttl (int): 条目存活时间(秒)
+            budgets (dict): 命名空间 -> 字节预算
+            shards (int): 每个命名空间的分片数
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.budgets = dict(budgets or {})
+        self.shards = max(1, shards)
+        self.namespaces = {}
+        self._namespaces_lock = threading.Lock()
+
+    def _getShards(self, namespace: str, create: bool = True) -> list:
+        shards = self.namespaces.get(namespace)
+        if shards is None and create:
+            with self._namespaces_lock:
+                shards = self.namespaces.get(namespace)
+                if shards is None:
+                    budget = self.budgets.get(namespace, self.max_bytes)
+                    shards = [_Shard(budget, self.ttl) for _ in range(self.shards)]
+                    self.namespaces[namespace] = shards
+        return shards
+
+    def _getShard(self, key: str, namespace: str, create: bool = True):
+        shards = self._getShards(namespace, create)
+        if shards is None:
+            return None
+        return shards[hash(key) % len(shards)]
+
+    def set(self, key: str, value: any, namespace: str = DEFAULT_NAMESPACE):
+        shards = self._getShards(namespace)
+        shard = shards[hash(key) % len(shards)]
+        # 在锁外估算大小, 缩短持锁时间
+        size = estimateSize(value)
+        with shard.lock:
+            if size > shard.cache.maxsize:
+                # 单个条目超过命名空间预算, 不缓存
+                shard.cache.pop(key, None)
+                logger.info(f'缓存条目超出命名空间 {namespace} 的内存预算, 跳过缓存')
+                return
+            shard.pending_size = size
+            shard.cache[key] = value
+        self._trim(shards, shard, key)
+
+    def _trim(self, shards: list, written: '_Shard', key: str):
+        """命名空间总占用超出预算时逐个淘汰条目, 不淘汰刚写入的条目
+
+        每次只持有一个分片的锁, 避免与其他线程的写入互相等待; 并发写入时总占用可能短暂超出预算。
+        """
+        budget = written.cache.maxsize
+        while sum(shard.cache.currsize for shard in shards) > budget:
+            for shard in sorted(shards, key=lambda shard: shard.cache.currsize, reverse=True):
+                with shard.lock:
+                    shard.cache.expire()
+                    if sum(other.cache.currsize for other in shards) <= budget:
+                        return
+                    if not shard.cache or (shard is written and len(shard.cache) == 1 and key in shard.cache):
+                        continue
+                    # 刚写入的条目是分片中最近使用的, popitem 按LRU淘汰不会选中它
+                    shard.cache.popitem()
+                    break
+            else:
+                return
+
+    def get(self, key: str, namespace: str = DEFAULT_NAMESPACE):
+        shard = self._getShard(key, namespace, create=False)
+        if shard is None:
+            return None
+        with shard.lock:
+            return shard.cache.get(key)
+
+    def delete(self, key: str, namespace: str = DEFAULT_NAMESPACE):
+        shard = self._getShard(key, namespace, create=False)
+        if shard is None:
+            return
+        with shard.lock:
+            shard.cache.pop(key, None)
+
+    def clear(self):
+        for shards in list(self.namespaces.values()):
+            for shard in shards:
+                with shard.lock:
+                    shard.cache.clear()
+
+    def stats(self) -> dict:
+        """各命名空间的条目数、占用字节数、淘汰/过期次数及条目存活时长分布"""
+        result = {}
+        now = time.time()
+        for namespace, shards in list(self.namespaces.items()):
+            entries, total, max_bytes, evictions, expirations = 0, 0, 0, 0, 0
+            ages = []
+            for shard in shards:
+                with shard.lock:
+                    shard.cache.expire()
+                    entries += len(shard.cache)
+                    total += shard.cache.currsize
+                    max_bytes = shard.cache.maxsize
+                    evictions += shard.cache.evictions
+                    expirations += shard.cache.expirations
+                    ages.extend(shard.cache.ages(now))
+            ages.sort()
+            result[namespace] = {
+                'entries': entries,
+                'bytes': total,
+                'maxBytes': max_bytes,
+                'evictions': evictions,
+                'expirations': expirations,
+                'ageSeconds': {
+                    'p50': round(ages[len(ages) // 2], 1) if ages else 0,
+                    'p90': round(ages[len(ages) * 9 // 10], 1) if ages else 0,
+                    'max': round(ages[-1], 1) if ages else 0,
+                },
+            }
+        return result
+
+
+class _NamespaceStats:
+    """CacheManager 中单个命名空间的命中统计"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.lookup_seconds = 0.0
+        self.computes = 0
+        self.compute_seconds = 0.0
+
+    def toDict(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            avg_compute = self.compute_seconds / self.computes if self.computes else 0.0
+            avg_lookup = self.lookup_seconds / lookups if lookups else 0.0
+            return {
+                'hits': self.hits,
+                'sharedHits': self.shared_hits,
+                'misses': self.misses,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'coalescedWaits': self.coalesced,
+                'avgLookupSeconds': round(avg_lookup, 6),
+                'avgComputeSeconds': round(avg_compute, 6),
+                # 命中(含合并等待)省下的计算时间减去所有查找花费的时间
+                'timeSavedSeconds': round((self.hits + self.coalesced) * avg_compute - self.lookup_seconds, 3),
+            }
+
 
 class CacheManager:
-    def __init__(self, cache: SimpleCache):
+    def __init__(self, cache: SimpleCache, shared_cache=None):
+        """
+        Args:
+            cache (SimpleCache): 进程内缓存
+            shared_cache: 可选的跨进程共享缓存(如 SharedArrowCache), 作为第二级缓存
+        """
         self.cache = cache
+        self.shared_cache = shared_cache
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        # 正在计算中的缓存键 -> threading.Event, 用于合并并发的相同请求
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def _getStats(self, func_name: str) -> _NamespaceStats:
+        stats = self._stats.get(func_name)
+        if stats is None:
+            with self._stats_lock:
+                stats = self._stats.setdefault(func_name, _NamespaceStats())
+        return stats
 
     def getCacheKey(self, func_name: str, *args, **kwargs) -> str:
         """生成稳定且唯一的缓存键"""
@@ -74,10 +303,90 @@ class CacheManager:
         # 使用哈希进一步压缩键（可选）
         return hashlib.md5(key.encode()).hexdigest()
 
+    def _lookup(self, func_name: str, cache_key: str) -> any:
+        start = time.perf_counter()
+        shared_hit = False
+        data = self.cache.get(cache_key, func_name)
+        if data is None and self.shared_cache is not None:
+            # 进程内未命中时查询共享缓存, 命中后回填到进程内缓存
+            data = self.shared_cache.get(cache_key, func_name)
+            if data is not None:
+                shared_hit = True
+                self.cache.set(cache_key, data, func_name)
+        elapsed = time.perf_counter() - start
+        stats = self._getStats(func_name)
+        with stats.lock:
+            stats.lookup_seconds += elapsed
+            if data is None:
+                stats.misses += 1
+            else:
+                stats.hits += 1
+                stats.shared_hits += shared_hit
+        return data
+
     def getData(self, func_name: str, *args, **kwargs) -> any:
         cache_key = self.getCacheKey(func_name, *args, **kwargs)
-        return self.cache.get(cache_key)
+        return self._lookup(func_name, cache_key)
 
     def setData(self, func_name: str, data: any, *args, **kwargs):
         cache_key = self.getCacheKey(func_name, *args, **kwargs)
-        self.cache.set(cache_key, data)
\ No newline at end of file
+        self._store(func_name, cache_key, data)
+
+    def _store(self, func_name: str, cache_key: str, data: any):
+        self.cache.set(cache_key, data, func_name)
+        if self.shared_cache is not None:
+            self.shared_cache.set(cache_key, data, func_name)
+
+    def getOrCompute(self, func_name: str, compute, *args, **kwargs) -> any:
+        """读取缓存, 未命中时调用 compute() 计算并写入缓存
+
+        同一缓存键的并发未命中只会计算一次, 其余线程等待计算结果(计为合并等待)。
+        compute 返回 None 时不写入缓存。
+        """
+        cache_key = self.getCacheKey(func_name, *args, **kwargs)
+        data = self._lookup(func_name, cache_key)
+        if data is not None:
+            return data
+
+        with self._inflight_lock:
+            event = self._inflight.get(cache_key)
+            leader = event is None
+            if leader:
+                event = self._inflight[cache_key] = threading.Event()
+
+        stats = self._getStats(func_name)
+        if not leader:
+            event.wait()
+            with stats.lock:
+                stats.coalesced += 1
+            data = self.cache.get(cache_key, func_name)
+            if data is not None:
+                return data
+            # 计算失败或结果未能缓存时自行计算
+
+        try:
+            start = time.perf_counter()
+            data = compute()
+            elapsed = time.perf_counter() - start
+            with stats.lock:
+                stats.computes += 1
+                stats.compute_seconds += elapsed
+            if data is not None:
+                self._store(func_name, cache_key, data)
+            return data
+        finally:
+            if leader:
+                with self._inflight_lock:
+                    self._inflight.pop(cache_key, None)
+                event.set()
+
+    def stats(self) -> dict:
+        """各命名空间的命中率、合并等待、节省时间及缓存占用统计"""
+        cache_stats = self.cache.stats()
+        namespaces = {}
+        for func_name in set(cache_stats) | set(self._stats):
+            namespaces[func_name] = {**self._getStats(func_name).toDict(), **cache_stats.get(func_name, {})}
+        result = {'namespaces': namespaces}
+        if self.shared_cache is not None:
+            result['shared'] = self.shared_cache.stats()
+        return result
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from src.utils.logger import logger
+
+SUFFIX = '.obj'
+
+
+class ObjectDiskCache:
+    """MinIO 热点对象的本地磁盘缓存(读穿透)
+
+    对象按 (存储桶, 对象名, ETag) 保存为本地文件, 对象更新后ETag变化即自然失效;
+    按最近使用顺序和总字节数淘汰。同一对象的并发首次读取只下载一次, 其余请求等待下载完成。
+    多个进程可共用同一目录, 各进程分别维护索引, 命中时会确认文件仍然存在。
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024 * 1024 * 1024,
+                 max_object_bytes: int = 512 * 1024 * 1024, chunk_size: int = 1024 * 1024):
+        """
+        Args:
+            directory (str): 缓存目录
+            max_bytes (int): 缓存文件总大小上限(字节)
+            max_object_bytes (int): 单个对象超过该大小时不缓存, 直接从 MinIO 流式输出
+            chunk_size (int): 下载时的块大小(字节)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        # 文件路径 -> 字节数, 按最近使用排序
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """启动时按访问时间载入已有的缓存文件"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                stat = entry.stat()
+                files.append((stat.st_atime, entry.path, stat.st_size))
+            elif entry.name.endswith('.tmp'):
+                self._remove(entry.path)
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self._bytes += size
+        self._evict()
+        logger.info(f'对象磁盘缓存已载入: {len(self._entries)} 个文件, {self._bytes} 字节')
+
+    def cacheable(self, size: int) -> bool:
+        return size <= self.max_object_bytes
+
+    def _getPrefix(self, bucket: str, name: str) -> str:
+        return hashlib.sha1(f'{bucket}/{name}'.encode('utf-8')).hexdigest()
+
+    def _getPath(self, bucket: str, name: str, etag: str) -> str:
+        return os.path.join(self.directory, f'{self._getPrefix(bucket, name)}-{etag}{SUFFIX}')
+
+    def fetch(self, client, bucket: str, name: str, etag: str, size: int) -> str:
+        """返回对象在本地的文件路径, 未缓存时从 MinIO 下载
+
+        Args:
+            client: MinIO 客户端
+            bucket (str): 存储桶
+            name (str): 对象名
+            etag (str): 对象当前的ETag
+            size (int): 对象大小(字节)
+        """
+        path = self._getPath(bucket, name, etag)
+        while True:
+            with self._lock:
+                if path in self._entries and os.path.exists(path):
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    self.bytes_saved += size
+                    return path
+                event = self._inflight.get(path)
+                if event is None:
+                    event = self._inflight[path] = threading.Event()
+                    break
+            # 其他请求正在下载同一对象, 等待后重新检查
+            event.wait()
+
+        try:
+            self._download(client, bucket, name, path)
+            with self._lock:
+                self.misses += 1
+                self.bytes_downloaded += size
+                self._dropVersions(bucket, name, path)
+                if path in self._entries:
+                    self._bytes -= self._entries[path]
+                self._entries[path] = size
+                self._bytes += size
+                self._evict()
+            return path
+        finally:
+            with self._lock:
+                self._inflight.pop(path, None)
+            event.set()
+
+    def _download(self, client, bucket: str, name: str, path: str):
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        response = client.get_object(bucket, name)
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.stream(self.chunk_size):
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        finally:
+            response.close()
+            response.release_conn()
+
+    def _dropVersions(self, bucket: str, name: str, keep: str):
+        """删除同一对象的旧版本(ETag不同)文件, 需持有锁"""
+        prefix = os.path.join(self.directory, self._getPrefix(bucket, name) + '-')
+        for path in [p for p in self._entries if p.startswith(prefix) and p != keep]:
+            self._bytes -= self._entries.pop(path)
+            self._remove(path)
+
+    def _evict(self):
+        """按最近使用顺序淘汰, 直到总大小不超过上限, 需持有锁"""
+        while self._bytes > self.max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._remove(path)
+
+    def _remove(self, path: str):
+        # 正在被发送的文件删除后, 已打开的文件描述符仍可继续读取
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else None,
+                'bytesSaved': self.bytes_saved,
+                'bytesDownloaded': self.bytes_downloaded,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes,
+            }
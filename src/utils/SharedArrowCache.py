@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+
+import pyarrow as pa
+import geopandas as gpd
+
+from src.utils.logger import logger
+
+# 写入Arrow文件schema元数据中的键, 记录缓存值的结构
+META_KEY = b'geocloud.cache'
+
+
+class SharedArrowCache:
+    """跨进程共享的结果缓存, 作为 SimpleCache 之后的第二级缓存
+
+    缓存值以 Arrow IPC 文件(几何列为 GeoArrow WKB 编码)写入本地目录(生产环境使用tmpfs),
+    任意工作进程都可以通过内存映射读取。写入先落到临时文件再 os.replace, 保证发布是原子的;
+    读取时按文件修改时间判断是否过期, 后台线程定期清理过期文件并限制目录总大小。
+
+    支持的缓存值:
+        GeoDataFrame;
+        (GeoDataFrame, 标量...) 元组, 如 fetchRecommendData 的 (数据, 覆盖率);
+        字典列表, 如 searchData 的结果。
+    其余类型不进入共享缓存。
+    """
+
+    def __init__(self, directory: str, ttl: int = 300, max_bytes: int = 2 * 1024 * 1024 * 1024,
+                 cleanup_interval: int = 60):
+        """
+        Args:
+            directory (str): 缓存文件目录, 多个进程需配置为同一目录
+            ttl (int): 条目存活时间(秒)
+            max_bytes (int): 目录中缓存文件的总大小上限(字节)
+            cleanup_interval (int): 后台清理间隔(秒)
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cleanup_interval = cleanup_interval
+        os.makedirs(directory, exist_ok=True)
+        self._cleanup_thread = threading.Thread(target=self._cleanupLoop, daemon=True)
+        self._cleanup_thread.start()
+
+    def _getPath(self, key: str, namespace: str) -> str:
+        return os.path.join(self.directory, f'{namespace}-{key}.arrow')
+
+    def get(self, key: str, namespace: str):
+        path = self._getPath(key, namespace)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                self._remove(path)
+                return None
+            with pa.memory_map(path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            return self._fromTable(table)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f'读取共享缓存失败: {e}, path: {path}')
+            return None
+
+    def set(self, key: str, value, namespace: str):
+        table = self._toTable(value)
+        if table is None:
+            return
+        path = self._getPath(key, namespace)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Windows下目标文件被其他进程映射时无法替换, 说明已有进程发布了该条目
+            logger.error(f'写入共享缓存失败: {e}, path: {path}')
+            self._remove(tmp_path)
+
+    def delete(self, key: str, namespace: str):
+        self._remove(self._getPath(key, namespace))
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            self._remove(entry.path)
+
+    def stats(self) -> dict:
+        entries, total = 0, 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.arrow'):
+                entries += 1
+                total += entry.stat().st_size
+        return {'entries': entries, 'bytes': total, 'maxBytes': self.max_bytes}
+
+    def _toTable(self, value):
+        """将缓存值转换为带结构元数据的Arrow表, 不支持的类型返回None"""
+        try:
+            if isinstance(value, gpd.GeoDataFrame):
+                table, meta = self._gdfToTable(value), {'kind': 'gdf'}
+            elif (isinstance(value, tuple) and value
+                  and isinstance(value[0], gpd.GeoDataFrame)):
+                table = self._gdfToTable(value[0])
+                meta = {'kind': 'gdf_tuple', 'extras': list(value[1:])}
+            elif isinstance(value, list) and all(isinstance(item, dict) for item in value):
+                table, meta = pa.Table.from_pylist(value), {'kind': 'records'}
+            else:
+                return None
+            metadata = dict(table.schema.metadata or {})
+            metadata[META_KEY] = json.dumps(meta).encode()
+            return table.replace_schema_metadata(metadata)
+        except Exception as e:
+            logger.error(f'缓存值转换为Arrow表失败, 跳过共享缓存: {e}')
+            return None
+
+    def _gdfToTable(self, gdf: gpd.GeoDataFrame) -> pa.Table:
+        return pa.table(gdf.to_arrow(index=True, geometry_encoding='WKB'))
+
+    def _fromTable(self, table: pa.Table):
+        meta = json.loads(table.schema.metadata[META_KEY])
+        if meta['kind'] == 'records':
+            return table.to_pylist()
+        gdf = gpd.GeoDataFrame.from_arrow(table)
+        if meta['kind'] == 'gdf_tuple':
+            return (gdf, *meta['extras'])
+        return gdf
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _cleanupLoop(self):
+        while True:
+            time.sleep(self.cleanup_interval)
+            try:
+                self.cleanup()
+            except Exception as e:
+                logger.error(f'清理共享缓存失败: {e}')
+
+    def cleanup(self):
+        """删除过期文件和残留的临时文件, 总大小超出上限时从最旧的文件开始删除"""
+        now = time.time()
+        alive = []
+        for entry in os.scandir(self.directory):
+            stat = entry.stat()
+            if now - stat.st_mtime > self.ttl:
+                self._remove(entry.path)
+            elif entry.name.endswith('.arrow'):
+                alive.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in alive)
+        for _, size, path in sorted(alive):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
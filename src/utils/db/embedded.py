@@ -0,0 +1,406 @@
+"""嵌入式数据库后端: 用SQLite模拟本项目用到的 oracledb 连接池接口, 用于离线测试和性能分析
+
+连接池/连接/游标提供与 oracledb 相同的调用方式(acquire、cursor、execute、fetch*、executemany、
+getbatcherrors、commit/rollback), 业务代码和 InstrumentedPool 无需区分后端。
+
+SQL 在执行前按固定规则改写为SQLite方言, 只覆盖本项目实际使用的写法:
+    - 绑定变量 ": name" 中的空格
+    - MERGE INTO ... WHEN NOT MATCHED THEN INSERT (改写为 INSERT ... SELECT ... WHERE NOT EXISTS)
+    - 语句末尾的 WHERE/AND ROWNUM <= n 与 FETCH FIRST n ROWS ONLY (改写为 LIMIT n)
+    - SYSDATE、TIMESTAMP/DATE 字面量、ORA_ROWSCN(以 rowid 代替, 只反映插入)
+    - SDO_GEOMETRY.get_wkt(列) (返回带 read() 的 CLOB 模拟对象)
+    - TO_DATE、TO_TIMESTAMP、TO_CHAR、TRUNC、NVL 以自定义函数实现
+优化器提示等注释按注释忽略; MERGE 的 WHEN MATCHED、分析函数、SDO 空间运算符等不支持, 执行时报错。
+
+日期以 "YYYY-MM-DD HH:MM:SS[.ffffff]" 文本保存, 比较按文本进行; DATE/TIMESTAMP 列读出为 datetime。
+SDO_GEOMETRY 列以 WKT 文本保存, 读出为只含 SDO_GTYPE/SDO_SRID/SDO_POINT/SDO_ELEM_INFO/SDO_ORDINATES
+的模拟对象, 与 oracledb 返回的对象用法一致。
+"""
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+
+from src.utils.logger import logger
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'geocloud_embedded.db')
+# 游标默认参数, 与 oracledb 一致
+DEFAULT_ARRAYSIZE = 100
+DEFAULT_PREFETCHROWS = 2
+
+BatchError = namedtuple('BatchError', ['offset', 'message'])
+
+
+class EmbeddedError(Exception):
+    pass
+
+
+# Oracle 日期格式元素 -> strftime/strptime 指令, 按长度优先匹配
+_FORMAT_TOKENS = [('YYYY', '%Y'), ('HH24', '%H'), ('FF6', '%f'), ('FF3', '%f'), ('FF', '%f'),
+                  ('MM', '%m'), ('DD', '%d'), ('MI', '%M'), ('SS', '%S')]
+
+
+@lru_cache(maxsize=64)
+def pythonFormat(fmt: str) -> str:
+    """将 Oracle 日期格式(如 'YYYY-MM-DD"T"HH24:MI:SS.FF6')转换为 strptime 格式"""
+    result = []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == '"':
+            end = fmt.index('"', i + 1)
+            result.append(fmt[i + 1:end].replace('%', '%%'))
+            i = end + 1
+            continue
+        for token, directive in _FORMAT_TOKENS:
+            if fmt[i:i + len(token)].upper() == token:
+                result.append(directive)
+                i += len(token)
+                break
+        else:
+            result.append(fmt[i].replace('%', '%%'))
+            i += 1
+    return ''.join(result)
+
+
+def toText(value: datetime) -> str:
+    """日期的保存格式, 文本顺序与时间顺序一致"""
+    return value.isoformat(' ', 'microseconds' if value.microsecond else 'seconds')
+
+
+def parseDate(value, fmt: str = None) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if fmt is None:
+        return datetime.fromisoformat(value)
+    return datetime.strptime(value, pythonFormat(fmt))
+
+
+def to_date(value, fmt=None):
+    return None if value is None else toText(parseDate(value, fmt))
+
+
+def to_char(value, fmt=None):
+    if value is None:
+        return None
+    if fmt is None:
+        return str(value)
+    return parseDate(value).strftime(pythonFormat(fmt))
+
+
+def trunc(value, fmt=None):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        day = parseDate(value)
+        return toText(datetime(day.year, day.month, day.day))
+    return int(value)
+
+
+def nvl(value, default):
+    return default if value is None else value
+
+
+class Lob:
+    """CLOB 的模拟, 提供 read() 和 size()"""
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def read(self, offset: int = 1, amount: int = None) -> str:
+        end = None if amount is None else offset - 1 + amount
+        return self.text[offset - 1:end]
+
+    def size(self) -> int:
+        return len(self.text)
+
+    def __str__(self):
+        return self.text
+
+
+class SdoOrdinates:
+    __slots__ = ('values',)
+
+    def __init__(self, values: list):
+        self.values = values
+
+    def aslist(self) -> list:
+        return self.values
+
+
+# WKT 类型 -> (SDO_GTYPE, 外环/元素的 SDO_ETYPE)
+_GTYPES = {'POINT': (2001, 1), 'LINESTRING': (2002, 2), 'POLYGON': (2003, 1003),
+           'MULTIPOLYGON': (2007, 1003)}
+_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_PART = re.compile(r'\(([^()]*)\)')
+
+
+class SdoGeometry:
+    """SDO_GEOMETRY 的模拟, 由 WKT 构造, SRID 固定为 4326"""
+    __slots__ = ('SDO_GTYPE', 'SDO_SRID', 'SDO_POINT', 'SDO_ELEM_INFO', 'SDO_ORDINATES')
+
+    def __init__(self, wkt: str):
+        kind = wkt[:wkt.index('(')].strip().upper()
+        if kind not in _GTYPES:
+            raise EmbeddedError(f'不支持的几何类型: {kind}')
+        self.SDO_GTYPE, etype = _GTYPES[kind]
+        self.SDO_SRID = 4326
+        self.SDO_POINT = None
+        ordinates, elem_info = [], []
+        for part in _PART.finditer(wkt):
+            # 多边形中紧跟 "((" 的为外环, 其余为内环
+            exterior = etype != 1003 or wkt[part.start() - 1] == '('
+            elem_info.extend([len(ordinates) + 1, etype if exterior else 2003, 1])
+            ordinates.extend(float(n) for n in _NUMBER.findall(part.group(1)))
+        self.SDO_ELEM_INFO = SdoOrdinates(elem_info)
+        self.SDO_ORDINATES = SdoOrdinates(ordinates)
+
+
+sqlite3.register_converter('DATE', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('SDO_GEOMETRY', lambda value: SdoGeometry(value.decode()))
+sqlite3.register_converter('CLOB', lambda value: Lob(value.decode()))
+sqlite3.register_adapter(datetime, toText)
+sqlite3.register_adapter(date, lambda value: f'{value.isoformat()} 00:00:00')
+
+_MERGE = re.compile(
+    r'^\s*MERGE\s+INTO\s+(\w+)\s+(\w+)\s+USING\s+(\(.*?\)|\w+)\s+(\w+)\s+ON\s+\((.*?)\)\s+'
+    r'WHEN\s+NOT\s+MATCHED\s+THEN\s+INSERT\s*\((.*?)\)\s*VALUES\s*\((.*)\)\s*$', re.I | re.S)
+REWRITES = [
+    (re.compile(r':\s+(\w+)'), r':\1'),
+    (re.compile(r'SDO_GEOMETRY\.get_wkt\(\s*(\w+)\s*\)', re.I), r'\1 AS "\1 [CLOB]"'),
+    (re.compile(r"\b(?:TIMESTAMP|DATE)\s+('[^']*')", re.I), r'\1'),
+    (re.compile(r'\bSYSDATE\b', re.I), "datetime('now', 'localtime')"),
+    (re.compile(r'\bORA_ROWSCN\b', re.I), 'rowid'),
+    (re.compile(r'\bFETCH\s+FIRST\s+(:\w+|\d+)\s+ROWS?\s+ONLY\b', re.I), r'LIMIT \1'),
+    (re.compile(r'\s+(?:WHERE|AND)\s+ROWNUM\s*<=\s*(:\w+|\d+)\s*$', re.I), r' LIMIT \1'),
+]
+
+
+@lru_cache(maxsize=512)
+def translate(sql: str) -> str:
+    """将本项目使用的 Oracle SQL 改写为 SQLite 方言"""
+    merge = _MERGE.match(sql)
+    if merge:
+        table, target, source, alias, on, columns, values = merge.groups()
+        sql = (f'INSERT INTO {table} ({columns}) SELECT {values} FROM {source} {alias} '
+               f'WHERE NOT EXISTS (SELECT 1 FROM {table} {target} WHERE {on})')
+    for pattern, replacement in REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                           detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    for name in ('TO_DATE', 'TO_TIMESTAMP'):
+        conn.create_function(name, 1, to_date, deterministic=True)
+        conn.create_function(name, 2, to_date, deterministic=True)
+    conn.create_function('TO_CHAR', 1, to_char, deterministic=True)
+    conn.create_function('TO_CHAR', 2, to_char, deterministic=True)
+    conn.create_function('TRUNC', 1, trunc, deterministic=True)
+    conn.create_function('TRUNC', 2, trunc, deterministic=True)
+    conn.create_function('NVL', 2, nvl, deterministic=True)
+    return conn
+
+
+class EmbeddedCursor:
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+        self._description = None
+        self._batcherrors = []
+        self.arraysize = DEFAULT_ARRAYSIZE
+        self.prefetchrows = DEFAULT_PREFETCHROWS
+
+    @property
+    def description(self):
+        return self._description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def _describe(self, statement: str):
+        description = self._cursor.description
+        if description is None:
+            self._description = None
+            return
+        # Oracle 未加引号的标识符返回大写
+        self._description = [(name if f'"{name}"' in statement else name.upper(),) + tuple(rest)
+                             for name, *rest in description]
+
+    def execute(self, statement: str, parameters=None, **keyword_parameters):
+        if parameters is None:
+            parameters = keyword_parameters
+        self._cursor.execute(translate(statement), parameters)
+        self._describe(statement)
+        return self if self._description is not None else None
+
+    def executemany(self, statement: str, parameters: list, batcherrors: bool = False, **kwargs):
+        sql = translate(statement)
+        self._batcherrors = []
+        if not batcherrors:
+            self._cursor.executemany(sql, parameters)
+            return
+        # 逐行执行, 与 batcherrors 一样出错的行不影响其余行
+        for offset, row in enumerate(parameters):
+            try:
+                self._cursor.execute(sql, row)
+            except sqlite3.Error as e:
+                self._batcherrors.append(BatchError(offset, str(e)))
+
+    def getbatcherrors(self) -> list:
+        return self._batcherrors
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int = None) -> list:
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchall(self) -> list:
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EmbeddedConnection:
+    """连接池中的连接, close() 时回滚未提交的事务并归还连接池"""
+
+    def __init__(self, pool, conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def cursor(self) -> EmbeddedCursor:
+        return EmbeddedCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool._release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EmbeddedPool:
+    """SQLite 连接池, 属性 busy/opened/min/max 与 oracledb 连接池一致
+
+    SQLite 同一时间只允许一个写事务, 写并发的表现与 Oracle 不同, 读多写少的场景下可用于性能分析。
+    """
+
+    def __init__(self, path: str, min: int = 1, max: int = 4, wait_timeout: int = None):
+        """
+        Args:
+            path (str): 数据库文件路径
+            min (int): 预先打开的连接数
+            max (int): 最多打开的连接数
+            wait_timeout (int): 连接耗尽时的最长等待时间(毫秒), None表示一直等待
+        """
+        self.path = path
+        self.min = min
+        self.max = max
+        self.wait_timeout = wait_timeout
+        self.opened = 0
+        self.busy = 0
+        self._idle = []
+        self._cond = threading.Condition()
+        with self._cond:
+            for _ in range(min):
+                self._idle.append(self._open())
+
+    def _open(self) -> sqlite3.Connection:
+        conn = connect(self.path)
+        self.opened += 1
+        return conn
+
+    def acquire(self) -> EmbeddedConnection:
+        deadline = None if not self.wait_timeout else time.monotonic() + self.wait_timeout / 1000
+        with self._cond:
+            while not self._idle and self.opened >= self.max:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise EmbeddedError(f'DPY-4005: 等待连接超时({self.wait_timeout}ms)')
+                self._cond.wait(remaining)
+            conn = self._idle.pop() if self._idle else self._open()
+            self.busy += 1
+        return EmbeddedConnection(self, conn)
+
+    def release(self, connection: EmbeddedConnection):
+        connection.close()
+
+    def _release(self, conn: sqlite3.Connection):
+        conn.rollback()
+        with self._cond:
+            self.busy -= 1
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self, force: bool = False):
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self.opened -= len(self._idle)
+            self._idle = []
+
+
+def create_pool(path: str = None, min: int = 1, max: int = 4, wait_timeout: int = None, **seed_options) -> EmbeddedPool:
+    """创建嵌入式连接池, 数据库文件中没有业务表时先建表并写入合成数据
+
+    Args:
+        path (str): 数据库文件路径, 默认为系统临时目录下的 geocloud_embedded.db
+        seed_options: 传给 synthetic.populate 的合成数据规模参数
+    """
+    from src.utils.db.synthetic import populate
+
+    path = path or DEFAULT_PATH
+    conn = connect(path)
+    try:
+        # 多个进程同时启动时, 持有写锁后再检查是否已建表, 只有一个进程写入合成数据;
+        # 写入可能超过 busy timeout, 其余进程循环等待
+        while True:
+            try:
+                conn.execute('BEGIN EXCLUSIVE')
+                break
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                logger.info(f'嵌入式数据库 {path} 正由其他进程写入, 继续等待')
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'TF_ORDER'").fetchone():
+            conn.rollback()
+        else:
+            start = time.perf_counter()
+            # populate 在同一事务中建表、写入并提交
+            counts = populate(conn, **seed_options)
+            logger.info(f'嵌入式数据库 {path} 已写入合成数据: {counts}, 耗时 {time.perf_counter() - start:.1f}s')
+    finally:
+        conn.close()
+    logger.info(f'使用嵌入式数据库后端: {path}')
+    return EmbeddedPool(path, min=min, max=max, wait_timeout=wait_timeout)
@@ -1,17 +1,22 @@
 import src.config.config as config
 import src.utils.logger as logger
+from src.utils.db.oracle import ARRAYSIZE, instrumentPool, iterQuery, tuneCursor
 import threading 
 
+# Oracle IN 列表最多1000项
+IN_LIST_LIMIT = 1000
+
 class Mapper:
     def __init__(self, pool):
-        self.pool = pool
+        self.pool = instrumentPool(pool)
         self.lock = threading.Lock()   
         
     # 执行查询语句
-    def executeQuery(self, sql, params=None):
+    def executeQuery(self, sql, params=None, arraysize=None, prefetchrows=None):
         try:
             with self.pool.acquire() as conn:
                 with conn.cursor() as cursor:
+                    tuneCursor(cursor, arraysize, prefetchrows)
                     cursor.execute(sql, params)
                     result = cursor.fetchall()
                     # logger.info("查询成功: {}, params: {}".format(sql, params))
@@ -19,15 +24,22 @@ class Mapper:
         except Exception as e:
             logger.error("SQL查询错误: {}, SQL: {}, params: {}".format(e, sql, params))
     
-    # 执行非查询语句
+    # 流式执行查询语句, 逐行或按批产出结果, 出错时抛出异常
+    def iterQuery(self, sql, params=None, arraysize=ARRAYSIZE, prefetchrows=None, batch=False, columns=None):
+        return iterQuery(self.pool, sql, params, arraysize=arraysize, prefetchrows=prefetchrows,
+                         batch=batch, columns=columns)
+
+    # 执行非查询语句, 返回是否执行成功
     def executeNonQuery(self, sql, params=None):
         try:
             with self.pool.acquire() as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(sql, params)
                     conn.commit()
+            return True
         except Exception as e:
             logger.error("SQL执行错误: {}, SQL: {}, params: {}".format(e, sql, params))
+            return False
         
     # 从TF_ORDER里面查询最近20条未处理的订单ID和订单名
     def getIdByStatus(self):
@@ -52,42 +64,68 @@ class Mapper:
             return []
 
     # 根据订单名在TF_ORDER中更新订单状态
+    # 返回是否更新成功
     def updateOrderStatusByOrdername(self,f_ordername):
         try:
             with self.lock:
                 sql = "UPDATE TF_ORDER SET F_STATUS = 6 WHERE F_ORDERNAME = :F_ORDERNAME"
-                self.executeNonQuery(sql, {'F_ORDERNAME': f_ordername})
+                return self.executeNonQuery(sql, {'F_ORDERNAME': f_ordername})
         except Exception as e:
             logger.error("更新订单状态错误: %s" % e)
+            return False
 
-    # 根据订阅数据名和订单ID在TF_ORDERDATA中更新订阅数据状态
-    def updateDataStatusByNameAndId(self,f_dataname, f_orderid):
-        try:
-            with self.lock:
-                sql = "UPDATE TF_ORDERDATA SET F_STATUS = 0 WHERE F_DATANAME = :F_DATANAME AND F_ORDERID = :F_ORDERID"
-                self.executeNonQuery(sql, {'F_DATANAME': f_dataname, 'F_ORDERID': f_orderid})
-        except Exception as e:
-            logger.error("更新订单数据状态错误: %s" % e)
-        
-    # 根据订单名获取订单ID(f_orderid)
-    def getIdByOrdername(self,f_ordername):
-        try:
-            sql = "SELECT F_ID FROM TF_ORDER WHERE F_ORDERNAME = :F_ORDERNAME"
-            result = self.executeQuery(sql, {'F_ORDERNAME': f_ordername})
-            return result[0][0]
-        except Exception as e:
-            logger.error("获取订单ID错误: %s" % e)
-            return 0
+    # 批量根据订单名获取订单ID, 返回 {订单名: 订单ID}, 查不到的订单不在结果中
+    # 查询出错时抛出异常, 避免把查询失败当作订单不存在
+    def getIdsByOrdernames(self, ordernames):
+        result = {}
+        ordernames = list(ordernames)
+        for offset in range(0, len(ordernames), IN_LIST_LIMIT):
+            chunk = ordernames[offset:offset + IN_LIST_LIMIT]
+            binds = ', '.join(f':n{i}' for i in range(len(chunk)))
+            sql = f"SELECT F_ORDERNAME, F_ID FROM TF_ORDER WHERE F_ORDERNAME IN ({binds})"
+            rows = self.executeQuery(sql, {f'n{i}': name for i, name in enumerate(chunk)},
+                                     arraysize=len(chunk), prefetchrows=len(chunk) + 1)
+            if rows is None:
+                raise RuntimeError("批量获取订单ID失败")
+            result.update(rows)
+        return result
 
-    # 根据订单ID获取未完成的订单数量
-    def getCountByOrderId(self,f_orderid):
-        try:
-            sql = "SELECT COUNT(*) FROM TF_ORDERDATA WHERE F_ORDERID = :F_ORDERID AND F_STATUS = 1"
-            result = self.executeQuery(sql, {'F_ORDERID': f_orderid})
-            return result[0][0]
-        except Exception as e:
-            logger.error("获取订单数量错误: %s" % e)
-            return 0
+    # 按订单批量更新订阅数据状态, 每个订单一次数组绑定的UPDATE并提交
+    # orders 为 {订单ID: [订阅数据名]}, 返回更新失败的 (订单ID, 订阅数据名) 列表
+    def updateDataStatusByOrders(self, orders):
+        sql = "UPDATE TF_ORDERDATA SET F_STATUS = 0 WHERE F_DATANAME = :F_DATANAME AND F_ORDERID = :F_ORDERID"
+        failed = []
+        with self.pool.acquire() as conn:
+            with conn.cursor() as cursor:
+                for f_orderid, datanames in orders.items():
+                    try:
+                        cursor.executemany(sql, [{'F_DATANAME': name, 'F_ORDERID': f_orderid} for name in datanames],
+                                           batcherrors=True)
+                        for error in cursor.getbatcherrors():
+                            logger.error("更新订单数据状态错误: %s, 订单ID: %s, 数据名: %s"
+                                         % (error.message, f_orderid, datanames[error.offset]))
+                            failed.append((f_orderid, datanames[error.offset]))
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        logger.error("更新订单数据状态错误: %s, 订单ID: %s" % (e, f_orderid))
+                        failed.extend((f_orderid, name) for name in datanames)
+        return failed
+
+    # 批量获取各订单未完成的订阅数据数量, 返回 {订单ID: 数量}, 没有未完成数据的订单数量为0
+    def getCountByOrderIds(self, f_orderids):
+        f_orderids = list(f_orderids)
+        result = dict.fromkeys(f_orderids, 0)
+        for offset in range(0, len(f_orderids), IN_LIST_LIMIT):
+            chunk = f_orderids[offset:offset + IN_LIST_LIMIT]
+            binds = ', '.join(f':id{i}' for i in range(len(chunk)))
+            sql = f"SELECT F_ORDERID, COUNT(*) FROM TF_ORDERDATA WHERE F_STATUS = 1 AND F_ORDERID IN ({binds}) GROUP BY F_ORDERID"
+            rows = self.executeQuery(sql, {f'id{i}': f_orderid for i, f_orderid in enumerate(chunk)},
+                                     arraysize=len(chunk), prefetchrows=len(chunk) + 1)
+            if rows is None:
+                raise RuntimeError("查询未完成订单数据数量失败")
+            result.update(rows)
+        return result
 
     # 根据订单ID从TF_ORDER中获取所有信息
     # 返回格式为列名：数据
@@ -185,33 +223,42 @@ class Mapper:
         except Exception as e:
             logger.error("Serv-U密码插入错误: %s" % e)
      
-    # 从TF_ORDER表中查询测试订单
-    def getTestOrder(self, one_week_ago):
-        try:
-            logger.info("正在查询测试订单")
-            with self.pool.acquire() as conn:
-                with conn.cursor() as cursor:
-                    sql = """
-                    SELECT * 
-                    FROM TF_ORDER 
-                    WHERE (F_PRODUCT_NAME LIKE '%测试%' 
-                        OR F_PRODUCT_NAME LIKE '%test%' 
-                        OR F_PRODUCT_NAME LIKE '%Test%')
-                        AND (
-                            (F_UPDATETIME IS NOT NULL AND F_UPDATETIME < TO_TIMESTAMP(:one_week_ago, 'YYYY-MM-DD HH24:MI:SS.FF3'))
-                            OR (F_UPDATETIME IS NULL AND F_CREATTIME < TO_TIMESTAMP(:one_week_ago, 'YYYY-MM-DD HH24:MI:SS.FF3'))
-                        )
-                    """
-                    cursor.execute(sql, {'one_week_ago': one_week_ago})
-                    columns = [col[0] for col in cursor.description]
-                    result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-  
-            logger.info("测试订单查询完成")
-            return result
-        except Exception as e:
-            logger.error("查询测试订单错误: %s" % e)
-            return []
-        
+    # 从TF_ORDER表中分批查询测试订单, 每批为字段名到值的字典列表
+    # 按F_ID键集分页: 每批单独查询, 取完即归还连接, 调用方处理该批时不占用连接和游标
+    def iterTestOrder(self, one_week_ago, batch_size=500):
+        logger.info("正在查询测试订单")
+        sql = """
+        SELECT * 
+        FROM TF_ORDER 
+        WHERE (F_PRODUCT_NAME LIKE '%测试%' 
+            OR F_PRODUCT_NAME LIKE '%test%' 
+            OR F_PRODUCT_NAME LIKE '%Test%')
+            AND (
+                (F_UPDATETIME IS NOT NULL AND F_UPDATETIME < TO_TIMESTAMP(:one_week_ago, 'YYYY-MM-DD HH24:MI:SS.FF3'))
+                OR (F_UPDATETIME IS NULL AND F_CREATTIME < TO_TIMESTAMP(:one_week_ago, 'YYYY-MM-DD HH24:MI:SS.FF3'))
+            )
+            {keyset}
+        ORDER BY F_ID
+        FETCH FIRST :batch_size ROWS ONLY
+        """
+        last_id = None
+        while True:
+            params = {'one_week_ago': one_week_ago, 'batch_size': batch_size}
+            if last_id is not None:
+                params['last_id'] = last_id
+            columns = []
+            keyset = "" if last_id is None else "AND F_ID > :last_id"
+            rows = list(self.iterQuery(sql.format(keyset=keyset), params, arraysize=batch_size,
+                                       prefetchrows=batch_size + 1, columns=columns))
+            if not rows:
+                break
+            orders = [dict(zip(columns, row)) for row in rows]
+            last_id = orders[-1]['F_ID']
+            yield orders
+            if len(rows) < batch_size:
+                break
+        logger.info("测试订单查询完成")
+
     # 向TF_ORDER_TEST表中插入测试订单
     def insertTestOrder(self,order):
         try:
@@ -237,7 +284,7 @@ class Mapper:
         try:
             # logger.info("正在查询测试订单%s" % F_ID) 
             sql = f"SELECT COUNT(*) FROM TF_ORDER_TEST WHERE F_ID = :F_ID"
-            result = self.executeQuery(sql, {'F_ID': F_ID})[0][0]
+            result = self.executeQuery(sql, {'F_ID': F_ID}, prefetchrows=2)[0][0]
             # logger.info("测试订单%s查询完成" % F_ID)
             return result
         except Exception as e:
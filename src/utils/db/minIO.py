@@ -1,3 +1,8 @@
+import os
+import threading
+
+import certifi
+import urllib3
 from minio import Minio
 from minio.error import S3Error
 import src.config.config as config
@@ -26,6 +31,37 @@ def create_minio_client():
         logger.error(f"创建 MinIO 客户端失败: {e}")
         return None
 
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client():
+    """进程内共享的 MinIO 客户端, 底层 urllib3 连接池在请求之间复用
+
+    连接池大小由 MINIO_POOL_SIZE 配置, 应不小于并发下载的请求数。
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                http_client = urllib3.PoolManager(
+                    maxsize=getattr(config, "MINIO_POOL_SIZE", 10),
+                    block=False,
+                    timeout=urllib3.Timeout(connect=5, read=getattr(config, "MINIO_READ_TIMEOUT", 60)),
+                    retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+                    cert_reqs="CERT_REQUIRED",
+                    ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+                )
+                _shared_client = Minio(
+                    f"{minio_host}:{minio_port}",
+                    access_key=minio_access_key,
+                    secret_key=minio_secret_key,
+                    secure=minio_secure,
+                    http_client=http_client,
+                )
+                logger.info("共享 MinIO 客户端创建成功")
+    return _shared_client
+
 def check_or_create_bucket(client: Minio, bucket_name: str):
     try:
         if not client.bucket_exists(bucket_name):
@@ -1,6 +1,13 @@
+import os
+import sys
+import threading
+import time
+
 import oracledb
 import src.config.config as config 
 from src.utils.logger import logger
+from src.utils.db.statements import STATEMENTS, TimedCursor
+from src.utils.metrics import Histogram
 
 # #oracledb.init_oracle_client()
 
@@ -12,6 +19,18 @@ database = config.DB_DATABASE
 max = config.DB_POOL_MAX
 min = config.DB_POOL_MIN
 increment = config.DB_POOL_INCREMENT
+# 每个连接缓存的语句数, 重复执行的SQL无需再次解析
+stmtcachesize = getattr(config, 'DB_STMT_CACHE_SIZE', 20)
+# 流式查询默认每次往返读取的行数
+ARRAYSIZE = getattr(config, 'DB_ARRAYSIZE', 1000)
+# 批量写入时每批的行数, 每批提交一次
+BATCH_SIZE = getattr(config, 'DB_BATCH_SIZE', 500)
+# 连接池耗尽时获取连接的最长等待时间(毫秒), None表示一直等待
+wait_timeout = getattr(config, 'DB_POOL_WAIT_TIMEOUT', None)
+# 是否按语句指纹统计执行/读取耗时并输出慢查询日志
+sql_stats = getattr(config, 'SQL_STATS_ENABLED', True)
+# 数据库后端: 'oracle' 或 'embedded'(SQLite模拟, 用于离线测试和性能分析, 见 embedded.py)
+backend = getattr(config, 'DB_BACKEND', 'oracle')
 
 
 def create_dbconn():
@@ -19,19 +38,217 @@ def create_dbconn():
     conn = oracledb.connect(str)
     return conn
 
-def create_pool():
+def create_pool(pool_min: int = None, pool_max: int = None):
+    """创建连接池, pool_min/pool_max 默认取 DB_POOL_MIN/DB_POOL_MAX (多进程Web服务中按进程数分摊)"""
+    pool_min = min if pool_min is None else pool_min
+    pool_max = max if pool_max is None else pool_max
+    if backend == 'embedded':
+        from src.utils.db.embedded import create_pool as create_embedded_pool
+        pool = create_embedded_pool(getattr(config, 'DB_EMBEDDED_PATH', None), min=pool_min, max=pool_max,
+                                    wait_timeout=wait_timeout, **getattr(config, 'DB_EMBEDDED_SEED', {}))
+        return InstrumentedPool(pool)
     # 若使用服务名连接数据库，使用下面的语句
     dsn = oracledb.makedsn(host, port, service_name=database)
     # 若使用SID连接数据库，使用下面的语句
     # dsn = oracledb.makedsn(host, port, sid=database)
+    options = {}
+    if wait_timeout:
+        options = {'getmode': oracledb.POOL_GETMODE_TIMEDWAIT, 'wait_timeout': wait_timeout}
     pool = oracledb.create_pool(user=username, password=password, dsn=dsn,
-                    min=min, max=max, increment=increment)
-    return pool
+                    min=pool_min, max=pool_max, increment=increment, stmtcachesize=stmtcachesize, **options)
+    return InstrumentedPool(pool)
+
+# 记录调用位置时跳过的通用数据库辅助函数
+HELPER_FUNCTIONS = {'acquire', 'executeQuery', 'executeNonQuery', 'executeQueryAsDict', 'iterQuery',
+                    'executeMany', 'fetchDataFromDB'}
+# 连接池统计中保留的占用时间最长的调用位置数
+TOP_SITES = 10
+
+def callSite() -> str:
+    """返回获取连接的业务调用位置(模块.函数), 跳过通用的数据库辅助函数"""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_name in HELPER_FUNCTIONS:
+        frame = frame.f_back
+    if frame is None:
+        return 'unknown'
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f'{module}.{frame.f_code.co_name}'
+
+class InstrumentedPool:
+    """连接池代理: 统计获取连接的等待时间、占用时间、忙/打开连接数、耗尽与超时次数,
+    以及各调用位置的连接占用时间, 其余属性直接转发给 oracledb 连接池"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self.wait_seconds = Histogram()
+        self.hold_seconds = Histogram()
+        self.acquires = 0
+        self.exhausted = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.peak_busy = 0
+        # 调用位置 -> [次数, 总占用秒数, 最长占用秒数]
+        self._sites = {}
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    def acquire(self, *args, **kwargs):
+        site = callSite()
+        if self._pool.busy >= self._pool.max:
+            with self._lock:
+                self.exhausted += 1
+        start = time.perf_counter()
+        try:
+            conn = self._pool.acquire(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                if 'DPY-4005' in str(e):
+                    self.timeouts += 1
+                else:
+                    self.errors += 1
+            raise
+        acquired = time.perf_counter()
+        self.wait_seconds.observe(acquired - start)
+        busy = self._pool.busy
+        with self._lock:
+            self.acquires += 1
+            if busy > self.peak_busy:
+                self.peak_busy = busy
+        return TrackedConnection(conn, self, site, acquired)
+
+    def release(self, connection, *args, **kwargs):
+        if isinstance(connection, TrackedConnection):
+            connection._record()
+            connection = connection._conn
+        return self._pool.release(connection, *args, **kwargs)
+
+    def _released(self, site: str, seconds: float):
+        self.hold_seconds.observe(seconds)
+        with self._lock:
+            entry = self._sites.get(site)
+            if entry is None:
+                entry = self._sites[site] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            sites = sorted(self._sites.items(), key=lambda item: item[1][1], reverse=True)[:TOP_SITES]
+            counters = {
+                'acquires': self.acquires,
+                'exhausted': self.exhausted,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'peakBusy': self.peak_busy,
+            }
+        return {
+            'busy': self._pool.busy,
+            'opened': self._pool.opened,
+            'min': self._pool.min,
+            'max': self._pool.max,
+            **counters,
+            'waitSeconds': self.wait_seconds.snapshot(),
+            'holdSeconds': self.hold_seconds.snapshot(),
+            'topHolders': [
+                {'site': site, 'count': count, 'totalSeconds': round(total, 6),
+                 'avgSeconds': round(total / count, 6), 'maxSeconds': round(longest, 6)}
+                for site, (count, total, longest) in sites
+            ],
+        }
+
+class TrackedConnection:
+    """连接代理: 关闭(归还连接池)时记录占用时间, 创建的游标记录语句耗时, 其余属性直接转发给连接"""
+
+    def __init__(self, conn, pool: InstrumentedPool, site: str, acquired: float):
+        self._conn = conn
+        self._pool = pool
+        self._site = site
+        self._acquired = acquired
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def _record(self):
+        if not self._recorded:
+            self._recorded = True
+            self._pool._released(self._site, time.perf_counter() - self._acquired)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        return TimedCursor(cursor, STATEMENTS) if sql_stats else cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._record()
+        self._conn.close()
+
+def instrumentPool(pool):
+    """为连接池加上统计代理, 已代理的连接池原样返回"""
+    if isinstance(pool, InstrumentedPool):
+        return pool
+    return InstrumentedPool(pool)
+
+def tuneCursor(cur, arraysize: int = None, prefetchrows: int = None):
+    """设置游标的读取参数, 需在execute之前调用
+
+    Args:
+        arraysize (int): 每次往返读取的行数, 大结果集调大可减少往返次数
+        prefetchrows (int): execute时随语句一并返回的行数, 小查询设为预期行数+1可在一次往返内完成
+    """
+    if arraysize is not None:
+        cur.arraysize = arraysize
+    if prefetchrows is not None:
+        cur.prefetchrows = prefetchrows
+    return cur
 
-def executeQuery(pool: oracledb.ConnectionPool, sql: str, params = None):
+def iterQuery(pool: oracledb.ConnectionPool, sql: str, params = None, arraysize: int = ARRAYSIZE,
+              prefetchrows: int = None, batch: bool = False, columns: list = None):
+    """流式执行查询, 逐行(或按批)产出结果, 内存占用只与 arraysize 有关
+
+    迭代期间占用一个连接, 迭代结束或生成器关闭时归还; 出错时记录日志后抛出异常,
+    避免调用方把读到一半的结果当作完整结果。
+
+    Args:
+        arraysize (int): 每批读取的行数
+        prefetchrows (int): execute时预取的行数, 默认与 arraysize 相同
+        batch (bool): 为True时每次产出一批行(list), 否则逐行产出
+        columns (list): 传入空列表时填入结果集的字段名
+    """
     try:
         with pool.acquire() as conn:
             with conn.cursor() as cur:
+                tuneCursor(cur, arraysize, arraysize if prefetchrows is None else prefetchrows)
+                cur.execute(sql, params)
+                if columns is not None:
+                    columns[:] = [col[0] for col in cur.description]
+                while True:
+                    rows = cur.fetchmany(arraysize)
+                    if not rows:
+                        break
+                    if batch:
+                        yield rows
+                    else:
+                        yield from rows
+    except Exception as e:
+        logger.error(f'执行SQL语句失败: {e}, sql: {sql}, params: {params}')
+        raise
+
+def executeQuery(pool: oracledb.ConnectionPool, sql: str, params = None,
+                 arraysize: int = None, prefetchrows: int = None):
+    try:
+        with pool.acquire() as conn:
+            with conn.cursor() as cur:
+                tuneCursor(cur, arraysize, prefetchrows)
                 cur.execute(sql, params)
                 res = cur.fetchall()
         return res
@@ -48,29 +265,66 @@ def executeNonQuery(pool: oracledb.ConnectionPool, sql: str, params = None):
     except Exception as e:
         logger.error(f'执行SQL语句失败: {e}, sql: {sql}, params: {params}')
 
-def executeQueryAsDict(pool: oracledb.ConnectionPool, sql: str, params = None):
+def executeMany(pool: oracledb.ConnectionPool, sql: str, rows: list, batch_size: int = BATCH_SIZE,
+                label: str = None) -> list:
+    """批量执行DML, 每批使用一次 executemany(数组绑定)并提交一次
+
+    使用 batcherrors, 个别行出错时其余行照常写入, 出错的行记录日志并返回。
+
+    Args:
+        rows (list): 绑定参数列表, 每个元素为一行的字典或元组
+        batch_size (int): 每批的行数
+        label (str): 日志中使用的名称, 默认为SQL语句
+
+    Returns:
+        list: 失败的行, 每项为 (行号, 错误信息); 整批失败时该批所有行都计入, 连接异常时尚未提交的行都计入
+    """
+    if not rows:
+        return []
+    label = label or sql
+    failed = []
+    # 已提交或已整批计入失败的行数, 连接异常时只有其后的行计入失败
+    done = 0
+    start = time.perf_counter()
     try:
         with pool.acquire() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, params)
-                res = cur.fetchall()
-                columns = [col[0] for col in cur.description]
-                dict_res = [dict(zip(columns, row)) for row in res]
-        return dict_res
+                for offset in range(0, len(rows), batch_size):
+                    chunk = rows[offset:offset + batch_size]
+                    mark = len(failed)
+                    try:
+                        cur.executemany(sql, chunk, batcherrors=True)
+                        for error in cur.getbatcherrors():
+                            failed.append((offset + error.offset, error.message))
+                        conn.commit()
+                    except Exception as e:
+                        del failed[mark:]
+                        failed.extend((offset + i, str(e)) for i in range(len(chunk)))
+                        done = offset + len(chunk)
+                        conn.rollback()
+                    done = offset + len(chunk)
     except Exception as e:
-        logger.error(f'执行SQL语句失败: {e}, sql: {sql}, params: {params}')
-        return None
-        
-def executeQueryAsDict(pool: oracledb.ConnectionPool, sql: str, params=None):
+        failed = [item for item in failed if item[0] < done]
+        failed.extend((i, str(e)) for i in range(done, len(rows)))
+    elapsed = time.perf_counter() - start
+    for index, message in failed:
+        logger.error(f'批量写入失败: {message}, {label}, 行: {rows[index]}')
+    written = len(rows) - len(failed)
+    logger.info(f'批量写入完成: {label}, 成功 {written} 行, 失败 {len(failed)} 行, '
+                f'耗时 {elapsed:.3f}s, {written / elapsed if elapsed > 0 else 0:.0f} 行/秒')
+    return failed
+
+def executeQueryAsDict(pool: oracledb.ConnectionPool, sql: str, params = None,
+                       arraysize: int = None, prefetchrows: int = None):
     try:
         with pool.acquire() as conn:
             with conn.cursor() as cur:
+                tuneCursor(cur, arraysize, prefetchrows)
                 cur.execute(sql, params)
                 res = cur.fetchall()
                 columns = [col[0] for col in cur.description]
                 dict_res = [dict(zip(columns, row)) for row in res]
         return dict_res
     except Exception as e:
-        logger.error(f"执行SQL语句失败: {e}, sql: {sql}, params: {params}")
+        logger.error(f'执行SQL语句失败: {e}, sql: {sql}, params: {params}')
         return None
-    
\ No newline at end of file
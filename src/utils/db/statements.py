@@ -0,0 +1,234 @@
+import re
+import threading
+import time
+
+import src.config.config as config
+from src.utils.logger import logger
+
+# 超过该耗时(秒, 执行+读取)的语句写入慢查询日志
+SLOW_THRESHOLD = getattr(config, 'SQL_SLOW_THRESHOLD', 1.0)
+# 最多统计的语句指纹数, 超出后归入 OTHER
+MAX_FINGERPRINTS = getattr(config, 'SQL_STATS_MAX_FINGERPRINTS', 500)
+OTHER = '<other>'
+# 估算读取字节数时抽样的行数
+SAMPLE_ROWS = 50
+# 慢查询日志中SQL的最大长度
+MAX_SQL_LOG = 2000
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_BIND = re.compile(r':\s*\w+')
+_NUMBER = re.compile(r'(?<![\w.])\d+(?:\.\d+)?(?![\w.])')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*(?::\?|\?)(?:\s*,\s*(?::\?|\?))*\s*\)', re.I)
+_SPACE = re.compile(r'\s+')
+_UNION_ALL = re.compile(r'\s+UNION\s+ALL\s+', re.I)
+_FROM_TABLE = re.compile(r'\bFROM\s+([\w$#.]+)', re.I)
+
+
+def fingerprint(sql: str):
+    """将SQL归一化为指纹, 去掉注释、字面量和绑定变量名, IN 列表折叠为 (...)
+
+    由同一模板按多张表拼接的 UNION ALL 语句(如 generateSqlQuery)去掉表名后合并为一个分支,
+    使不同表组合的查询归为同一指纹。
+
+    Returns:
+        tuple: (指纹, UNION ALL 分支涉及的表名列表)
+    """
+    text = _COMMENT.sub(' ', sql)
+    text = _STRING.sub('?', text)
+    text = _BIND.sub(':?', text)
+    text = _NUMBER.sub('?', text)
+    text = _IN_LIST.sub('IN (...)', text)
+    text = _SPACE.sub(' ', text).strip().upper()
+    branches = _UNION_ALL.split(text)
+    if len(branches) == 1:
+        return text, []
+    tables = [match.group(1) for match in (_FROM_TABLE.search(branch) for branch in branches) if match]
+    templates = []
+    for branch in branches:
+        template = _FROM_TABLE.sub('FROM ?', branch, count=1)
+        if template not in templates:
+            templates.append(template)
+    return ' UNION ALL '.join(templates) + ' UNION ALL ...', tables
+
+
+def estimateRowBytes(rows) -> float:
+    """按抽样行估算每行字节数, 字符串/字节按长度, 其余按8字节计"""
+    sample = rows[:SAMPLE_ROWS]
+    if not sample:
+        return 0
+    total = 0
+    for row in sample:
+        for value in row:
+            total += len(value) if isinstance(value, (str, bytes)) else 8
+    return total / len(sample)
+
+
+class StatementStats:
+    """按SQL指纹汇总的语句统计: 次数、错误、执行/读取耗时、行数与字节数, 以及慢查询日志"""
+
+    FIELDS = ('count', 'errors', 'executeSeconds', 'fetchSeconds', 'maxSeconds', 'rows', 'bytes', 'slow')
+
+    def __init__(self, slow_threshold: float = SLOW_THRESHOLD, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.slow_threshold = slow_threshold
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._stats = {}
+        # 原始SQL -> (指纹, 表名列表), 语句文本通常只有有限几种
+        self._fingerprints = {}
+
+    def fingerprint(self, sql: str):
+        cached = self._fingerprints.get(sql)
+        if cached is None:
+            cached = fingerprint(sql)
+            if len(self._fingerprints) < self.max_fingerprints * 4:
+                self._fingerprints[sql] = cached
+        return cached
+
+    def record(self, sql: str, params, execute_seconds: float, fetch_seconds: float, rows: int,
+               nbytes: float, error: bool = False):
+        key, tables = self.fingerprint(sql)
+        total = execute_seconds + fetch_seconds
+        slow = total >= self.slow_threshold
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = OTHER
+                    entry = self._stats.get(key)
+                if entry is None:
+                    entry = self._stats[key] = dict.fromkeys(self.FIELDS, 0)
+                    entry['tables'] = set()
+            entry['count'] += 1
+            entry['errors'] += int(error)
+            entry['executeSeconds'] += execute_seconds
+            entry['fetchSeconds'] += fetch_seconds
+            entry['rows'] += rows
+            entry['bytes'] += nbytes
+            entry['slow'] += int(slow)
+            if total > entry['maxSeconds']:
+                entry['maxSeconds'] = total
+            entry['tables'].update(tables)
+        if slow:
+            text = sql if len(sql) <= MAX_SQL_LOG else sql[:MAX_SQL_LOG] + '...'
+            logger.warning(f'慢查询: 执行 {execute_seconds:.3f}s, 读取 {fetch_seconds:.3f}s, {rows} 行, '
+                           f'约 {int(nbytes)} 字节, sql: {_SPACE.sub(" ", text)}, params: {params}')
+
+    def stats(self, top: int = 20, sort: str = 'totalSeconds') -> list:
+        """返回按 sort 排序的前 top 个指纹的汇总"""
+        with self._lock:
+            items = [(key, dict(entry, tables=sorted(entry['tables']))) for key, entry in self._stats.items()]
+        result = []
+        for key, entry in items:
+            total = entry['executeSeconds'] + entry['fetchSeconds']
+            result.append({
+                'fingerprint': key,
+                **entry,
+                'executeSeconds': round(entry['executeSeconds'], 6),
+                'fetchSeconds': round(entry['fetchSeconds'], 6),
+                'maxSeconds': round(entry['maxSeconds'], 6),
+                'totalSeconds': round(total, 6),
+                'avgSeconds': round(total / entry['count'], 6),
+                'bytes': int(entry['bytes']),
+            })
+        result.sort(key=lambda item: item.get(sort, 0), reverse=True)
+        return result[:top]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+STATEMENTS = StatementStats()
+
+
+class TimedCursor:
+    """游标代理: 记录每条语句的执行耗时、读取耗时、行数和估算字节数
+
+    一条语句在下一次 execute 或游标关闭时结束统计; 其余属性(包括赋值)直接转发给游标。
+    """
+
+    def __init__(self, cursor, stats: StatementStats = STATEMENTS):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_stats', stats)
+        object.__setattr__(self, '_current', None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def _begin(self, sql, params):
+        self._finish()
+        # [sql, params, 执行耗时, 读取耗时, 行数, 字节数, 是否出错]
+        object.__setattr__(self, '_current', [sql, params, 0.0, 0.0, 0, 0.0, False])
+
+    def _finish(self):
+        current = self._current
+        if current is not None:
+            object.__setattr__(self, '_current', None)
+            self._stats.record(*current)
+
+    def _run(self, method, sql, params, *args, **kwargs):
+        self._begin(sql, params)
+        start = time.perf_counter()
+        try:
+            return method(sql, params, *args, **kwargs)
+        except Exception:
+            self._current[6] = True
+            raise
+        finally:
+            self._current[2] = time.perf_counter() - start
+
+    def execute(self, sql, params=None, **kwargs):
+        self._run(self._cursor.execute, sql, params, **kwargs)
+        # oracledb 的 execute 对查询语句返回游标本身
+        return self if self._cursor.description is not None else None
+
+    def executemany(self, sql, params, **kwargs):
+        result = self._run(self._cursor.executemany, sql, params, **kwargs)
+        if self._current is not None:
+            self._current[1] = f'<{len(params)} 行>' if hasattr(params, '__len__') else params
+            self._current[4] = self._cursor.rowcount or 0
+        return result
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        rows = method(*args)
+        current = self._current
+        if current is not None:
+            current[3] += time.perf_counter() - start
+            if isinstance(rows, list):
+                current[4] += len(rows)
+                current[5] += estimateRowBytes(rows) * len(rows)
+            elif rows is not None:
+                current[4] += 1
+                current[5] += estimateRowBytes([rows])
+        return rows
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._fetch(lambda: self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self._cursor.arraysize)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,253 @@
+"""嵌入式后端的表结构与合成数据
+
+影像元数据表按 config.satelliteToNodeId 中的 卫星_传感器 命名(与前端 nodeName 一致), 并为每颗卫星
+建立汇总其各传感器表的视图 TB_META_<卫星>; 景框为中国范围内随机分布、略有旋转的四边形。
+行政区划按 省(8x4网格)/市(3x3)/县(2x2) 逐级切分全国范围, 代码为 156 + 6位区划码。
+订单、订单数据、订阅、用户等表只包含业务代码读写的字段。
+"""
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.utils.db.embedded import toText
+
+# 合成数据的经纬度范围, 即全国(156000000)的范围
+EXTENT = (75.0, 20.0, 130.0, 48.0)
+PROVINCE_GRID = (8, 4)
+CITY_GRID = (3, 3)
+COUNTY_GRID = (2, 2)
+# 景框半宽(度)
+HALF_SPAN = (0.15, 0.3)
+METHODS = ['线下拷贝', '在线下载']
+
+META_COLUMNS = ['F_DATANAME', 'F_DID', 'F_SCENEROW', 'F_LOCATION', 'F_PRODUCTID', 'F_PRODUCTLEVEL',
+                'F_CLOUDPERCENT', 'F_TABLENAME', 'F_DATATYPENAME', 'F_ORBITID', 'F_PRODUCETIME', 'F_SENSORID',
+                'F_DATASIZE', 'F_RECEIVETIME', 'F_DATAID', 'F_SATELLITEID', 'F_SCENEPATH', 'F_TOPLEFTLONGITUDE',
+                'F_TOPLEFTLATITUDE', 'F_BOTTOMRIGHTLONGITUDE', 'F_BOTTOMRIGHTLATITUDE', 'F_SPATIAL_INFO']
+ORDER_COLUMNS = [
+    'F_ID', 'F_ORDERNAME', 'F_ORDERCODE', 'F_CREATTIME', 'F_UPDATETIME', 'F_USERID', 'F_DISTFREQUENCY',
+    'F_STARTTIME', 'F_ENDTIME', 'F_STATUS', 'F_DISTMETHOD', 'F_TYPE', 'F_DESCRIPTION', 'F_PATHRULE',
+    'F_QUERY', 'F_DELAYTIME', 'F_SITENAME', 'F_ISCREATED', 'F_LEVEL', 'F_APPLYUSER', 'F_APPLYUSERPHONE',
+    'F_APPLYUSERUSED', 'F_APPLYUSERUNIT', 'F_DATATYPE', 'F_LEFTUPLONGITUDE', 'F_LEFTUPIMENSION',
+    'F_RIGHTDOWNLONGITUDE', 'F_RIGHTDOWNIMENSION', 'F_SPACETYPE', 'F_COUNTRYSPACE', 'F_PROVINCESPACE',
+    'F_CITYSPACE', 'F_TOWNSSPACE', 'F_SHPPATH', 'F_SATELLITE', 'F_SENSOR', 'F_CLOUDAMOUNT', 'F_SATLEVEL',
+    'F_USER_CARDID', 'F_GET_METHOD', 'F_PRODUCT_NAME', 'F_DATA_SUM', 'F_EXPECTED_APPLICATION_EFFECT',
+    'F_LOGIN_USER', 'DOWNLOD_PATH_FILE', 'F_CAUSE', 'F_PUSH_ID', 'F_DATA_TYPE_ID', 'F_GEOMETRY_ID',
+    'F_EXECUTE_TIME', 'F_TASK_STATUS', 'F_ORDER', 'F_PROCESS_DESCRIBE', 'F_ASSIGNMENT', 'F_DATACOUNT',
+    'F_SYSTEMTYPE', 'F_JDDM', 'F_TYFILEDOWN', 'F_PASSWORD', 'F_TYORDERID', 'F_TYOTHERINFO', 'F_ORDERLOG',
+    'F_TALLYGAG', 'F_NDWAY', 'F_ORDER_STATUS', 'F_RESPONSESPEED', 'F_SERVICEATTITUDE', 'F_FEEDBACKUPLOAD',
+    'F_MODIFYTYPE', 'F_SUBASSIGNMENT', 'F_EXTRACTINGELEMENTS', 'F_FEEDBACK', 'F_APPRAISE', 'F_SYNC',
+    'F_AUDITOR', 'F_DATASIZEKB', 'F_REPORTED']
+ORDERDATA_COLUMNS = [
+    'F_ID', 'F_ORDERID', 'F_DATANAME', 'F_SATELITE', 'F_SENSOR', 'F_RECEIVETIME', 'F_DATASIZE',
+    'F_DATASOURCE', 'F_STATUS', 'F_DATAPATH', 'F_TASKID', 'F_DATATYPE', 'F_NODEID', 'F_DOCNUM',
+    'F_DATAID', 'F_TM', 'F_FEEDBACK_CUSTOM_STATUS', 'F_FEEDBACK_OTHER_REQUEST',
+    'F_FEEDBACK_TREAT_TIME', 'F_WKTRESPONSE', 'F_PRODUCTLEVEL', 'F_DOCNUM_OLD', 'F_NODENAME',
+    'F_SGTABLENAME', 'F_DID', 'F_PUSH_STATUS', 'F_PUSH_START', 'F_PUSH_FINISH',
+    'F_TRANSFER_STATUS', 'F_ORDER_TASK_ID', 'F_TRANSFER_COUNT', 'F_RECEIVE_STATUS',
+    'F_PRODUCTID', 'F_SCENEID', 'F_CLOUDPERCENT', 'F_ORDER', 'F_ORBITID', 'F_SCENEPATH',
+    'F_SCENEROW', 'F_ISASK', 'F_LOG', 'F_SYNC', 'F_SENDMQ']
+SUBSCRIBE_DATA_COLUMNS = [
+    'F_ID', 'F_ORDERID', 'F_DATANAME', 'F_SATELITE', 'F_SENSOR', 'F_RECEIVETIME', 'F_DATASIZE',
+    'F_DATASOURCE', 'F_STATUS', 'F_DATAPATH', 'F_DATATYPE', 'F_NODEID', 'F_DATAID', 'F_DOCNUM', 'F_TM',
+    'F_PRODUCTLEVEL', 'F_WKTRESPONSE', 'F_NODENAME', 'F_DOCNUM_OLD', 'F_CLOUDPERCENT', 'F_SGTABLENAME',
+    'F_DID', 'F_ORBITID', 'F_SCENEPATH', 'F_SCENEROW']
+SHOP_COLUMNS = [
+    'F_ID', 'F_USERID', 'F_DATANAME', 'F_SATELITE', 'F_SENSOR', 'F_RECEIVETIME', 'F_DATASIZE',
+    'F_FAVORITETIME', 'F_DATASOURCE', 'F_DATAPATH', 'F_DATATYPE', 'F_NODEID', 'F_DATAID', 'F_DOCNUM', 'F_TM',
+    'F_DATATYPENAME', 'F_PRODUCTLEVEL', 'F_IMAGEURL', 'F_WKTRESPONSE', 'F_NODENAME', 'F_DOCNUM_OLD',
+    'F_CLOUDPERCENT', 'F_LOCATION', 'F_SGTABLENAME', 'F_DID', 'F_ORBITID', 'F_SCENEPATH', 'F_SCENEROW',
+    'F_SYSTEMTYPE']
+TABLES = {
+    'TF_ORDER': ORDER_COLUMNS,
+    'TF_ORDER_TEST': ORDER_COLUMNS,
+    'TF_ORDERDATA': ORDERDATA_COLUMNS,
+    'SUBSCRIBE_ORDER': ['SUBID', 'USERID', 'AREACODE', 'WKT', 'ISWKT', 'NODENAMES', 'CLOUDPERCENT', 'SUBTIME',
+                        'SUBSTARTTIME', 'SUBENDTIME', 'STATUS'],
+    'SUBSCRIBE_ORDERDATA': SUBSCRIBE_DATA_COLUMNS,
+    'TF_SHOP': SHOP_COLUMNS,
+    'TC_DISTRICT': ['F_DISTCODE', 'F_NAME', 'GEOM'],
+    'TC_SYS_USER': ['F_ID', 'F_LOGINNAME', 'F_EMAIL'],
+    'SATELLITESINFO': ['ID', 'SATELLITES_NAME', 'IMAGE_URL', 'DESCRIPTION'],
+    'FTP_SUUSERS': ['"StatisticsStartTime"', '"RtServerStartTime"', '"RtDailyCount"', '"LoginID"',
+                    '"PasswordChangedOn"', '"PasswordEncryptMode"', '"PasswordUTF8"', '"Password"', '"Type"',
+                    '"ExpiresOn"', '"HomeDir"', '"IncludeRespCodesInMsgFiles"', '"ODBCVersion"', '"Quota"'],
+    'FTP_USERDIRACCESS': ['"LoginID"', '"SortIndex"', '"Dir"', '"Access"'],
+    'DUAL': ['DUMMY'],
+}
+# 声明类型决定读出时的转换(DATE/TIMESTAMP/SDO_GEOMETRY)和SQLite的类型亲和性
+TYPES = {
+    'F_CREATTIME': 'TIMESTAMP', 'F_UPDATETIME': 'TIMESTAMP',
+    'F_RECEIVETIME': 'DATE', 'F_PRODUCETIME': 'DATE', 'F_FAVORITETIME': 'DATE',
+    'SUBTIME': 'DATE', 'SUBSTARTTIME': 'DATE', 'SUBENDTIME': 'DATE',
+    'F_SPATIAL_INFO': 'SDO_GEOMETRY', 'GEOM': 'SDO_GEOMETRY',
+}
+NUMBER_COLUMNS = {
+    'F_ID', 'F_ORDERID', 'F_USERID', 'F_STATUS', 'F_DATACOUNT', 'F_DID', 'F_CLOUDPERCENT', 'F_DATASIZE',
+    'F_ORBITID', 'F_SCENEPATH', 'F_SCENEROW', 'F_TOPLEFTLONGITUDE', 'F_TOPLEFTLATITUDE',
+    'F_BOTTOMRIGHTLONGITUDE', 'F_BOTTOMRIGHTLATITUDE', 'USERID', 'ISWKT', 'CLOUDPERCENT', 'STATUS', 'ID',
+}
+INDEXES = [
+    ('TF_ORDER', 'F_ORDERNAME'), ('TF_ORDER', 'F_STATUS, F_CREATTIME'), ('TF_ORDER_TEST', 'F_ID'),
+    ('TF_ORDERDATA', 'F_ORDERID, F_STATUS'), ('TF_ORDERDATA', 'F_ID'), ('TC_DISTRICT', 'F_DISTCODE'),
+    ('SUBSCRIBE_ORDER', 'SUBID'), ('TC_SYS_USER', 'F_ID'),
+]
+
+
+def columnType(column: str) -> str:
+    name = column.strip('"').upper()
+    return TYPES.get(name) or ('NUMBER' if name in NUMBER_COLUMNS else 'VARCHAR2')
+
+
+def createTable(conn, table: str, columns: list):
+    conn.execute(f'CREATE TABLE {table} ({", ".join(f"{c} {columnType(c)}" for c in columns)})')
+
+
+def metaTables(satellites: dict) -> dict:
+    """{卫星: [卫星_传感器表名, ...]}"""
+    return {satellite: [f'{satellite}_{sensor}'.upper() for sensor in sensors]
+            for satellite, sensors in satellites.items()}
+
+
+def boxWkt(minx: float, miny: float, maxx: float, maxy: float) -> str:
+    return f'POLYGON (({minx} {miny}, {maxx} {miny}, {maxx} {maxy}, {minx} {maxy}, {minx} {miny}))'
+
+
+def split(bounds: tuple, grid: tuple) -> list:
+    minx, miny, maxx, maxy = bounds
+    cols, rows = grid
+    width, height = (maxx - minx) / cols, (maxy - miny) / rows
+    return [(minx + c * width, miny + r * height, minx + (c + 1) * width, miny + (r + 1) * height)
+            for r in range(rows) for c in range(cols)]
+
+
+def districtRows() -> list:
+    rows = [('156000000', '全国', boxWkt(*EXTENT))]
+    for p, province in enumerate(split(EXTENT, PROVINCE_GRID)[:31]):
+        prov = f'{p + 11:02d}'
+        rows.append((f'156{prov}0000', f'省{prov}', boxWkt(*province)))
+        for c, city in enumerate(split(province, CITY_GRID)):
+            code = f'{prov}{c + 1:02d}'
+            rows.append((f'156{code}00', f'市{code}', boxWkt(*city)))
+            for k, county in enumerate(split(city, COUNTY_GRID)):
+                rows.append((f'156{code}{k + 1:02d}', f'县{code}{k + 1:02d}', boxWkt(*county)))
+    return rows
+
+
+def sceneRows(table: str, satellite: str, sensor: str, rows: int, start: datetime, end: datetime,
+              first_id: int, seed: int) -> list:
+    """生成 rows 个景, 列顺序与 META_COLUMNS 一致"""
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = EXTENT
+    cx, cy = rng.uniform(minx, maxx, rows), rng.uniform(miny, maxy, rows)
+    half = rng.uniform(*HALF_SPAN, rows)
+    angle = rng.uniform(-0.2, 0.2, rows)
+    seconds = rng.uniform(0, (end - start).total_seconds(), rows)
+    cloud = rng.integers(0, 101, rows)
+    size = rng.uniform(100, 2000, rows).round(2)
+    corners = [(-1, -1), (1, -1), (1, 1), (-1, 1), (-1, -1)]
+    result = []
+    for i in range(rows):
+        cos, sin = np.cos(angle[i]), np.sin(angle[i])
+        points = [(cx[i] + half[i] * (x * cos - y * sin), cy[i] + half[i] * (x * sin + y * cos)) for x, y in corners]
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        received = start + timedelta(seconds=int(seconds[i]))
+        did = first_id + i
+        wkt = 'POLYGON ((' + ', '.join(f'{x:.6f} {y:.6f}' for x, y in points) + '))'
+        result.append((
+            f'{satellite}_{sensor}_{received:%Y%m%d}_{did:08d}', did, int(i % 200), f'{cx[i]:.2f},{cy[i]:.2f}',
+            f'P{did:08d}', 'L1A', int(cloud[i]), table, '多光谱', int(did % 50000), toText(received),
+            sensor, float(size[i]), toText(received), str(did), satellite, int(i % 300),
+            min(xs), max(ys), max(xs), min(ys), wkt,
+        ))
+    return result
+
+
+def populate(conn, satellites: dict = None, scenes: int = 20000, orders: int = 2000, users: int = 50,
+             subscriptions: int = 20, years: int = 4, seed: int = 0) -> dict:
+    """建表并写入合成数据, 返回 {表名: 行数}
+
+    Args:
+        satellites (dict): {卫星: {传感器: 节点号}}, 默认取 config.satelliteToNodeId
+        scenes (int): 每个影像元数据表的景数
+        orders (int): 订单数, 每个订单 1~5 条订单数据
+        years (int): 景和订单分布在截至当前的最近若干年内
+    """
+    if satellites is None:
+        from src.config.config import satelliteToNodeId
+        satellites = satelliteToNodeId
+    rnd = random.Random(seed)
+    counts = {}
+    end = datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=365 * years)
+    with conn:
+        for table, columns in TABLES.items():
+            createTable(conn, table, columns)
+        for table, columns in INDEXES:
+            conn.execute(f'CREATE INDEX IX_{table}_{columns.split(",")[0]} ON {table} ({columns})')
+        conn.execute("INSERT INTO DUAL VALUES ('X')")
+
+        scene_names = []
+        for satellite, tables in metaTables(satellites).items():
+            for sensor, table in zip(satellites[satellite], tables):
+                createTable(conn, table, META_COLUMNS)
+                conn.execute(f'CREATE INDEX IX_{table}_TIME ON {table} (F_RECEIVETIME)')
+                rows = sceneRows(table, satellite, sensor, scenes, start, end, len(scene_names) + 1,
+                                 seed + len(scene_names))
+                conn.executemany(f'INSERT INTO {table} VALUES ({", ".join("?" * len(META_COLUMNS))})', rows)
+                scene_names.extend(row[0] for row in rows)
+                counts[table] = len(rows)
+            union = ' UNION ALL '.join(f'SELECT * FROM {table}' for table in tables)
+            conn.execute(f'CREATE VIEW TB_META_{satellite.upper()} AS {union}')
+
+        districts = districtRows()
+        conn.executemany('INSERT INTO TC_DISTRICT VALUES (?, ?, ?)', districts)
+        counts['TC_DISTRICT'] = len(districts)
+
+        conn.executemany('INSERT INTO TC_SYS_USER VALUES (?, ?, ?)',
+                         [(i, f'user{i}', f'user{i}@example.com') for i in range(1, users + 1)])
+        conn.executemany('INSERT INTO SATELLITESINFO VALUES (?, ?, ?, ?)',
+                         [(i, name, f'satellite/{name}.jpg', f'{name} 卫星') for i, name in enumerate(satellites, 1)])
+
+        order_rows, data_rows = [], []
+        for order_id in range(1, orders + 1):
+            created = start + timedelta(seconds=rnd.uniform(0, (end - start).total_seconds()))
+            count = rnd.randint(1, 5)
+            order = dict.fromkeys(ORDER_COLUMNS)
+            order.update({
+                'F_ID': order_id, 'F_ORDERNAME': f'DD{created:%Y%m%d}{order_id:06d}', 'F_CREATTIME': toText(created),
+                'F_UPDATETIME': toText(created + timedelta(hours=rnd.randint(1, 72))) if rnd.random() < 0.7 else None,
+                'F_USERID': rnd.randint(1, users),
+                'F_STATUS': rnd.choices([-1, 0, 1, 2, 3, 4, 5, 6], weights=[2, 2, 3, 2, 10, 60, 3, 18])[0],
+                'F_GET_METHOD': rnd.choice(METHODS), 'F_DATACOUNT': count if rnd.random() < 0.9 else None,
+                'F_DATA_SUM': f'{rnd.randint(1, 900)}M' if rnd.random() < 0.8 else f'{rnd.randint(1, 50)}G',
+                'F_PRODUCT_NAME': '测试订单' if rnd.random() < 0.05 else '影像订单',
+            })
+            order_rows.append(order)
+            for k in range(count):
+                name = rnd.choice(scene_names) if scene_names else f'SCENE_{order_id}_{k}'
+                data = dict.fromkeys(ORDERDATA_COLUMNS)
+                data.update({'F_ID': order_id * 10 + k, 'F_ORDERID': order_id, 'F_DATANAME': name,
+                             'F_STATUS': rnd.choice([0, 1]), 'F_RECEIVETIME': toText(created)})
+                data_rows.append(data)
+        conn.executemany(f'INSERT INTO TF_ORDER VALUES ({", ".join(":" + c for c in ORDER_COLUMNS)})', order_rows)
+        conn.executemany(f'INSERT INTO TF_ORDERDATA VALUES ({", ".join(":" + c for c in ORDERDATA_COLUMNS)})',
+                         data_rows)
+        counts['TF_ORDER'], counts['TF_ORDERDATA'] = len(order_rows), len(data_rows)
+
+        tables = [table for names in metaTables(satellites).values() for table in names]
+        province_codes = [code for code, _, _ in districts if code.endswith('0000') and code != '156000000']
+        subscription_rows = []
+        for i in range(1, subscriptions + 1):
+            sub_start = end - timedelta(days=rnd.randint(30, 365))
+            # 一半订阅已到期且未处理, 供订阅处理任务使用
+            sub_end = end - timedelta(days=rnd.randint(1, 10)) if i % 2 else end + timedelta(days=rnd.randint(1, 90))
+            subscription_rows.append((
+                f'{sub_start:%Y%m%d}DY{i:05d}', rnd.randint(1, users), rnd.choice(province_codes), None, 0,
+                ','.join(rnd.sample(tables, k=rnd.randint(1, len(tables)))), 30,
+                toText(sub_start), toText(sub_start), toText(sub_end), 0,
+            ))
+        conn.executemany('INSERT INTO SUBSCRIBE_ORDER VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', subscription_rows)
+        counts['SUBSCRIBE_ORDER'] = len(subscription_rows)
+    return counts
@@ -1,5 +1,6 @@
 import logging
 import datetime
+import os
 import queue
 import time
 import threading
@@ -58,6 +59,19 @@ class RetryingFileHandler(logging.FileHandler):
             # logger.error(f"无法重新打开日志文件流: {e}")
             self.stream = None
 
+    def write_pending(self):
+        """将待写日志写入文件, 写入失败的日志留待下次重试"""
+        with self._lock:
+            while self._pending_logs:
+                log_msg = self._pending_logs[0]
+                try:
+                    self.stream.write(log_msg + '\n')
+                    self.stream.flush()
+                    self._pending_logs.pop(0)
+                except Exception as e:
+                    self._reopen_stream()  # 如果写入失败，则尝试重新打开文件流
+                    break
+
     def _flush_loop(self):
         while self._running:
             try:
@@ -68,17 +82,7 @@ class RetryingFileHandler(logging.FileHandler):
                     time.sleep(self.retry_interval)
                     continue
 
-                with self._lock:
-                    while self._pending_logs:
-                        log_msg = self._pending_logs[0]
-                        try:
-                            self.stream.write(log_msg + '\n')
-                            self.stream.flush()
-                            self._pending_logs.pop(0)
-                        except Exception as e:
-                            self._reopen_stream()  # 如果写入失败，则尝试重新打开文件流
-                            break
-
+                self.write_pending()
                 time.sleep(self.retry_interval)
             except Exception as e:
                 logger.error(f"处理日志时发生错误，等待下一次重试。错误：{e}")
@@ -115,6 +119,27 @@ def debug(message):
 def error(message):
     logger.error(message)
 
+def _reinit_after_fork():
+    """fork 出的子进程(多进程Web服务)中没有父进程的日志线程, 重新创建队列、监听线程和文件重试线程"""
+    global log_queue, listener
+    file_handler._lock = threading.Lock()
+    file_handler._pending_logs = []
+    file_handler._start_retry_thread()
+    log_queue = queue.Queue(-1)
+    queue_handler.queue = log_queue
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+
+os.register_at_fork(after_in_child=_reinit_after_fork)
+
+def stop_listener():
+    """停止当前进程的日志监听线程并写出队列中的日志, 用于不执行 atexit 直接退出(os._exit)的子进程"""
+    listener.stop()
+    if file_handler.stream is None:
+        file_handler._reopen_stream()
+    if file_handler.stream is not None:
+        file_handler.write_pending()
+
 # 确保程序退出时停止监听器
 import atexit
 atexit.register(listener.stop)
@@ -0,0 +1,94 @@
+import bisect
+import json
+import threading
+import time
+
+from src.utils.logger import logger
+
+
+def startPeriodicReport(name: str, collect, interval: int):
+    """启动后台线程, 每隔 interval 秒将 collect() 的结果以JSON形式写入日志
+
+    Args:
+        name (str): 日志前缀, 用于区分不同的统计
+        collect: 无参函数, 返回可JSON序列化的统计数据
+        interval (int): 间隔秒数, 小于等于0时不启动
+
+    Returns:
+        threading.Thread: 后台线程, 未启动时返回None
+    """
+    if not interval or interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                logger.info(f'[{name}] {json.dumps(collect(), ensure_ascii=False, default=str)}')
+            except Exception as e:
+                logger.error(f'[{name}] 统计信息输出失败: {e}')
+
+    thread = threading.Thread(target=loop, name=f'report-{name}', daemon=True)
+    thread.start()
+    return thread
+
+
+# 默认的耗时分桶上界(秒)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """线程安全的固定分桶直方图, 用于统计耗时等分布
+
+    分位数按所在分桶的上界估算, 超出最大分桶时取观测到的最大值。
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def quantile(self, q: float, counts=None, total=None, maximum=None) -> float:
+        """估算分位数 q(0~1), 没有观测值时返回None"""
+        if counts is None:
+            with self._lock:
+                counts, total, maximum = list(self._counts), self._count, self._max
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else maximum
+        return maximum
+
+    def snapshot(self) -> dict:
+        """返回计数、总和、最大值、累计分桶计数(le -> count)及 p50/p90/p99 估算"""
+        with self._lock:
+            counts, total, total_sum, maximum = list(self._counts), self._count, self._sum, self._max
+        cumulative, seen = {}, 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            cumulative[bound] = seen
+        return {
+            'count': total,
+            'sum': round(total_sum, 6),
+            'max': round(maximum, 6),
+            'buckets': cumulative,
+            'p50': self.quantile(0.5, counts, total, maximum),
+            'p90': self.quantile(0.9, counts, total, maximum),
+            'p99': self.quantile(0.99, counts, total, maximum),
+        }
@@ -5,6 +5,7 @@ import re
 from gmssl.sm4 import CryptSM4, SM4_ENCRYPT, SM4_DECRYPT, PKCS7
 
 from src.utils.logger import logger
+from src.utils.sm4fast import SM4Engine
 
 # 封装一个工具类
 class SM4Util:
@@ -13,13 +14,18 @@ class SM4Util:
         self.iv = iv
         self.padding_mode = padding_mode
         self.crypt_sm4 = CryptSM4(padding_mode=self.padding_mode)
+        # PKCS7填充使用NumPy实现, 轮密钥只计算一次; 其他填充方式仍由 gmssl 处理
+        self.engine = SM4Engine(key) if padding_mode == PKCS7 else None
 
     def encrypt_ecb_base64(self, plain_text: str):
         if not plain_text:
             return None
         try:
-            self.crypt_sm4.set_key(self.key, SM4_ENCRYPT)
-            encrypted = self.crypt_sm4.crypt_ecb(plain_text.encode("utf-8"))
+            if self.engine is not None:
+                encrypted = self.engine.encrypt_ecb(plain_text.encode("utf-8"))
+            else:
+                self.crypt_sm4.set_key(self.key, SM4_ENCRYPT)
+                encrypted = self.crypt_sm4.crypt_ecb(plain_text.encode("utf-8"))
             cipher_text = base64.b64encode(encrypted).decode("utf-8")
             if cipher_text is not None and cipher_text.strip():
                 cipher_text = re.sub(r"[\s\t\r\n]+", "", cipher_text)
@@ -32,8 +38,11 @@ class SM4Util:
         if not cipher_text:
             return None
         try:
-            self.crypt_sm4.set_key(self.key, SM4_DECRYPT)
-            decrypted = self.crypt_sm4.crypt_ecb(base64.b64decode(cipher_text))
+            if self.engine is not None:
+                decrypted = self.engine.decrypt_ecb(base64.b64decode(cipher_text))
+            else:
+                self.crypt_sm4.set_key(self.key, SM4_DECRYPT)
+                decrypted = self.crypt_sm4.crypt_ecb(base64.b64decode(cipher_text))
             return decrypted.decode("utf-8")
         except Exception as e:
             logger.error("Exception occurred when decrypting data", exc_info=True)
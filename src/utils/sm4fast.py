@@ -0,0 +1,88 @@
+import numpy as np
+
+from gmssl.sm4 import SM4_BOXES_TABLE, SM4_FK, SM4_CK
+
+SBOX = np.array(SM4_BOXES_TABLE, dtype=np.uint32)
+BLOCK_SIZE = 16
+# 每批处理的分组数, 限制中间数组的内存占用(约 1MB 明文)
+BATCH_BLOCKS = 65536
+
+
+def _rotl(x, n):
+    return ((x << np.uint32(n)) | (x >> np.uint32(32 - n))) & np.uint32(0xffffffff)
+
+
+def _linear(b):
+    """加解密轮函数中的线性变换L"""
+    return b ^ _rotl(b, 2) ^ _rotl(b, 10) ^ _rotl(b, 18) ^ _rotl(b, 24)
+
+
+# T表: 字节在字中第 i 个位置时, 经S盒代换和线性变换L后的结果; L是线性的, 四个表异或即为整字的T变换
+T_TABLES = tuple(_linear(SBOX << np.uint32(24 - 8 * i)) for i in range(4))
+
+
+def _tau(x):
+    """非线性变换τ: 对字的四个字节做S盒代换"""
+    return (SBOX[x >> 24] << np.uint32(24)) | (SBOX[(x >> 16) & 0xff] << np.uint32(16)) \
+        | (SBOX[(x >> 8) & 0xff] << np.uint32(8)) | SBOX[x & 0xff]
+
+
+def expand_key(key: bytes) -> np.ndarray:
+    """计算32个加密轮密钥, 与 CryptSM4.set_key 一致"""
+    if len(key) != BLOCK_SIZE:
+        raise ValueError("SM4密钥长度必须为16字节")
+    mk = np.frombuffer(key, dtype=">u4").astype(np.uint32)
+    k = list(mk ^ np.array(SM4_FK, dtype=np.uint32))
+    rk = np.zeros(32, dtype=np.uint32)
+    for i in range(32):
+        t = _tau(np.uint32(k[i + 1] ^ k[i + 2] ^ k[i + 3] ^ np.uint32(SM4_CK[i])))
+        k.append(k[i] ^ t ^ _rotl(t, 13) ^ _rotl(t, 23))
+        rk[i] = k[i + 4]
+    return rk
+
+
+def crypt_blocks(data: bytes, round_keys: np.ndarray) -> bytes:
+    """对长度为16整数倍的数据做ECB加密或解密(由轮密钥顺序决定), 所有分组同时进行每一轮"""
+    if len(data) % BLOCK_SIZE:
+        raise ValueError("数据长度必须为16的整数倍")
+    words = np.frombuffer(data, dtype=">u4").astype(np.uint32).reshape(-1, 4)
+    out = np.empty_like(words)
+    t0, t1, t2, t3 = T_TABLES
+    for start in range(0, len(words), BATCH_BLOCKS):
+        x0, x1, x2, x3 = (words[start:start + BATCH_BLOCKS, i].copy() for i in range(4))
+        for rk in round_keys:
+            x = x1 ^ x2 ^ x3 ^ rk
+            x0 ^= t0[x >> 24] ^ t1[(x >> 16) & 0xff] ^ t2[(x >> 8) & 0xff] ^ t3[x & 0xff]
+            x0, x1, x2, x3 = x1, x2, x3, x0
+        # 反序变换R
+        out[start:start + BATCH_BLOCKS] = np.stack([x3, x2, x1, x0], axis=1)
+    return out.astype(">u4").tobytes()
+
+
+def pkcs7_pad(data: bytes) -> bytes:
+    padding = BLOCK_SIZE - len(data) % BLOCK_SIZE
+    return data + bytes([padding]) * padding
+
+
+def pkcs7_unpad(data: bytes) -> bytes:
+    # 与 gmssl 的 pkcs7_unpadding 一致, 不校验填充内容
+    return data[:-data[-1]]
+
+
+class SM4Engine:
+    """基于NumPy的SM4-ECB实现, 输出与 gmssl CryptSM4 逐字节一致
+
+    加密、解密轮密钥在构造时各计算一次; 每一轮对所有分组同时查T表(S盒与线性变换合并的查找表)。
+    """
+
+    def __init__(self, key: bytes):
+        self.encrypt_keys = expand_key(key)
+        self.decrypt_keys = self.encrypt_keys[::-1].copy()
+
+    def encrypt_ecb(self, data: bytes) -> bytes:
+        """PKCS7填充后ECB加密"""
+        return crypt_blocks(pkcs7_pad(data), self.encrypt_keys)
+
+    def decrypt_ecb(self, data: bytes) -> bytes:
+        """ECB解密后去除PKCS7填充"""
+        return pkcs7_unpad(crypt_blocks(data, self.decrypt_keys))
@@ -0,0 +1,32 @@
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+import src.config.config as config
+from src.geocloudservice.blueprints.admin import check_admin_token
+
+
+class TestCheckAdminToken(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def check(self, token, headers=None, remote_addr='127.0.0.1'):
+        with mock.patch.object(config, 'ADMIN_TOKEN', token, create=True):
+            with self.app.test_request_context(headers=headers, environ_base={'REMOTE_ADDR': remote_addr}):
+                return check_admin_token()
+
+    def test_no_token_denies_local(self):
+        # 未配置令牌时本机请求(包括经同机反向代理转发的请求)也拒绝
+        self.assertFalse(self.check(None))
+        self.assertFalse(self.check('', headers={'X-Admin-Token': ''}))
+
+    def test_token(self):
+        self.assertTrue(self.check('secret', headers={'X-Admin-Token': 'secret'}, remote_addr='10.0.0.1'))
+        self.assertFalse(self.check('secret', headers={'X-Admin-Token': 'wrong'}))
+        self.assertFalse(self.check('secret'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import random
+import threading
+import unittest
+
+from src.utils.CacheManager import SimpleCache, CacheManager, estimateSize
+
+
+class TestSimpleCacheConcurrency(unittest.TestCase):
+    """多线程压力测试: 分片缓存的读写一致性与内存预算"""
+
+    THREADS = 16
+    OPS_PER_THREAD = 5000
+    KEYS = 200
+
+    def setUp(self):
+        self.cache = SimpleCache(max_bytes=64 * 1024, ttl=60, shards=8)
+        self.errors = []
+
+    def valueFor(self, key: str) -> list:
+        # 值由键唯一确定, 读到的任何值都必须与键匹配
+        return [key] * (int(key[1:]) % 20 + 1)
+
+    def worker(self, seed: int):
+        rnd = random.Random(seed)
+        try:
+            for _ in range(self.OPS_PER_THREAD):
+                key = f'k{rnd.randrange(self.KEYS)}'
+                namespace = rnd.choice(['fetchRecommendData', 'searchData'])
+                op = rnd.random()
+                if op < 0.6:
+                    value = self.cache.get(key, namespace)
+                    if value is not None and value != self.valueFor(key):
+                        self.errors.append(f'{key} 读到错误的值 {value!r}')
+                elif op < 0.95:
+                    self.cache.set(key, self.valueFor(key), namespace)
+                else:
+                    self.cache.delete(key, namespace)
+        except Exception as e:
+            self.errors.append(repr(e))
+
+    def test_concurrent_get_set_delete(self):
+        threads = [threading.Thread(target=self.worker, args=(i,)) for i in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.errors, [])
+
+        # 每个分片记录的占用字节数必须与实际条目一致, 命名空间的总占用不超预算
+        for shards in self.cache.namespaces.values():
+            for shard in shards:
+                cache = shard.cache
+                expected = sum(estimateSize(cache[k]) for k in list(cache.keys()))
+                self.assertEqual(cache.currsize, expected)
+            self.assertLessEqual(sum(shard.cache.currsize for shard in shards), self.cache.max_bytes)
+
+    def test_oversized_entry_is_skipped(self):
+        manager = CacheManager(SimpleCache(max_bytes=1024, shards=1))
+        manager.setData('searchData', ['x' * 4096], 'guid')
+        self.assertIsNone(manager.getData('searchData', 'guid'))
+        manager.setData('searchData', ['small'], 'guid')
+        self.assertEqual(manager.getData('searchData', 'guid'), ['small'])
+
+    def test_entry_larger_than_shard_slice(self):
+        # 条目大于 预算/分片数 但小于预算时仍然缓存, 并淘汰其他分片中的条目腾出空间
+        cache = SimpleCache(max_bytes=64 * 1024, shards=8)
+        for i in range(50):
+            cache.set(f'small{i}', 'x' * 1000)
+        big = 'y' * (40 * 1024)
+        cache.set('big', big)
+        self.assertEqual(cache.get('big'), big)
+        stats = cache.stats()['default']
+        self.assertLessEqual(stats['bytes'], 64 * 1024)
+        self.assertEqual(stats['maxBytes'], 64 * 1024)
+        self.assertGreater(stats['evictions'], 0)
+
+    def test_clear_is_not_eviction(self):
+        cache = SimpleCache(max_bytes=4096, shards=1)
+        for i in range(100):
+            cache.set(str(i), 'x' * 100)
+        evictions = cache.stats()['default']['evictions']
+        self.assertGreater(evictions, 0)
+        cache.clear()
+        stats = cache.stats()['default']
+        self.assertEqual(stats['entries'], 0)
+        self.assertEqual(stats['evictions'], evictions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from shapely.geometry import box
+
+from src.geocloudservice import recommend
+from src.geocloudservice.candidate_cache import CandidateTileCache
+from src.geocloudservice.recommend import fetchDataFromDB, generateRecommendQuery, searchData
+from src.utils.db.embedded import create_pool
+
+TABLES = ['GF1_PMS1', 'GF2_PMS']
+
+
+class TestRecommendCandidates(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pool = create_pool(os.path.join(self.directory, 'test.db'), min=1, max=2,
+                                satellites={'GF1': {'PMS1': '1'}, 'GF2': {'PMS': '2'}}, scenes=3000, orders=10)
+        self.cache = CandidateTileCache(self.pool, tile_degrees=5.0)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+    def original(self, area, limit):
+        minlon, minlat, maxlon, maxlat = area.bounds
+        rows, columns = fetchDataFromDB(self.pool, generateRecommendQuery(TABLES),
+                                        {'limit_num': limit, 'minlon': minlon, 'maxlon': maxlon,
+                                         'minlat': minlat, 'maxlat': maxlat})
+        return {(row[columns.index('F_TABLENAME')], row[columns.index('F_DATANAME')]) for row in rows}
+
+    def test_same_as_original_query(self):
+        area = box(75, 20, 130, 50)
+        result = self.cache.recommendCandidates(TABLES, area, limit=300)
+        self.assertIsNotNone(result)
+        self.assertEqual(len(result), 300)
+        self.assertEqual(set(zip(result['F_TABLENAME'], result['F_DATANAME'])), self.original(area, 300))
+        self.assertTrue((result['F_CLOUDPERCENT'].astype(float) <= 20).all())
+        # 平移后的查询由已缓存的瓦片和新加载的瓦片组装, 结果仍与原始查询一致
+        moved = box(80, 22, 135, 52)
+        result = self.cache.recommendCandidates(TABLES, moved, limit=300)
+        self.assertEqual(set(zip(result['F_TABLENAME'], result['F_DATANAME'])), self.original(moved, 300))
+
+    def test_small_area_skips_tiles(self):
+        area = box(100, 30, 102, 32)
+        self.assertIsNone(self.cache.recommendCandidates(TABLES, area, limit=300))
+        self.assertIsNone(self.cache.tiles.namespaces.get(CandidateTileCache.NAMESPACE))
+
+
+class TestSearchCandidates(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pool = create_pool(os.path.join(self.directory, 'test.db'), min=1, max=2,
+                                satellites={'GF1': {'PMS1': '1'}, 'GF2': {'PMS': '2'}}, scenes=1000, orders=10)
+        # 部分影像角点缺失, 直接查询数据库的检索按几何相交过滤, 仍会返回它们
+        with self.pool.acquire() as conn:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE GF1_PMS1 SET F_TOPLEFTLONGITUDE = NULL, F_BOTTOMRIGHTLATITUDE = NULL "
+                            "WHERE F_DID % 5 = 0")
+            conn.commit()
+        self.cache = CandidateTileCache(self.pool, tile_degrees=5.0)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+    @mock.patch.object(recommend, 'NodeIdToNodeName', {'N1': '节点1', 'N2': '节点2'})
+    @mock.patch.object(recommend, 'satelliteToNodeId', {'GF1': {'PMS1': 'N1'}, 'GF2': {'PMS': 'N2'}})
+    def test_same_as_uncached(self):
+        wkt = box(95, 25, 115, 40).wkt
+        for start, end, cloud in [('2024-01-01 00:00:00', '2026-12-31 23:59:59', '50'),
+                                  ('2025-03-15 12:00:00', '2025-09-01 00:00:00', '100')]:
+            uncached = searchData(TABLES, wkt, None, start, end, cloud, self.pool)
+            # 第二次查询命中已缓存的瓦片
+            for _ in range(2):
+                cached = searchData(TABLES, wkt, None, start, end, cloud, self.pool, self.cache)
+                self.assertEqual(sorted(row['F_DATANAME'] for row in cached),
+                                 sorted(row['F_DATANAME'] for row in uncached))
+            self.assertTrue(any(int(row['F_DID']) % 5 == 0 and row['F_TABLENAME'] == 'GF1_PMS1' for row in cached))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from src.utils.db.embedded import EmbeddedError, SdoGeometry, create_pool, translate
+
+SEED = {'satellites': {'GF1': {'PMS1': '1'}, 'GF2': {'PMS': '2'}}, 'scenes': 200, 'orders': 50}
+
+
+def openPool(path):
+    create_pool(path, **SEED).close()
+
+
+class TestTranslate(unittest.TestCase):
+
+    def test_merge_not_matched(self):
+        sql = translate("""
+            MERGE INTO TF_ORDER t
+            USING (SELECT :F_ORDERNAME AS F_ORDERNAME FROM dual) d
+            ON (t.F_ORDERNAME = d.F_ORDERNAME)
+            WHEN NOT MATCHED THEN
+            INSERT (F_ID, F_ORDERNAME) VALUES (:F_ID, TO_CHAR(:F_ORDERNAME))
+        """)
+        self.assertEqual(sql, "INSERT INTO TF_ORDER (F_ID, F_ORDERNAME) SELECT :F_ID, TO_CHAR(:F_ORDERNAME) "
+                              "FROM (SELECT :F_ORDERNAME AS F_ORDERNAME FROM dual) d WHERE NOT EXISTS "
+                              "(SELECT 1 FROM TF_ORDER t WHERE t.F_ORDERNAME = d.F_ORDERNAME)")
+
+    def test_row_limits(self):
+        self.assertEqual(translate("SELECT A FROM (SELECT A FROM T ORDER BY A) WHERE ROWNUM <= : count"),
+                         "SELECT A FROM (SELECT A FROM T ORDER BY A) LIMIT :count")
+        self.assertEqual(translate("select A from T order by A desc fetch first 1 rows only"),
+                         "select A from T order by A desc LIMIT 1")
+
+
+class TestSdoGeometry(unittest.TestCase):
+
+    def test_polygon_with_hole(self):
+        geometry = SdoGeometry("POLYGON ((0 0, 4 0, 4 4, 0 0), (1 1, 2 1, 2 2, 1 1))")
+        self.assertEqual(geometry.SDO_GTYPE, 2003)
+        self.assertEqual(geometry.SDO_ELEM_INFO.aslist(), [1, 1003, 1, 9, 2003, 1])
+        self.assertEqual(geometry.SDO_ORDINATES.aslist()[:4], [0.0, 0.0, 4.0, 0.0])
+
+
+class TestEmbeddedPool(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pool = create_pool(os.path.join(self.directory, 'test.db'), min=1, max=2, wait_timeout=50, **SEED)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+    def test_union_query_types(self):
+        with self.pool.acquire() as conn:
+            with conn.cursor() as cur:
+                cur.execute("select /*+ PARALLEL(16) */ F_DATANAME, F_RECEIVETIME, F_SPATIAL_INFO FROM GF1_PMS1 "
+                            "WHERE F_RECEIVETIME BETWEEN TO_DATE(:startTime, 'YYYY-MM-DD HH24:MI:SS') "
+                            "AND TO_DATE(:endTime, 'YYYY-MM-DD HH24:MI:SS') UNION ALL "
+                            "select F_DATANAME, F_RECEIVETIME, F_SPATIAL_INFO FROM TB_META_GF2",
+                            {'startTime': '2000-01-01 00:00:00', 'endTime': '2100-01-01 00:00:00'})
+                self.assertEqual([col[0] for col in cur.description], ['F_DATANAME', 'F_RECEIVETIME', 'F_SPATIAL_INFO'])
+                rows = cur.fetchall()
+        self.assertEqual(len(rows), 400)
+        self.assertIsInstance(rows[0][1], datetime)
+        self.assertEqual(rows[0][2].SDO_GTYPE, 2003)
+        self.assertEqual(len(rows[0][2].SDO_ORDINATES.aslist()), 10)
+
+    def test_get_wkt_and_batch_errors(self):
+        with self.pool.acquire() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT SDO_GEOMETRY.get_wkt(GEOM) FROM TC_DISTRICT WHERE F_DISTCODE = :areacode",
+                            {'areacode': '156000000'})
+                self.assertTrue(cur.fetchone()[0].read().startswith('POLYGON'))
+                cur.executemany("INSERT INTO TC_SYS_USER (F_ID, F_LOGINNAME) VALUES (:id, :name)",
+                                [{'id': 1000, 'name': 'a'}, {'id': 1001}, {'id': 1002, 'name': 'c'}], batcherrors=True)
+                self.assertEqual([error.offset for error in cur.getbatcherrors()], [1])
+                conn.commit()
+                cur.execute("SELECT COUNT(*) FROM TC_SYS_USER WHERE F_ID >= 1000")
+                self.assertEqual(cur.fetchone()[0], 2)
+
+    def test_wait_timeout(self):
+        first, second = self.pool.acquire(), self.pool.acquire()
+        with self.assertRaises(EmbeddedError):
+            self.pool.acquire()
+        first.close()
+        self.pool.acquire().close()
+        second.close()
+        self.assertEqual(self.pool.busy, 0)
+
+
+class TestConcurrentCreate(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_populate_once(self):
+        # 多个进程同时打开新数据库时只写入一次合成数据
+        path = os.path.join(self.directory, 'test.db')
+        processes = [multiprocessing.Process(target=openPool, args=(path,)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual([process.exitcode for process in processes], [0] * 4)
+        pool = create_pool(path)
+        try:
+            with pool.acquire() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT COUNT(*) FROM GF1_PMS1")
+                    self.assertEqual(cur.fetchone()[0], 200)
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
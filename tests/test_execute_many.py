@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.utils.db.embedded import EmbeddedConnection, create_pool
+from src.utils.db.oracle import executeMany
+
+SQL = "INSERT INTO TC_SYS_USER (F_ID, F_LOGINNAME) VALUES (:id, :name)"
+
+
+class TestExecuteMany(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pool = create_pool(os.path.join(self.directory, 'test.db'), min=1, max=2,
+                                satellites={'GF1': {'PMS1': '1'}}, scenes=10, orders=10)
+        self.rows = [{'id': 1000 + i, 'name': f'u{i}'} for i in range(10)]
+        del self.rows[1]['name']
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+    def count(self) -> int:
+        with self.pool.acquire() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM TC_SYS_USER WHERE F_ID >= 1000")
+                return cur.fetchone()[0]
+
+    def test_batch_errors(self):
+        failed = executeMany(self.pool, SQL, self.rows, batch_size=3)
+        self.assertEqual([index for index, _ in failed], [1])
+        self.assertEqual(self.count(), 9)
+
+    def test_connection_lost(self):
+        # 第三批提交时连接断开, 回滚也失败: 已提交的前两批不计入失败
+        commit = EmbeddedConnection.commit
+        calls = []
+
+        def flakyCommit(conn):
+            calls.append(conn)
+            if len(calls) == 3:
+                raise ConnectionError('连接断开')
+            commit(conn)
+
+        with mock.patch.object(EmbeddedConnection, 'commit', flakyCommit), \
+                mock.patch.object(EmbeddedConnection, 'rollback', side_effect=ConnectionError('连接断开')):
+            failed = executeMany(self.pool, SQL, self.rows, batch_size=3)
+        self.assertEqual([index for index, _ in failed], [1, 6, 7, 8, 9])
+        self.assertEqual(self.count(), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
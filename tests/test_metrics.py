@@ -0,0 +1,40 @@
+import threading
+import unittest
+
+from src.utils.metrics import Histogram
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_snapshot(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 0.5, 3.0):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['count'], 5)
+        self.assertAlmostEqual(snapshot['sum'], 3.605)
+        self.assertEqual(snapshot['buckets'], {0.01: 1, 0.1: 3, 1.0: 4})
+        self.assertEqual(snapshot['p50'], 0.1)
+        # 超出最大分桶的分位数取观测到的最大值
+        self.assertEqual(snapshot['p99'], 3.0)
+
+    def test_empty(self):
+        self.assertIsNone(Histogram().snapshot()['p50'])
+
+    def test_concurrent_observe(self):
+        histogram = Histogram()
+
+        def worker():
+            for _ in range(10000):
+                histogram.observe(0.002)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(histogram.snapshot()['count'], 80000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import types
+import unittest
+
+from flask import Flask
+from PIL import Image
+
+from src.geocloudservice.blueprints.quicklook import quicklook_blueprint
+from src.geocloudservice.quicklook import IMAGE_ERRORS, QuicklookService, make_variant
+
+
+def jpeg(width, height) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (10, 20, 30)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+class FakeObjectServer:
+    """只在内存中保存对象的 ObjectServer"""
+
+    def __init__(self, objects: dict):
+        self.objects = objects
+        self.disk_cache = None
+        self.client = self
+
+    def stat(self, bucket, name):
+        data = self.objects.get(name)
+        if data is None:
+            return None
+        return types.SimpleNamespace(etag=f'"{len(data)}"', size=len(data), last_modified=None,
+                                     content_type="image/jpeg")
+
+    def invalidate(self, bucket, name):
+        pass
+
+    def get_object(self, bucket, name):
+        return types.SimpleNamespace(read=lambda: self.objects[name], close=lambda: None, release_conn=lambda: None)
+
+
+class FakeSiwa:
+
+    def doc(self, **kwargs):
+        return lambda func: func
+
+
+class TestMakeVariant(unittest.TestCase):
+
+    def test_resize(self):
+        with Image.open(io.BytesIO(make_variant(jpeg(2000, 1000), 512))) as image:
+            self.assertEqual(image.size, (512, 256))
+
+    def test_corrupt(self):
+        with self.assertRaises(IMAGE_ERRORS):
+            make_variant(b"not an image", 512)
+        with self.assertRaises(IMAGE_ERRORS):
+            make_variant(jpeg(64, 64)[:200], 512)
+
+
+class TestQuicklookBlueprint(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.extensions["quicklook"] = QuicklookService(
+            FakeObjectServer({"1_N1.jpg": jpeg(800, 600), "2_N1.jpg": b"\xff\xd8corrupt"}), "quicklook",
+            "{dataId}_{nodeId}.jpg")
+        app.register_blueprint(quicklook_blueprint(app, FakeSiwa()))
+        self.client = app.test_client()
+
+    def get(self, data_id, size="small"):
+        return self.client.get("/metaImage/getImageByTypeForAll",
+                               query_string={"dataId": data_id, "nodeId": "N1", "size": size})
+
+    def test_image(self):
+        response = self.get("1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "image/jpeg")
+
+    def test_corrupt_payload(self):
+        response = self.get("2")
+        self.assertEqual(response.status_code, 502)
+        self.assertIn("error", response.get_json())
+        self.assertEqual(self.get("3").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
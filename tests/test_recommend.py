@@ -0,0 +1,26 @@
+import unittest
+from unittest import mock
+
+from src.geocloudservice import recommend
+
+
+class TestFormatDictForView(unittest.TestCase):
+
+    @mock.patch.object(recommend, 'NodeIdToNodeName', {'N1': '节点1'})
+    @mock.patch.object(recommend, 'satelliteToNodeId', {'GF1': {'PMS1': 'N1'}})
+    def test_format(self):
+        data = [{'F_SATELLITEID': 'GF1', 'F_SENSORID': 'PMS1', 'F_CLOUDPERCENT': '12.7', 'geometry': 'POLYGON'},
+                {'F_SATELLITEID': 'GF1', 'F_SENSORID': 'PMS1', 'F_CLOUDPERCENT': float('nan')}]
+        # 每行的格式化结果都要返回, 不能是None
+        self.assertEqual(recommend.formatDictForView(data), [
+            {'F_SATELLITEID': 'GF1', 'F_SENSORID': 'PMS1', 'F_CLOUDPERCENT': 12, 'WKTRESPONSE': 'POLYGON',
+             'NODEID': 'N1', 'RN': 1, 'NODENAME': '节点1'},
+            {'F_SATELLITEID': 'GF1', 'F_SENSORID': 'PMS1', 'F_CLOUDPERCENT': 0,
+             'NODEID': 'N1', 'RN': 2, 'NODENAME': '节点1'},
+        ])
+        # 不修改传入的字典
+        self.assertIn('geometry', data[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import geopandas as gpd
+from shapely.geometry import box
+
+from src.utils.SharedArrowCache import SharedArrowCache
+
+
+def sampleGdf(rows: int = 3) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame({'F_DATANAME': [f'GF1_{i}' for i in range(rows)],
+                             'F_CLOUDPERCENT': [float(i) for i in range(rows)]},
+                            geometry=[box(i, i, i + 1, i + 1) for i in range(rows)], crs='EPSG:4326')
+
+
+class TestSharedArrowCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SharedArrowCache(self.directory, ttl=60, max_bytes=1024 * 1024, cleanup_interval=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def age(self, key: str, namespace: str, seconds: float):
+        path = self.cache._getPath(key, namespace)
+        mtime = time.time() - seconds
+        os.utime(path, (mtime, mtime))
+
+    def test_gdf(self):
+        gdf = sampleGdf()
+        self.cache.set('k', gdf, 'searchData')
+        result = self.cache.get('k', 'searchData')
+        self.assertIsInstance(result, gpd.GeoDataFrame)
+        self.assertEqual(list(result['F_DATANAME']), list(gdf['F_DATANAME']))
+        self.assertTrue(result.geometry.geom_equals(gdf.geometry).all())
+        self.assertEqual(result.crs, gdf.crs)
+
+    def test_gdf_tuple(self):
+        gdf = sampleGdf()
+        self.cache.set('k', (gdf, 0.87), 'fetchRecommendData')
+        result, coverage = self.cache.get('k', 'fetchRecommendData')
+        self.assertEqual(coverage, 0.87)
+        self.assertEqual(list(result['F_CLOUDPERCENT']), [0.0, 1.0, 2.0])
+
+    def test_records(self):
+        records = [{'F_DATANAME': 'a', 'RN': 1}, {'F_DATANAME': 'b', 'RN': 2}]
+        self.cache.set('k', records, 'searchData')
+        self.assertEqual(self.cache.get('k', 'searchData'), records)
+
+    def test_unsupported_value_is_skipped(self):
+        self.cache.set('k', {'not': 'a list'}, 'searchData')
+        self.cache.set('k2', 'text', 'searchData')
+        self.assertIsNone(self.cache.get('k', 'searchData'))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_ttl_expiry(self):
+        self.cache.set('k', [{'a': 1}], 'searchData')
+        self.age('k', 'searchData', 120)
+        self.assertIsNone(self.cache.get('k', 'searchData'))
+        # 读取时发现过期即删除文件
+        self.assertFalse(os.path.exists(self.cache._getPath('k', 'searchData')))
+
+    def test_cleanup(self):
+        self.cache.set('stale', [{'a': 1}], 'searchData')
+        self.age('stale', 'searchData', 120)
+        tmp_path = os.path.join(self.directory, 'searchData-x.arrow.1.2.tmp')
+        open(tmp_path, 'wb').close()
+        os.utime(tmp_path, (time.time() - 120, time.time() - 120))
+        for i in range(4):
+            self.cache.set(f'k{i}', sampleGdf(200), 'searchData')
+            self.age(f'k{i}', 'searchData', 40 - i)
+        size = os.path.getsize(self.cache._getPath('k0', 'searchData'))
+        self.cache.max_bytes = size * 2 + size // 2
+
+        self.cache.cleanup()
+        self.assertFalse(os.path.exists(self.cache._getPath('stale', 'searchData')))
+        self.assertFalse(os.path.exists(tmp_path))
+        # 超出总大小上限时从最旧的文件开始删除
+        remaining = [i for i in range(4) if os.path.exists(self.cache._getPath(f'k{i}', 'searchData'))]
+        self.assertEqual(remaining, [2, 3])
+        self.assertLessEqual(self.cache.stats()['bytes'], self.cache.max_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
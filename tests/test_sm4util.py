@@ -1,5 +1,11 @@
+import base64
+import os
 import unittest
+
+from gmssl.sm4 import CryptSM4, SM4_ENCRYPT, SM4_DECRYPT
+
 from src.utils.sm4encry import SM4Util
+from src.utils.sm4fast import SM4Engine
 from src.config.config import SM4_KEY
 
 class TestSM4Util(unittest.TestCase):
@@ -20,5 +26,40 @@ class TestSM4Util(unittest.TestCase):
         plain_text = self.sm4.decrypt_ecb_base64(cipher_text)
         self.assertEqual(plain_text, self.test_str)
 
+
+class TestSM4Engine(unittest.TestCase):
+    """NumPy实现与 gmssl 的输出必须逐字节一致"""
+
+    def gmssl_crypt(self, key: bytes, data: bytes, mode) -> bytes:
+        crypt = CryptSM4()
+        crypt.set_key(key, mode)
+        return crypt.crypt_ecb(data)
+
+    def test_standard_vector(self):
+        """GB/T 32907 附录A示例: 单个分组"""
+        key = bytes.fromhex("0123456789abcdeffedcba9876543210")
+        engine = SM4Engine(key)
+        cipher = engine.encrypt_ecb(key)
+        self.assertEqual(cipher[:16].hex(), "681edf34d206965e86b3e94f536e4246")
+
+    def test_matches_gmssl(self):
+        for length in list(range(0, 50)) + [1000, 4096, 12345]:
+            key = os.urandom(16)
+            data = os.urandom(length)
+            engine = SM4Engine(key)
+            cipher = engine.encrypt_ecb(data)
+            self.assertEqual(cipher, self.gmssl_crypt(key, data, SM4_ENCRYPT), f"length={length}")
+            self.assertEqual(engine.decrypt_ecb(cipher), data, f"length={length}")
+            self.assertEqual(engine.decrypt_ecb(cipher), self.gmssl_crypt(key, cipher, SM4_DECRYPT))
+
+    def test_sm4util_matches_gmssl(self):
+        """SM4Util 的 base64 输出与改造前逐次 set_key 的 gmssl 实现一致"""
+        text = "行政区划树" * 1000
+        sm4 = SM4Util(key=SM4_KEY)
+        expected = base64.b64encode(self.gmssl_crypt(SM4_KEY, text.encode("utf-8"), SM4_ENCRYPT)).decode("utf-8")
+        self.assertEqual(sm4.encrypt_ecb_base64(text), expected)
+        self.assertEqual(sm4.decrypt_ecb_base64(expected), text)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
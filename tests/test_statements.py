@@ -0,0 +1,42 @@
+import unittest
+
+from src.utils.db.statements import fingerprint, StatementStats
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_literals_and_binds(self):
+        a, _ = fingerprint("SELECT F_ID FROM TF_ORDER WHERE F_ORDERNAME = :F_ORDERNAME AND F_STATUS = 1")
+        b, _ = fingerprint("select f_id   from tf_order where f_ordername = :name and f_status = 6 -- 注释")
+        self.assertEqual(a, b)
+        self.assertEqual(a, "SELECT F_ID FROM TF_ORDER WHERE F_ORDERNAME = :? AND F_STATUS = ?")
+
+    def test_in_list(self):
+        a, _ = fingerprint("SELECT * FROM T WHERE ID IN (:id0, :id1)")
+        b, _ = fingerprint("SELECT * FROM T WHERE ID IN (:id0, :id1, :id2, :id3)")
+        self.assertEqual(a, b)
+
+    def test_union_of_tables(self):
+        branch = "select /*+ PARALLEL(16) */ A,B FROM {} WHERE X > :minlon"
+        a, tables = fingerprint(" UNION ALL ".join(branch.format(t) for t in ("GF1", "GF2")))
+        b, _ = fingerprint(branch.format("ZY3") + " UNION ALL " + branch.format("GF1"))
+        self.assertEqual(a, b)
+        self.assertEqual(tables, ["GF1", "GF2"])
+
+
+class TestStatementStats(unittest.TestCase):
+
+    def test_aggregate(self):
+        stats = StatementStats(slow_threshold=10, max_fingerprints=1)
+        stats.record("SELECT 1 FROM DUAL", None, 0.1, 0.2, 1, 8)
+        stats.record("SELECT 2 FROM DUAL", None, 0.3, 0.0, 1, 8)
+        stats.record("SELECT * FROM T", None, 0.1, 0.0, 0, 0, error=True)
+        result = {item['fingerprint']: item for item in stats.stats()}
+        self.assertEqual(result["SELECT ? FROM DUAL"]['count'], 2)
+        self.assertAlmostEqual(result["SELECT ? FROM DUAL"]['totalSeconds'], 0.6)
+        # 超出指纹上限的语句归入 <other>
+        self.assertEqual(result["<other>"]['errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()